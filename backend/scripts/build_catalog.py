@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""
+データセットカタログ生成スクリプト
+
+データディレクトリの wi_{area}_{profile}.parquet からカタログ（catalog.json）を作成・更新します。
+Phase 2 は実行のたびにカタログを更新するため、このスクリプトは
+カタログ導入前に作成されたデータや手動でコピーしたデータの登録に使います。
+
+使用例:
+    python build_catalog.py
+    python build_catalog.py --data-dir ../data/processed --area shinagawa
+"""
+
+import click
+import json
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.wi.catalog import describe_dataset, read_catalog, scan_datasets, update_catalog
+from src.wi.config import get_config
+from loguru import logger
+import geopandas as gpd
+
+
+@click.command()
+@click.option(
+    '--data-dir',
+    type=click.Path(),
+    default=None,
+    help='Data directory (default: data/processed)'
+)
+@click.option(
+    '--area',
+    default=None,
+    help='Only register datasets of this area'
+)
+@click.option(
+    '--prune',
+    is_flag=True,
+    help='Remove catalog entries whose WI file no longer exists'
+)
+def main(data_dir: str, area: str, prune: bool):
+    """カタログを作成・更新."""
+    if data_dir is None:
+        data_dir = Path(__file__).parent.parent.parent / "data" / "processed"
+    else:
+        data_dir = Path(data_dir)
+
+    datasets = scan_datasets(data_dir, get_config().list_profiles())
+    if area:
+        datasets = {key: entry for key, entry in datasets.items() if key[0] == area}
+
+    entries = []
+    for (dataset_area, profile), entry in sorted(datasets.items()):
+        wi_path = data_dir / entry['files']['wi']['name']
+        logger.info(f"Describing {dataset_area}/{profile}: {wi_path.name}")
+
+        stats = {}
+        stats_path = data_dir / f"wi_{dataset_area}_{profile}.stats.json"
+        if stats_path.exists():
+            with open(stats_path, encoding='utf-8') as f:
+                sidecar = json.load(f)
+            stats = {'wi_score': sidecar.get('wi_score'), 'scores': sidecar.get('scores', {})}
+
+        entries.append(describe_dataset(
+            dataset_area, profile, gpd.read_parquet(wi_path),
+            files={
+                'wi': wi_path,
+                'stats': stats_path,
+                'distances': data_dir / f"distances_{dataset_area}_{profile}.parquet",
+                'grid': data_dir / f"grid_{dataset_area}_{profile}.geojson",
+                'tiles': data_dir / f"tiles_{dataset_area}_{profile}.mbtiles",
+            },
+            stats=stats
+        ))
+
+    remove = []
+    if prune:
+        for entry in read_catalog(data_dir).get('datasets', {}).values():
+            if not (data_dir / entry['files']['wi']['name']).exists():
+                remove.append((entry['area'], entry['profile']))
+                logger.info(f"Removing {entry['area']}/{entry['profile']} (WI file missing)")
+
+    catalog_file = update_catalog(data_dir, entries, remove=remove)
+    logger.info(f"Updated catalog: {catalog_file} ({len(entries)} datasets described)")
+
+
+if __name__ == '__main__':
+    main()
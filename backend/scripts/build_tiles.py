@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+"""
+タイルアーカイブ生成スクリプト
+
+Phase 2の結果からWIグリッドとアメニティの静的ベクタタイル（MBTiles）を生成します。
+既存のアーカイブがある場合は、内容が変わったタイルのみ再エンコードします。
+
+使用例:
+    python build_tiles.py --area shinagawa --profile residential_family
+    python build_tiles.py --area shinagawa --profile residential_family --max-zoom 17 --workers 8
+"""
+
+import click
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.wi.pipeline import build_tiles
+from loguru import logger
+
+
+@click.command()
+@click.option('--area', required=True, help='Area name')
+@click.option('--profile', required=True, help='Profile name')
+@click.option(
+    '--data-dir',
+    type=click.Path(),
+    default=None,
+    help='Data directory (default: data/processed)'
+)
+@click.option('--min-zoom', type=int, default=10, help='Minimum zoom level (default: 10)')
+@click.option('--max-zoom', type=int, default=16, help='Maximum zoom level (default: 16)')
+@click.option('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+@click.option('--force', is_flag=True, help='Re-encode all tiles instead of only changed ones')
+def main(area: str, profile: str, data_dir: str, min_zoom: int, max_zoom: int, workers: int, force: bool):
+    """WIグリッドとアメニティのタイルアーカイブを生成."""
+
+    logger.info("=" * 60)
+    logger.info("Build tile archive")
+    logger.info("=" * 60)
+    logger.info(f"Area: {area}")
+    logger.info(f"Profile: {profile}")
+    logger.info(f"Zoom: {min_zoom}-{max_zoom}")
+
+    if data_dir is None:
+        data_dir = Path(__file__).parent.parent.parent / "data" / "processed"
+    else:
+        data_dir = Path(data_dir)
+
+    try:
+        output_path = build_tiles(
+            area, profile, data_dir,
+            min_zoom=min_zoom, max_zoom=max_zoom, workers=workers, force=force
+        )
+    except FileNotFoundError as e:
+        logger.error(str(e))
+        logger.info("Please run Phase 2 first")
+        sys.exit(1)
+
+    logger.info(f"Saved tiles: {output_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -6,6 +6,7 @@ OSMと国土数値情報からアメニティデータと道路ネットワー
 
 使用例:
     python phase1_download_data.py --area "品川区, 東京都, 日本" --profile residential_family
+    python phase1_download_data.py --area "品川区, 東京都, 日本" --area-id shinagawa  # 地名辞書も作成
 """
 
 import click
@@ -16,6 +17,7 @@ import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.wi.data import OSMDataLoader, KokudoDataLoader, DataMerger
+from src.wi.geocoding import GAZETTEER_TAGS, build_gazetteer_entries
 from src.wi.config import get_config
 from loguru import logger
 
@@ -42,7 +44,17 @@ from loguru import logger
     is_flag=True,
     help='Skip network download'
 )
-def main(area: str, profile: str, output_dir: str, skip_network: bool):
+@click.option(
+    '--area-id',
+    default=None,
+    help='Area ID used in processed file names (e.g., shinagawa); required for the gazetteer'
+)
+@click.option(
+    '--skip-gazetteer',
+    is_flag=True,
+    help='Skip building the offline gazetteer'
+)
+def main(area: str, profile: str, output_dir: str, skip_network: bool, area_id: str, skip_gazetteer: bool):
     """Phase 1: アメニティデータと道路ネットワークのダウンロード."""
 
     logger.info("=" * 60)
@@ -193,6 +205,28 @@ def main(area: str, profile: str, output_dir: str, skip_network: bool):
         except Exception as e:
             logger. error(f"Failed to download network: {e}")
 
+    # === Step 5: Build gazetteer ===
+    if not skip_gazetteer:
+        logger.info("\n" + "=" * 60)
+        logger.info("Step 5: Building offline gazetteer...")
+        logger.info("=" * 60)
+
+        if area_id is None:
+            logger.warning("No --area-id given, skipping gazetteer")
+        else:
+            try:
+                import osmnx as ox
+                features = ox.features_from_place(area, GAZETTEER_TAGS)
+                entries = build_gazetteer_entries(features, area_id)
+
+                gazetteer_output = output_dir / f"gazetteer_{area_id}.parquet"
+                entries.to_parquet(gazetteer_output, index=False)
+                logger.info(f"Saved gazetteer: {gazetteer_output}")
+                logger.info(f"  Entries: {len(entries)}")
+
+            except Exception as e:
+                logger.error(f"Failed to build gazetteer: {e}")
+
     # === Summary ===
     logger.info("\n" + "=" * 60)
     logger.info("Phase 1 Complete!")
@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+"""
+地点一括スコアリングスクリプト
+
+物件リストなどの緯度経度（CSV / Parquet）をチャンク単位で読み込み、
+APIの ``POST /wi/points`` と同じエンジンでWIを付与して書き出します。
+
+使用例:
+    python score_points.py --input listings.csv --output scored.parquet --profile residential_family
+    python score_points.py --input listings.parquet --output scored.csv --profile residential_family \
+        --area shinagawa --lat-column latitude --lon-column longitude
+"""
+
+import click
+from pathlib import Path
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.wi.api.services.data_loader import DataLoader
+from src.wi.api.services.point_service import PointScoringService
+from loguru import logger
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+def iter_chunks(input_path: Path, chunk_size: int):
+    """入力ファイルをDataFrameのチャンクとして読み込む."""
+    if input_path.suffix == ".parquet":
+        parquet_file = pq.ParquetFile(input_path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(input_path, chunksize=chunk_size)
+
+
+def score_points(
+    input_path: Path,
+    output_path: Path,
+    profile: str,
+    data_dir: Path,
+    area: str = None,
+    lat_column: str = "lat",
+    lon_column: str = "lon",
+    fields: list = None,
+    chunk_size: int = 500000
+) -> int:
+    """
+    地点ファイルにWIスコア列を付与して書き出す.
+
+    Args:
+        input_path: 入力ファイル（.csv / .parquet）
+        output_path: 出力ファイル（.csv / .parquet）
+        profile: プロファイル名
+        data_dir: wi_*.parquet のあるディレクトリ
+        area: エリア名（省略時は地点を含むエリアを自動判定）
+        lat_column: 緯度列名
+        lon_column: 経度列名
+        fields: 出力するスコア列（省略時は wi_score と score_*）
+        chunk_size: 1チャンクの行数
+
+    Returns:
+        処理した地点数
+    """
+    service = PointScoringService(DataLoader(data_dir))
+    writer = None
+    total = 0
+    start = time.perf_counter()
+
+    try:
+        for i, chunk in enumerate(iter_chunks(input_path, chunk_size)):
+            for column in (lat_column, lon_column):
+                if column not in chunk.columns:
+                    raise ValueError(f"Column not found: {column}")
+
+            scores = service.score(
+                chunk[lon_column].to_numpy(dtype=float),
+                chunk[lat_column].to_numpy(dtype=float),
+                profile,
+                area=area,
+                fields=fields
+            )
+            matched = int(scores["grid_id"].notna().sum())
+            # 入力と同名のスコア列（grid_id, area など）は wi_ を付けて残す
+            scores = scores.rename(columns={
+                c: f"wi_{c}" for c in scores.columns if c in chunk.columns
+            })
+            result = pd.concat([chunk.reset_index(drop=True), scores], axis=1)
+
+            if output_path.suffix == ".parquet":
+                table = pa.Table.from_pandas(result, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(output_path, table.schema, compression="zstd")
+                writer.write_table(table.cast(writer.schema))
+            else:
+                result.to_csv(output_path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+
+            total += len(result)
+            elapsed = time.perf_counter() - start
+            logger.info(
+                f"Chunk {i + 1}: {total:,} points "
+                f"({total / elapsed * 60:,.0f} points/min, "
+                f"{matched:,}/{len(scores):,} matched)"
+            )
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return total
+
+
+@click.command()
+@click.option('--input', 'input_path', required=True, type=click.Path(exists=True), help='Input CSV or Parquet file')
+@click.option('--output', 'output_path', required=True, type=click.Path(), help='Output CSV or Parquet file')
+@click.option('--profile', required=True, help='Profile name')
+@click.option('--area', default=None, help='Area name (default: detect per point)')
+@click.option(
+    '--data-dir',
+    type=click.Path(),
+    default=None,
+    help='Data directory (default: data/processed)'
+)
+@click.option('--lat-column', default='lat', help='Latitude column (default: lat)')
+@click.option('--lon-column', default='lon', help='Longitude column (default: lon)')
+@click.option('--fields', default=None, help='Comma-separated score columns (default: wi_score and score_*)')
+@click.option('--chunk-size', type=int, default=500000, help='Rows per chunk (default: 500000)')
+def main(
+    input_path: str,
+    output_path: str,
+    profile: str,
+    area: str,
+    data_dir: str,
+    lat_column: str,
+    lon_column: str,
+    fields: str,
+    chunk_size: int
+):
+    """地点リストにWIスコアを付与."""
+
+    logger.info("=" * 60)
+    logger.info("Score points")
+    logger.info("=" * 60)
+    logger.info(f"Input: {input_path}")
+    logger.info(f"Profile: {profile}")
+    logger.info(f"Area: {area or 'auto'}")
+
+    if data_dir is None:
+        data_dir = Path(__file__).parent.parent.parent / "data" / "processed"
+    else:
+        data_dir = Path(data_dir)
+
+    fields_list = [f.strip() for f in fields.split(',') if f.strip()] if fields else None
+
+    try:
+        total = score_points(
+            Path(input_path), Path(output_path), profile, data_dir,
+            area=area, lat_column=lat_column, lon_column=lon_column,
+            fields=fields_list, chunk_size=chunk_size
+        )
+    except (FileNotFoundError, ValueError) as e:
+        logger.error(str(e))
+        sys.exit(1)
+
+    logger.info(f"Saved {total:,} scored points: {output_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,8 +2,23 @@
 
 from functools import lru_cache
 from pathlib import Path
+from typing import Iterator, Optional
+import os
+
+from loguru import logger
 
 from ..config import get_config, Config
+from ..geocoding import Gazetteer
+from .services.amenity_store import AmenityStore
+from .services.custom_wi_service import CustomWIService
+from .services.data_loader import DataLoader
+from .services.executor import RequestExecutor
+from .services.geocoding_service import GeocodingService
+from .services.jobs import JobManager, JobStore
+from .services.metrics import MetricFamily
+from .services.response_cache import ResponseCache
+from .services.tile_service import TileService
+from .services.warmup import WarmupManager
 
 
 @lru_cache()
@@ -19,10 +34,337 @@ def get_app_config() -> Config:
 def get_data_dir() -> Path:
     """Get data directory path.
 
+    Honours the ``DATA_DIR`` environment variable (set in docker-compose).
+
     Returns:
         Path to data/processed directory
     """
+    if os.environ.get("DATA_DIR"):
+        return Path(os.environ["DATA_DIR"])
+
     # Default to data/processed relative to project root
     project_root = Path(__file__).parent.parent.parent.parent.parent
     data_dir = project_root / "data" / "processed"
     return data_dir
+
+
+def get_cache_dir() -> Path:
+    """Get the directory of the API's on-disk caches.
+
+    Honours the ``CACHE_DIR`` environment variable (docker-compose mounts a
+    writable volume there, since the data directory is read-only).
+
+    Returns:
+        Path to the cache directory (default: data/cache)
+    """
+    if os.environ.get("CACHE_DIR"):
+        return Path(os.environ["CACHE_DIR"])
+    return get_data_dir().parent / "cache"
+
+
+@lru_cache()
+def get_data_loader() -> DataLoader:
+    """Get the application-wide DataLoader (singleton).
+
+    Sharing one instance lets the dataset cache survive across requests.
+    With ``cache.mmap_datasets``, datasets are served from columnar copies
+    in ``cache.columnar_dir`` (default: ``columnar`` in the cache
+    directory), memory-mapped and shared by all worker processes.
+
+    Returns:
+        DataLoader instance
+    """
+    config = get_app_config()
+    cache_config = config.get_api_config().get("cache", {})
+    reload_config = config.get_api_config().get("reload", {})
+
+    columnar_dir = None
+    if cache_config.get("mmap_datasets", True):
+        columnar_dir = cache_config.get("columnar_dir")
+        columnar_dir = Path(columnar_dir) if columnar_dir else get_cache_dir() / "columnar"
+
+    loader = DataLoader(
+        get_data_dir(),
+        max_datasets=cache_config.get("max_datasets", 5),
+        profiles=config.list_profiles(),
+        check_interval=reload_config.get("check_interval_seconds", 2.0),
+        columnar_dir=columnar_dir
+    )
+    loader.add_reload_listener(purge_dataset_version)
+    return loader
+
+
+def purge_dataset_version(area: str, profile: str, old_version: str, new_version: Optional[str]):
+    """Drop everything derived from a replaced dataset version.
+
+    Cache keys already include the dataset version, so stale entries are
+    never served; purging frees their memory right away instead of waiting
+    for LRU eviction.
+    """
+    responses = get_response_cache().purge_version(old_version)
+    tiles = get_tile_cache().purge_version(old_version)
+
+    # Structures other datasets derived against this one (e.g. alignments)
+    for dataset in get_data_loader().resident_dataset_objects():
+        dataset.drop_derived(lambda name: old_version in name)
+
+    if get_custom_wi_service.cache_info().currsize:
+        get_custom_wi_service().invalidate(area)
+
+    logger.info(
+        f"Purged caches of {area}/{profile} version {old_version}: "
+        f"{responses} responses, {tiles} tiles"
+    )
+
+
+@lru_cache()
+def get_amenity_store() -> AmenityStore:
+    """Get the application-wide amenity store (singleton).
+
+    Each area's amenities are loaded, indexed and clustered once per file
+    version.
+
+    Returns:
+        AmenityStore instance
+    """
+    performance = get_app_config().get_api_config().get("performance", {})
+    return AmenityStore(
+        get_data_dir(),
+        point_zoom=performance.get("amenity_point_zoom", 15),
+        catalog=get_data_loader().catalog
+    )
+
+
+@lru_cache()
+def get_custom_wi_service() -> CustomWIService:
+    """Get the custom WI service (singleton, holds per-area score matrices).
+
+    Results are cached on disk in ``cache.custom_wi_dir`` (default:
+    ``custom_wi`` in the cache directory); the distance tables are built
+    in ``cache.distances_dir`` (default: ``distances`` in the cache
+    directory), so the data directory can stay read-only.
+
+    Returns:
+        CustomWIService instance
+    """
+    cache_config = get_app_config().get_api_config().get("cache", {})
+    cache_dir = cache_config.get("custom_wi_dir")
+    cache_dir = Path(cache_dir) if cache_dir else get_cache_dir() / "custom_wi"
+    return CustomWIService(
+        get_data_loader(),
+        cache_dir=cache_dir,
+        cache_size_mb=cache_config.get("max_custom_wi_mb", 512),
+        table_dir=get_distances_dir()
+    )
+
+
+def get_distances_dir() -> Path:
+    """Get the directory of the custom-profile distance tables.
+
+    Returns:
+        Path from ``cache.distances_dir`` (default: ``distances`` in the
+        cache directory)
+    """
+    distances_dir = get_app_config().get_api_config().get("cache", {}).get("distances_dir")
+    return Path(distances_dir) if distances_dir else get_cache_dir() / "distances"
+
+
+@lru_cache()
+def get_geocoding_service() -> GeocodingService:
+    """Get the geocoding service (singleton, owns the upstream client and rate limit).
+
+    Results are cached in memory and on disk in ``geocoding.cache_dir``
+    (default: ``geocoding`` in the cache directory). The
+    offline gazetteer is built from the ``gazetteer_{area}.parquet`` files
+    written by Phase 1, unless ``geocoding.offline`` is false.
+
+    Returns:
+        GeocodingService instance
+    """
+    geocoding_config = get_app_config().get_api_config().get("geocoding", {})
+
+    gazetteer = None
+    gazetteer_files = sorted(get_data_dir().glob("gazetteer_*.parquet"))
+    if geocoding_config.get("offline", True) and gazetteer_files:
+        gazetteer = Gazetteer.from_files(gazetteer_files)
+
+    cache_dir = geocoding_config.get("cache_dir")
+    cache_dir = Path(cache_dir) if cache_dir else get_cache_dir() / "geocoding"
+    return GeocodingService(
+        base_url=geocoding_config.get("base_url", GeocodingService.BASE_URL),
+        user_agent=geocoding_config.get("user_agent", GeocodingService.USER_AGENT),
+        requests_per_second=geocoding_config.get("requests_per_second", 1.0),
+        timeout=geocoding_config.get("timeout_seconds", 10.0),
+        cache_ttl=geocoding_config.get("cache_ttl_seconds", 86400),
+        max_cached_queries=geocoding_config.get("max_cached_queries", 1024),
+        cache_dir=cache_dir,
+        cache_size_mb=geocoding_config.get("max_cache_mb", 64),
+        gazetteer=gazetteer
+    )
+
+
+@lru_cache()
+def get_request_executor() -> RequestExecutor:
+    """Get the executor for blocking service calls (singleton, owns the pools).
+
+    Pool sizes and per-endpoint-group limits come from ``executor`` in
+    api.yaml.
+
+    Returns:
+        RequestExecutor instance
+    """
+    executor_config = get_app_config().get_api_config().get("executor", {})
+    return RequestExecutor(
+        io_threads=executor_config.get("io_threads", 8),
+        cpu_threads=executor_config.get("cpu_threads"),
+        process_workers=executor_config.get("process_workers", 2),
+        limits=executor_config.get("limits", {})
+    )
+
+
+@lru_cache()
+def get_job_manager() -> JobManager:
+    """Get the background job manager (singleton, owns the job worker processes).
+
+    The job store and custom-profile result files live in ``jobs.dir``
+    (default: ``jobs`` in the cache directory), shared by all API worker
+    processes. Job workers use the same columnar copies and custom WI
+    result cache as the API.
+
+    Returns:
+        JobManager instance
+    """
+    config = get_app_config().get_api_config()
+    jobs_config = config.get("jobs", {})
+    cache_config = config.get("cache", {})
+    loader = get_data_loader()
+
+    jobs_dir = jobs_config.get("dir")
+    jobs_dir = Path(jobs_dir) if jobs_dir else get_cache_dir() / "jobs"
+    custom_wi_dir = cache_config.get("custom_wi_dir")
+    custom_wi_dir = Path(custom_wi_dir) if custom_wi_dir else get_cache_dir() / "custom_wi"
+
+    settings = {
+        "data_dir": str(loader.data_dir),
+        "results_dir": str(jobs_dir / "results"),
+        "columnar_dir": str(loader.columnar_dir) if loader.columnar_dir else None,
+        "custom_wi_dir": str(custom_wi_dir),
+        "custom_wi_mb": cache_config.get("max_custom_wi_mb", 512),
+        "distances_dir": str(get_distances_dir()),
+        "tile_workers": jobs_config.get("tile_workers"),
+    }
+    return JobManager(
+        JobStore(jobs_dir / "jobs.sqlite"),
+        loader,
+        settings,
+        workers=jobs_config.get("workers", 1),
+        heartbeat_interval=jobs_config.get("heartbeat_seconds", 10),
+        retention_days=jobs_config.get("retention_days", 7)
+    )
+
+
+@lru_cache()
+def get_response_cache() -> ResponseCache:
+    """Get the shared cache of encoded responses (singleton).
+
+    Returns:
+        ResponseCache instance
+    """
+    cache_config = get_app_config().get_api_config().get("cache", {})
+    max_mb = cache_config.get("max_response_mb", 256)
+    return ResponseCache(max_bytes=int(max_mb * 1024 * 1024))
+
+
+@lru_cache()
+def get_tile_cache() -> ResponseCache:
+    """Get the shared cache of encoded vector tiles (singleton).
+
+    Returns:
+        ResponseCache instance
+    """
+    cache_config = get_app_config().get_api_config().get("cache", {})
+    max_mb = cache_config.get("max_tile_mb", 128)
+    return ResponseCache(max_bytes=int(max_mb * 1024 * 1024))
+
+
+@lru_cache()
+def get_tile_service() -> TileService:
+    """Get the tile service (singleton, holds open tile archives).
+
+    Returns:
+        TileService instance
+    """
+    return TileService(get_data_loader(), get_tile_cache())
+
+
+@lru_cache()
+def get_warmup_manager() -> WarmupManager:
+    """Get the startup warm-up manager (singleton).
+
+    Returns:
+        WarmupManager instance
+    """
+    preload_config = get_app_config().get_api_config().get("preload", {})
+    return WarmupManager(
+        get_data_loader(),
+        datasets=preload_config.get("datasets", []),
+        gate_readiness=preload_config.get("gate_readiness", True)
+    )
+
+
+def collect_service_metrics() -> Iterator[MetricFamily]:
+    """Scrape-time metrics read off the application singletons.
+
+    Only singletons that were already created are reported, so a scrape
+    never loads data or starts pools.
+
+    Yields:
+        (name, type, help, [(labels, value), ...]) metric families
+    """
+    if get_data_loader.cache_info().currsize:
+        stats = get_data_loader().cache_stats()
+        yield ("wi_dataset_cache_datasets", "gauge", "Datasets resident in memory",
+               [({}, stats["datasets"])])
+        yield ("wi_dataset_cache_pinned", "gauge", "Resident datasets pinned by the warm set",
+               [({}, stats["pinned"])])
+        yield ("wi_dataset_cache_bytes", "gauge", "Memory footprint of the resident datasets",
+               [({}, stats["memory_bytes"])])
+        for counter in ("hits", "misses", "evictions", "reloads"):
+            yield (f"wi_dataset_cache_{counter}_total", "counter", f"Dataset cache {counter}",
+                   [({}, stats[counter])])
+
+    caches = {
+        name: factory().stats()
+        for name, factory in (("responses", get_response_cache), ("tiles", get_tile_cache))
+        if factory.cache_info().currsize
+    }
+    if caches:
+        yield ("wi_response_cache_entries", "gauge", "Encoded responses held in memory",
+               [({"cache": name}, stats["entries"]) for name, stats in caches.items()])
+        yield ("wi_response_cache_bytes", "gauge", "Size of the encoded responses held in memory",
+               [({"cache": name}, stats["bytes"]) for name, stats in caches.items()])
+        for counter in ("hits", "misses", "evictions"):
+            yield (f"wi_response_cache_{counter}_total", "counter", f"Response cache {counter}",
+                   [({"cache": name}, stats[counter]) for name, stats in caches.items()])
+
+    if get_request_executor.cache_info().currsize:
+        stats = get_request_executor().stats()
+        pools, limits = stats["pools"], stats["limits"]
+        yield ("wi_executor_queue_depth", "gauge", "Calls submitted to a pool that have not started",
+               [({"pool": pool}, s["queued"]) for pool, s in pools.items()])
+        yield ("wi_executor_pending", "gauge", "Calls submitted to a pool and not finished",
+               [({"pool": pool}, s["pending"]) for pool, s in pools.items()])
+        yield ("wi_executor_active", "gauge", "Calls of an endpoint group holding a slot",
+               [({"group": group}, s["active"]) for group, s in limits.items()])
+        yield ("wi_executor_waiting", "gauge", "Calls of an endpoint group waiting for a slot",
+               [({"group": group}, s["waiting"]) for group, s in limits.items()])
+        for counter in ("admitted", "rejected", "timed_out"):
+            yield (f"wi_executor_{counter}_total", "counter",
+                   f"Calls of an endpoint group {counter.replace('_', ' ')}",
+                   [({"group": group}, s[counter]) for group, s in limits.items()])
+
+    if get_geocoding_service.cache_info().currsize:
+        stats = get_geocoding_service().get_stats()
+        sources = ("gazetteer_hits", "memory_hits", "disk_hits", "coalesced", "upstream")
+        yield ("wi_geocoding_lookups_total", "counter", "Geocoding searches by where they were answered",
+               [({"source": source.removesuffix("_hits")}, stats[source]) for source in sources])
@@ -1,10 +1,17 @@
 """FastAPI Application - Walkability Index API."""
 
-from fastapi import FastAPI
+import asyncio
+
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from loguru import logger
 
-from .routers import health, profiles, areas, wi, amenities, custom_profile, geocoding
+from .routers import health, profiles, areas, wi, tiles, amenities, custom_profile, geocoding, jobs
+from .dependencies import (
+    collect_service_metrics, get_app_config, get_data_loader, get_geocoding_service, get_job_manager,
+    get_request_executor, get_warmup_manager
+)
+from .services.metrics import CONTENT_TYPE, REGISTRY, MetricsMiddleware
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -28,6 +35,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Prometheus metrics: request latency per route, scraped at /metrics
+METRICS_ENABLED = get_app_config().get_api_config().get("metrics", {}).get("enabled", True)
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    REGISTRY.register_collector(collect_service_metrics)
+
 
 # Event handlers
 @app.on_event("startup")
@@ -38,21 +51,56 @@ async def startup_event():
     logger.info("=" * 60)
     logger.info("API Documentation: http://localhost:8000/docs")
 
+    # Preload the warm set in the background; /api/v1/ready gates on it
+    app.state.warmup_task = asyncio.create_task(get_warmup_manager().run())
+
+    # Reload republished datasets in the background
+    reload_config = get_app_config().get_api_config().get("reload", {})
+    if reload_config.get("enabled", True):
+        app.state.reload_task = asyncio.create_task(
+            get_data_loader().watch(reload_config.get("interval_seconds", 5))
+        )
+
+    # Background jobs: heartbeat, take over jobs of stopped processes, prune
+    if get_app_config().get_api_config().get("jobs", {}).get("enabled", True):
+        app.state.jobs_task = asyncio.create_task(get_job_manager().watch())
+
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown."""
     logger.info("Walkability Index API shutting down...")
 
+    for task_name in ("warmup_task", "reload_task", "jobs_task"):
+        task = getattr(app.state, task_name, None)
+        if task is not None:
+            task.cancel()
+
+    # Close pooled upstream connections (only if the service was created)
+    if get_geocoding_service.cache_info().currsize:
+        await get_geocoding_service().close()
+
+    # Drop the stopped singletons so a later startup in the same process
+    # (e.g. another TestClient block) creates fresh pools
+    if get_request_executor.cache_info().currsize:
+        get_request_executor().shutdown()
+        get_request_executor.cache_clear()
+
+    if get_job_manager.cache_info().currsize:
+        get_job_manager().shutdown()
+        get_job_manager.cache_clear()
+
 
 # Include routers
 app.include_router(health.router, prefix="/api/v1", tags=["health"])
 app.include_router(profiles.router, prefix="/api/v1", tags=["profiles"])
 app.include_router(areas.router, prefix="/api/v1", tags=["areas"])
 app.include_router(wi.router, prefix="/api/v1", tags=["wi"])
+app.include_router(tiles.router, prefix="/api/v1", tags=["tiles"])
 app.include_router(amenities.router, prefix="/api/v1", tags=["amenities"])
 app.include_router(custom_profile.router, prefix="/api/v1", tags=["custom"])
 app.include_router(geocoding.router, prefix="/api/v1", tags=["geocoding"])
+app.include_router(jobs.router, prefix="/api/v1", tags=["jobs"])
 
 
 # Root endpoint
@@ -64,3 +112,10 @@ async def root():
         "version": "1.0.0",
         "docs": "/docs"
     }
+
+
+if METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        """Prometheus metrics of this worker process (text exposition format)."""
+        return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
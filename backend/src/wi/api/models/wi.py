@@ -12,6 +12,8 @@ class WIStatistics(BaseModel):
     std: float = Field(..., description="Standard deviation")
     median: float = Field(..., description="Median WI score")
     count: int = Field(..., description="Number of grid cells")
+    percentiles: Optional[Dict[str, float]] = Field(None, description="Percentiles (p10, p25, p75, p90)")
+    quantile_error: Optional[float] = Field(None, description="Maximum absolute error of median/percentiles (0: exact)")
 
 
 class WIGridMetadata(BaseModel):
@@ -3,22 +3,38 @@ Amenities API router
 Provides endpoints for querying amenity locations
 """
 
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response
+from functools import partial
 from typing import List, Optional
-from pathlib import Path
-import geopandas as gpd
 from ..services.amenities_service import AmenitiesService
-from ..dependencies import get_data_dir
+from ..services.amenity_store import AmenityStore
+from ..services.arrow_encoder import negotiate_format
+from ..services.executor import RequestExecutor
+from ..dependencies import get_amenity_store, get_request_executor
+from .wi import run_columnar
 
 router = APIRouter()
 
 
+def get_amenities_service(
+    store: AmenityStore = Depends(get_amenity_store)
+) -> AmenitiesService:
+    """Get AmenitiesService instance."""
+    return AmenitiesService(store)
+
+
 @router.get("/amenities")
 async def get_amenities(
+    request: Request,
     area: str = Query(..., description="Area name"),
     amenity_types: Optional[str] = Query(None, description="Comma-separated list of amenity types (e.g., 'supermarket,school')"),
     bbox: Optional[str] = Query(None, description="Bounding box: min_lon,min_lat,max_lon,max_lat"),
-    data_dir: Path = Depends(get_data_dir),
+    format: Optional[str] = Query(None, description="Output format: 'geojson', 'arrow' or 'parquet' (default: from Accept header, else geojson)"),
+    fields: Optional[str] = Query(None, description="Comma-separated columns for arrow/parquet output (default: all)"),
+    geometry: str = Query("wkb", description="Arrow/Parquet geometry: 'wkb', 'xy' (lon/lat columns) or 'none'"),
+    zoom: Optional[int] = Query(None, ge=0, le=24, description="Map zoom level: cluster the GeoJSON points for this zoom"),
+    amenities_service: AmenitiesService = Depends(get_amenities_service),
+    executor: RequestExecutor = Depends(get_request_executor),
 ):
     """
     Get amenity locations for a given area
@@ -28,10 +44,22 @@ async def get_amenities(
     - name (if available)
     - osm_id
     - coordinates
+
+    ``format=arrow`` (Arrow IPC stream) and ``format=parquet`` (GeoParquet)
+    return the same rows as columnar data, also selected via the Accept
+    header; ``fields`` and ``geometry`` control the exported columns.
+
+    Amenities are indexed per type when an area is first requested, with
+    each feature pre-encoded, so a request costs KD-tree lookups for the
+    requested types and a concatenation of the matching features.
+
+    With ``zoom``, GeoJSON output is clustered for that map zoom: clusters
+    are Point features with ``cluster: true``, ``count`` and per-type
+    ``types`` counts, taken from a cluster pyramid built when the area is
+    loaded. Clusters of a single point are returned as that point. From
+    ``performance.amenity_point_zoom`` on, individual points are returned.
     """
     try:
-        amenities_service = AmenitiesService(data_dir)
-
         # Parse amenity types
         types_list = None
         if amenity_types:
@@ -47,17 +75,52 @@ async def get_amenities(
             except Exception as e:
                 raise HTTPException(status_code=400, detail=f"Invalid bbox format: {str(e)}")
 
+        if format is None:
+            format = negotiate_format(request.headers.get("accept"))
+
+        if format in ("arrow", "parquet"):
+            fields_list = None
+            if fields:
+                fields_list = [f.strip() for f in fields.split(',') if f.strip()]
+            build_table = partial(
+                amenities_service.get_amenities_table,
+                area=area,
+                amenity_types=types_list,
+                bbox=bbox_values,
+                fields=fields_list,
+                geometry=geometry
+            )
+            return await run_columnar(executor, "amenities", build_table, format, f"amenities_{area}")
+
+        if format != "geojson":
+            raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+
+        if zoom is not None:
+            content = await executor.run(
+                "amenities", "cpu", amenities_service.get_amenity_clusters,
+                area=area,
+                zoom=zoom,
+                amenity_types=types_list,
+                bbox=bbox_values
+            )
+            return Response(content=content, media_type="application/json")
+
         # Get amenities
-        result = amenities_service.get_amenities(
+        content = await executor.run(
+            "amenities", "cpu", amenities_service.get_amenities,
             area=area,
             amenity_types=types_list,
             bbox=bbox_values
         )
 
-        return result
+        return Response(content=content, media_type="application/json")
 
+    except HTTPException:
+        raise
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to load amenities: {str(e)}")
 
@@ -65,19 +128,22 @@ async def get_amenities(
 @router.get("/amenities/types")
 async def get_amenity_types(
     area: str = Query(..., description="Area name"),
-    data_dir: Path = Depends(get_data_dir),
+    amenities_service: AmenitiesService = Depends(get_amenities_service),
+    executor: RequestExecutor = Depends(get_request_executor),
 ):
     """
     Get list of available amenity types for an area
     """
     try:
-        amenities_service = AmenitiesService(data_dir)
-        types = amenities_service.get_available_types(area)
+        # The first request for an area loads and indexes its amenities
+        types = await executor.run("amenities", "io", amenities_service.get_available_types, area)
         return {
             "area": area,
             "types": types,
             "count": len(types)
         }
+    except HTTPException:
+        raise
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
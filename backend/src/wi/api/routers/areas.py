@@ -1,31 +1,19 @@
 """Areas router."""
 
 from fastapi import APIRouter, Depends, HTTPException
-from pathlib import Path
 
-from ..dependencies import get_data_dir
+from ..dependencies import get_data_loader
 from ..services.data_loader import DataLoader
 
 router = APIRouter()
 
 
-def get_data_loader(data_dir: Path = Depends(get_data_dir)) -> DataLoader:
-    """Get DataLoader instance.
-
-    Args:
-        data_dir: Data directory path
-
-    Returns:
-        DataLoader instance
-    """
-    return DataLoader(data_dir)
-
-
 @router.get("/areas")
 async def list_areas(loader: DataLoader = Depends(get_data_loader)):
     """List all available areas with WI data.
 
-    Scans the data directory for WI files and extracts area names.
+    Read from the dataset catalog (``catalog.json`` written by Phase 2),
+    which is loaded once and reloaded when it changes.
 
     Returns:
         List of area names
@@ -3,12 +3,12 @@ Custom profile API router
 Allows users to create custom profiles and calculate WI dynamically
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Body
-from typing import Dict, List
-from pathlib import Path
+from fastapi import APIRouter, Depends, HTTPException, Body, Response
+from typing import Dict, List, Optional
 from pydantic import BaseModel, Field
 from ..services.custom_wi_service import CustomWIService
-from ..dependencies import get_data_dir
+from ..services.executor import RequestExecutor
+from ..dependencies import get_custom_wi_service, get_request_executor
 
 router = APIRouter()
 
@@ -18,6 +18,8 @@ class AmenityWeight(BaseModel):
     amenity_type: str = Field(..., description="Amenity type (e.g., 'supermarket')")
     weight: float = Field(..., ge=0, le=1, description="Weight (0-1)")
     ideal_distance: float = Field(..., gt=0, description="Ideal distance in meters")
+    max_distance: Optional[float] = Field(None, gt=0, description="Distance at which the score reaches its minimum (default: scaled from the profile configuration)")
+    decay_type: Optional[str] = Field(None, description="Decay function: 'exponential', 'gaussian' or 'linear' (default: exponential)")
 
 
 class CustomProfile(BaseModel):
@@ -26,11 +28,25 @@ class CustomProfile(BaseModel):
     weights: List[AmenityWeight] = Field(..., description="Amenity weights and distances")
 
 
+def profile_weights(profile: CustomProfile) -> Dict[str, Dict]:
+    """Convert a custom profile to the weights dict of ``CustomWIService``."""
+    return {
+        w.amenity_type: {
+            'weight': w.weight,
+            'ideal_distance': w.ideal_distance,
+            'max_distance': w.max_distance,
+            'decay_type': w.decay_type
+        }
+        for w in profile.weights
+    }
+
+
 @router.post("/profiles/custom/calculate")
 async def calculate_custom_wi(
     area: str = Body(..., description="Area name"),
     profile: CustomProfile = Body(..., description="Custom profile definition"),
-    data_dir: Path = Depends(get_data_dir),
+    custom_service: CustomWIService = Depends(get_custom_wi_service),
+    executor: RequestExecutor = Depends(get_request_executor),
 ):
     """
     Calculate WI using a custom profile
@@ -38,30 +54,29 @@ async def calculate_custom_wi(
     This endpoint allows users to define custom weights and ideal distances
     for amenities, then calculates WI scores dynamically.
 
-    **Note:** This is computationally expensive for large areas.
-    Use with caution and consider caching results.
+    Amenity scores are recomputed from the stored cell-to-amenity distances
+    with the requested ideal/max distance and decay type (types without
+    stored distances use the closest precomputed profile scores, see
+    ``metadata.sources``). Per-type scores are cached by their parameters
+    and results are cached on disk by normalized weights, so slider changes
+    only recompute what changed.
+
+    For large areas, submit a ``custom`` job to ``POST /jobs`` instead: it
+    runs in a worker process and its result lands in the same cache.
     """
     try:
-        custom_service = CustomWIService(data_dir)
-
-        # Convert weights to dict format
-        weights_dict = {
-            w.amenity_type: {
-                'weight': w.weight,
-                'ideal_distance': w.ideal_distance
-            }
-            for w in profile.weights
-        }
-
         # Calculate custom WI
-        result = custom_service.calculate_custom_wi(
+        result = await executor.run(
+            "custom", "cpu", custom_service.calculate_custom_wi,
             area=area,
             profile_name=profile.name,
-            weights=weights_dict
+            weights=profile_weights(profile)
         )
 
-        return result
+        return Response(content=result, media_type="application/json")
 
+    except HTTPException:
+        raise
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except ValueError as e:
@@ -73,13 +88,12 @@ async def calculate_custom_wi(
 @router.get("/profiles/custom/defaults")
 async def get_default_weights(
     profile_id: str,
-    data_dir: Path = Depends(get_data_dir),
+    custom_service: CustomWIService = Depends(get_custom_wi_service),
 ):
     """
     Get default weights for a profile as a starting point for customization
     """
     try:
-        custom_service = CustomWIService(data_dir)
         defaults = custom_service.get_profile_defaults(profile_id)
         return defaults
 
@@ -3,10 +3,12 @@ Geocoding API Router
 Provides address search endpoints using Nominatim OSM API
 """
 
-from fastapi import APIRouter, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException
 from typing import List, Dict
+import httpx
 from loguru import logger
 
+from ..dependencies import get_geocoding_service
 from ..services.geocoding_service import GeocodingService
 
 
@@ -16,7 +18,8 @@ router = APIRouter()
 @router.get("/geocoding/search", response_model=List[Dict])
 async def search_address(
     q: str = Query(..., description="Address search query", min_length=1),
-    limit: int = Query(5, description="Maximum number of results", ge=1, le=10)
+    limit: int = Query(5, description="Maximum number of results", ge=1, le=10),
+    geocoding_service: GeocodingService = Depends(get_geocoding_service),
 ):
     """
     Search for addresses using Nominatim OSM API
@@ -26,12 +29,18 @@ async def search_address(
 
     Returns list of search results with coordinates, display name, and address details.
 
-    Rate limit: 1 request per second (enforced by service)
+    Places in the covered areas are answered by the offline gazetteer
+    (``source: "gazetteer"``) without an outbound request.
+
+    Rate limit: 1 request per second upstream, shared by all callers.
+    Repeated queries (after Unicode/whitespace/case normalization) are
+    served from cache, and identical concurrent queries share one upstream
+    request.
     """
     try:
         logger.info(f"Geocoding API request: q='{q}', limit={limit}")
 
-        results = await GeocodingService.search_address(
+        results = await geocoding_service.search_address(
             query=q,
             limit=limit,
             country_codes="jp"  # Limit to Japan for this application
@@ -39,6 +48,12 @@ async def search_address(
 
         return results
 
+    except httpx.HTTPError as e:
+        logger.error(f"Geocoding upstream error: {e}")
+        raise HTTPException(
+            status_code=502,
+            detail=f"Geocoding upstream request failed: {str(e)}"
+        )
     except Exception as e:
         logger.error(f"Geocoding API error: {e}")
         raise HTTPException(
@@ -1,8 +1,13 @@
 """Health check router."""
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
 from datetime import datetime
 
+from ..dependencies import get_request_executor, get_warmup_manager
+from ..services.executor import RequestExecutor
+from ..services.warmup import WarmupManager
+
 router = APIRouter()
 
 
@@ -19,3 +24,39 @@ async def health_check():
         "version": "1.0.0",
         "service": "Walkability Index API"
     }
+
+
+@router.get("/ready")
+async def readiness_check(warmup: WarmupManager = Depends(get_warmup_manager)):
+    """Readiness check endpoint.
+
+    Returns 503 until the configured warm set (``api.preload`` in api.yaml)
+    is resident in memory, so load balancers and the Docker healthcheck only
+    route traffic once hot datasets are loaded. A warm-up in which datasets
+    failed to load keeps the worker at 503, with the failures under
+    ``warmup.failed``.
+
+    Returns:
+        Warm-up progress and resident datasets with load times and
+        memory footprints
+    """
+    status = warmup.status()
+    status["timestamp"] = datetime.utcnow().isoformat()
+
+    return JSONResponse(
+        content=status,
+        status_code=200 if status["ready"] else 503
+    )
+
+
+@router.get("/status/executor")
+async def executor_status(executor: RequestExecutor = Depends(get_request_executor)):
+    """Request executor status.
+
+    Returns:
+        Per-pool workers, pending calls and queue depth, and per endpoint
+        group concurrency limits with admitted/rejected/timed-out counts
+    """
+    status = executor.stats()
+    status["timestamp"] = datetime.utcnow().isoformat()
+    return status
@@ -0,0 +1,279 @@
+"""
+Background job API router
+Long-running computations run in worker processes, outside of requests
+"""
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from typing import Annotated, Literal, Optional, Union
+from pydantic import BaseModel, Field
+import asyncio
+import json
+import time
+
+from ...config import Config
+from ..dependencies import get_app_config, get_job_manager, get_request_executor
+from ..services.executor import RequestExecutor, Saturated
+from ..services.jobs import FINISHED, JobManager
+from .custom_profile import CustomProfile, profile_weights
+
+router = APIRouter()
+
+# Comment line sent on idle event streams so that proxies keep them open
+SSE_KEEPALIVE_SECONDS = 15
+
+
+class CustomJob(BaseModel):
+    """Custom-profile WI for an area"""
+    kind: Literal["custom"]
+    area: str = Field(..., description="Area name")
+    profile: CustomProfile = Field(..., description="Custom profile definition")
+
+
+class RescoreJob(BaseModel):
+    """Recompute a dataset's WI from its stored distances with the current profile configuration"""
+    kind: Literal["rescore"]
+    area: str = Field(..., description="Area name")
+    profile: str = Field(..., description="Profile name")
+    skip_tiles: bool = Field(False, description="Do not rebuild the vector tile archive")
+
+
+class Phase2Job(BaseModel):
+    """Full Phase 2 pipeline (grid, walking distances, WI) from Phase 1 output"""
+    kind: Literal["phase2"]
+    area: str = Field(..., description="Area name")
+    profile: str = Field(..., description="Profile name")
+    max_distance: int = Field(1000, gt=0, le=5000, description="Maximum walking distance in meters")
+    skip_tiles: bool = Field(False, description="Do not build the vector tile archive")
+
+
+JobRequest = Annotated[Union[CustomJob, RescoreJob, Phase2Job], Field(discriminator="kind")]
+
+
+def get_jobs(
+    config: Config = Depends(get_app_config)
+) -> JobManager:
+    """Get the JobManager, or 503 if background jobs are disabled."""
+    if not config.get_api_config().get("jobs", {}).get("enabled", True):
+        raise HTTPException(status_code=503, detail="Background jobs are disabled")
+    return get_job_manager()
+
+
+def job_location(request: Request, job_id: str) -> str:
+    """URL of a job's status endpoint."""
+    return str(request.url_for("get_job", job_id=job_id))
+
+
+@router.post("/jobs", status_code=202)
+async def submit_job(
+    request: Request,
+    job: JobRequest = Body(..., description="Job kind and parameters"),
+    jobs: JobManager = Depends(get_jobs),
+    executor: RequestExecutor = Depends(get_request_executor),
+):
+    """
+    Submit a background job
+
+    Kinds:
+    - ``custom``: custom-profile WI (as ``/profiles/custom/calculate``); the
+      result lands in the custom WI cache and at ``/jobs/{id}/result``
+    - ``rescore``: recompute a dataset from its stored distances and
+      republish it (e.g. after editing profiles.yaml)
+    - ``phase2``: run Phase 2 for an area from its Phase 1 output and
+      publish the dataset
+
+    Rescore and Phase 2 results are loaded into the dataset cache before
+    the job reports success. A submission identical to a queued, running
+    or succeeded job (same parameters, unchanged input files) returns that
+    job with ``deduplicated: true`` and status 200 instead of 202.
+
+    Rescore and Phase 2 jobs get 403 while the data directory is mounted
+    read-only (the default deployment); custom jobs only write to the cache.
+
+    **Example:**
+    ```
+    POST /api/v1/jobs
+    {"kind": "rescore", "area": "shinagawa", "profile": "residential_family"}
+    ```
+
+    Follow progress with ``GET /jobs/{id}`` or the event stream
+    ``GET /jobs/{id}/events``.
+    """
+    try:
+        if isinstance(job, CustomJob):
+            params = {"area": job.area, "profile_name": job.profile.name, "weights": profile_weights(job.profile)}
+        else:
+            params = job.model_dump(exclude={"kind"})
+
+        record, created = await executor.run("jobs", "io", jobs.submit, job.kind, params)
+
+        return JSONResponse(
+            content={**record, "deduplicated": not created},
+            status_code=202 if created else 200,
+            headers={"Location": job_location(request, record["id"])}
+        )
+
+    except HTTPException:
+        raise
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except PermissionError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to submit job: {str(e)}")
+
+
+@router.get("/jobs")
+async def list_jobs(
+    status: Optional[str] = Query(None, description="Only jobs with this status (queued, running, succeeded, failed, cancelled)"),
+    limit: int = Query(50, ge=1, le=500, description="Maximum number of jobs"),
+    jobs: JobManager = Depends(get_jobs),
+    executor: RequestExecutor = Depends(get_request_executor),
+):
+    """
+    List recent jobs, newest first
+    """
+    try:
+        records = await executor.run("jobs", "io", jobs.list, status=status, limit=limit)
+        return {"jobs": records, "count": len(records)}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to list jobs: {str(e)}")
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(
+    job_id: str,
+    jobs: JobManager = Depends(get_jobs),
+    executor: RequestExecutor = Depends(get_request_executor),
+):
+    """
+    Get the status, progress and result summary of a job
+    """
+    try:
+        record = await executor.run("jobs", "io", jobs.get, job_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get job: {str(e)}")
+
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return record
+
+
+@router.delete("/jobs/{job_id}")
+async def cancel_job(
+    job_id: str,
+    jobs: JobManager = Depends(get_jobs),
+    executor: RequestExecutor = Depends(get_request_executor),
+):
+    """
+    Cancel a queued job
+
+    Jobs that already started run to completion (409).
+    """
+    try:
+        cancelled = await executor.run("jobs", "io", jobs.cancel, job_id)
+        record = await executor.run("jobs", "io", jobs.get, job_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to cancel job: {str(e)}")
+
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    if not cancelled:
+        raise HTTPException(status_code=409, detail=f"Job is {record['status']}, only queued jobs can be cancelled")
+    return record
+
+
+@router.get("/jobs/{job_id}/result")
+async def get_job_result(
+    job_id: str,
+    jobs: JobManager = Depends(get_jobs),
+    executor: RequestExecutor = Depends(get_request_executor),
+):
+    """
+    Download the result of a succeeded custom-profile job (GeoJSON)
+
+    Rescore and Phase 2 jobs publish datasets; their summary is the
+    ``result`` of ``GET /jobs/{id}``.
+    """
+    record = await executor.run("jobs", "io", jobs.get, job_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    if record["status"] != "succeeded":
+        raise HTTPException(status_code=409, detail=f"Job is {record['status']}")
+
+    path = jobs.result_path(job_id)
+    if record["kind"] != "custom" or not path.exists():
+        raise HTTPException(status_code=404, detail=f"Job {job_id} has no result file")
+    return FileResponse(path, media_type="application/json")
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(
+    request: Request,
+    job_id: str,
+    config: Config = Depends(get_app_config),
+    jobs: JobManager = Depends(get_jobs),
+    executor: RequestExecutor = Depends(get_request_executor),
+):
+    """
+    Stream job progress as Server-Sent Events
+
+    Sends a ``progress`` event with the job whenever its status, progress
+    or message changes, and a final ``done`` event when it has finished.
+
+    **Example:**
+    ```
+    const events = new EventSource("/api/v1/jobs/{id}/events");
+    events.addEventListener("progress", e => console.log(JSON.parse(e.data).progress));
+    events.addEventListener("done", e => events.close());
+    ```
+    """
+    record = await executor.run("jobs", "io", jobs.get, job_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+
+    interval = config.get_api_config().get("jobs", {}).get("poll_interval_seconds", 0.5)
+
+    def event(name: str, data) -> str:
+        return f"event: {name}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    async def events():
+        nonlocal record
+        last_state = None
+        last_sent = time.monotonic()
+        while record is not None:  # None: pruned while streaming
+            state = (record["status"], record["progress"], record["message"])
+            if state != last_state:
+                last_state = state
+                last_sent = time.monotonic()
+                yield event("progress", record)
+            if record["status"] in FINISHED:
+                yield event("done", record)
+                return
+
+            if time.monotonic() - last_sent > SSE_KEEPALIVE_SECONDS:
+                last_sent = time.monotonic()
+                yield ": keep-alive\n\n"
+
+            await asyncio.sleep(interval)
+            if await request.is_disconnected():
+                return
+            try:
+                record = await executor.run("jobs", "io", jobs.get, job_id)
+            except Saturated:
+                pass  # poll again on the next tick
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,129 @@
+"""Vector tile router - WI grid as Mapbox Vector Tiles."""
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+
+from ..dependencies import get_request_executor, get_tile_service
+from ..services.executor import RequestExecutor
+from ..services.tile_service import TileService
+
+router = APIRouter()
+
+MVT_MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+TILE_CACHE_CONTROL = "public, max-age=3600"
+
+
+def tile_response(
+    request: Request,
+    tile: bytes,
+    etag: str,
+    gzipped: bool = False
+) -> Response:
+    """Build a tile response with cache validators.
+
+    Returns 304 when the client already holds the tile, and 204 for tiles
+    without features.
+    """
+    headers = {"Cache-Control": TILE_CACHE_CONTROL, "ETag": etag}
+    if gzipped:
+        headers["Content-Encoding"] = "gzip"
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    if not tile:
+        return Response(status_code=204, headers=headers)
+
+    return Response(content=tile, media_type=MVT_MEDIA_TYPE, headers=headers)
+
+
+@router.get("/wi/tiles/{area}/{profile}/{z}/{x}/{y}.pbf")
+async def get_wi_tile(
+    area: str,
+    profile: str,
+    z: int,
+    x: int,
+    y: int,
+    request: Request,
+    tile_service: TileService = Depends(get_tile_service),
+    executor: RequestExecutor = Depends(get_request_executor)
+):
+    """Get a Mapbox Vector Tile of WI grid cells.
+
+    Layer ``wi_grid`` holds one polygon per cell with ``grid_id`` and
+    ``wi_score``. At low zooms, where a cell would be smaller than a few
+    pixels, cells are aggregated into coarser squares carrying the mean
+    ``wi_score`` and the number of ``cells``.
+
+    When a prebuilt archive exists for the current data (built by
+    ``scripts/build_tiles.py`` / Phase 2), tiles are served straight from
+    it, gzip-encoded, and also carry an ``amenities`` point layer.
+
+    **Example:**
+    ```
+    GET /api/v1/wi/tiles/shinagawa/residential_family/15/29102/12905.pbf
+    ```
+    """
+    try:
+        archived = await executor.run("tiles", "io", tile_service.get_archive_tile, area, profile, z, x, y)
+        if archived is not None:
+            return tile_response(request, *archived, gzipped=True)
+
+        tile, etag = await executor.run("tiles", "cpu", tile_service.get_wi_tile, area, profile, z, x, y)
+        return tile_response(request, tile, etag)
+
+    except HTTPException:
+        raise
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+
+@router.get("/wi/diff/tiles/{area}/{profile_a}/{profile_b}/{z}/{x}/{y}.pbf")
+async def get_wi_diff_tile(
+    area: str,
+    profile_a: str,
+    profile_b: str,
+    z: int,
+    x: int,
+    y: int,
+    request: Request,
+    threshold: Optional[float] = Query(None, ge=0, description="Only include cells with |delta| >= threshold"),
+    tile_service: TileService = Depends(get_tile_service),
+    executor: RequestExecutor = Depends(get_request_executor)
+):
+    """Get a Mapbox Vector Tile of WI differences between two profiles.
+
+    Layer ``wi_diff`` holds one polygon per cell with ``grid_id`` and
+    ``delta`` (``profile_a`` minus ``profile_b``), aggregated into coarser
+    squares with the mean ``delta`` at low zooms like ``wi_grid``.
+
+    **Example:**
+    ```
+    GET /api/v1/wi/diff/tiles/shinagawa/residential_family/residential_single/15/29102/12905.pbf?threshold=5
+    ```
+    """
+    try:
+        tile, etag = await executor.run(
+            "tiles", "cpu", tile_service.get_diff_tile,
+            area, profile_a, profile_b, z, x, y, threshold=threshold
+        )
+        return tile_response(request, tile, etag)
+
+    except HTTPException:
+        raise
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}"
+        )
@@ -1,45 +1,178 @@
 """WI routers - Walkability Index API endpoints."""
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from typing import Optional, Any, Dict
-from pathlib import Path
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from functools import partial
+from typing import Callable, Optional, Any, Dict, Tuple
+import io
+import json
 
-from ..dependencies import get_data_dir
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from shapely.geometry import shape
+
+from ...config import Config
+from ..dependencies import get_app_config, get_data_loader, get_request_executor, get_response_cache
+from ..services.arrow_encoder import (
+    ARROW_MEDIA_TYPE, PARQUET_MEDIA_TYPE, iter_ipc_stream, negotiate_format, to_parquet_bytes
+)
 from ..services.data_loader import DataLoader
+from ..services.executor import RequestExecutor
+from ..services.point_service import PointScoringService
+from ..services.response_cache import ResponseCache
 from ..services.wi_service import WIService
+from ..services.zonal_service import ZonalService, WEIGHTINGS
 from ..models.common import BoundingBox
 from ..models.wi import WIPointResponse
 
 router = APIRouter()
 
 
-def get_data_loader(data_dir: Path = Depends(get_data_dir)) -> DataLoader:
-    """Get DataLoader instance."""
-    return DataLoader(data_dir)
+def get_wi_service(
+    loader: DataLoader = Depends(get_data_loader),
+    response_cache: ResponseCache = Depends(get_response_cache)
+) -> WIService:
+    """Get WIService instance."""
+    return WIService(loader, response_cache)
+
 
+def get_point_scoring_service(
+    loader: DataLoader = Depends(get_data_loader)
+) -> PointScoringService:
+    """Get PointScoringService instance."""
+    return PointScoringService(loader)
 
-def get_wi_service(loader: DataLoader = Depends(get_data_loader)) -> WIService:
-    """Get WIService instance."""
-    return WIService(loader)
+
+def get_zonal_service(
+    loader: DataLoader = Depends(get_data_loader)
+) -> ZonalService:
+    """Get ZonalService instance."""
+    return ZonalService(loader)
+
+
+def columnar_response(table: pa.Table, format: str, filename: str) -> Response:
+    """Build an Arrow IPC stream or Parquet file response for a table.
+
+    Args:
+        table: Table to send
+        format: "arrow" or "parquet"
+        filename: Download name without extension
+
+    Returns:
+        StreamingResponse of record batches, or Parquet file Response
+    """
+    if format == "arrow":
+        return StreamingResponse(
+            iter_ipc_stream(table),
+            media_type=ARROW_MEDIA_TYPE,
+            headers={"Content-Disposition": f'attachment; filename="{filename}.arrows"'}
+        )
+    return Response(
+        content=to_parquet_bytes(table),
+        media_type=PARQUET_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.parquet"'}
+    )
+
+
+async def run_columnar(
+    executor: RequestExecutor,
+    group: str,
+    build_table: Callable[[], pa.Table],
+    format: str,
+    filename: str
+) -> Response:
+    """Build a table and its Arrow/Parquet response in one call on the cpu pool.
+
+    Args:
+        executor: Request executor
+        group: Endpoint group of the request
+        build_table: Zero-argument callable returning the table
+        format: "arrow" or "parquet"
+        filename: Download name without extension
+
+    Returns:
+        Response from :func:`columnar_response`
+    """
+    return await executor.run(
+        group, "cpu", lambda: columnar_response(build_table(), format, filename)
+    )
+
+
+async def parse_body(
+    executor: RequestExecutor,
+    config: Config,
+    group: str,
+    parse: Callable,
+    body: bytes,
+    *args
+):
+    """Parse a request body, in a worker process when it is large.
+
+    Parsing large JSON bodies holds the GIL for the whole parse, which
+    would stall the event loop and the pool threads, so bodies of at least
+    ``executor.process_body_mb`` go to the process pool.
+
+    Args:
+        executor: Request executor
+        config: Application config
+        group: Endpoint group of the request
+        parse: Module-level parse function ``parse(body, *args)``
+        body: Raw request body
+
+    Returns:
+        Return value of ``parse``
+    """
+    executor_config = config.get_api_config().get("executor", {})
+    if len(body) >= executor_config.get("process_body_mb", 1) * 1024 * 1024:
+        return await executor.run(group, "process", parse, body, *args)
+    return parse(body, *args)
 
 
 @router.get("/wi/grid")
 async def get_wi_grid(
+    request: Request,
     area: str = Query(..., description="Area name (e.g., 'shinagawa')"),
     profile: str = Query(..., description="Profile name (e.g., 'residential_family')"),
     bbox: Optional[str] = Query(None, description="Bounding box: minLon,minLat,maxLon,maxLat"),
-    format: str = Query("geojson", description="Output format: 'geojson' or 'dict'"),
-    wi_service: WIService = Depends(get_wi_service)
+    format: Optional[str] = Query(None, description="Output format: 'geojson', 'raster', 'arrow', 'parquet' or 'dict' (default: from Accept header, else geojson)"),
+    fields: Optional[str] = Query(None, description="Comma-separated property columns to include (default: all; raster: bands, default wi_score)"),
+    dtype: str = Query("float32", description="Raster value type: 'float32' or 'uint8'"),
+    encoding: str = Query("base64", description="Raster payload encoding: 'base64' (JSON) or 'binary'"),
+    geometry: str = Query("wkb", description="Arrow/Parquet geometry: 'wkb', 'xy' (centroid lon/lat columns) or 'none'"),
+    wi_service: WIService = Depends(get_wi_service),
+    executor: RequestExecutor = Depends(get_request_executor)
 ) -> Dict[str, Any]:
     """Get WI grid data for an area-profile combination.
 
     Returns GeoJSON FeatureCollection with WI scores for all grid cells
     in the specified area, optionally filtered by bounding box.
 
+    GeoJSON responses are served from a cache of pre-encoded bytes keyed by
+    dataset version, bbox and fields, so repeated requests skip encoding.
+
+    ``format=raster`` returns the grid as packed arrays on its regular
+    lattice instead of per-cell polygons: CRS, cell size, affine transform
+    and dimensions, a bit-packed validity mask, and one little-endian band
+    per field (``float32``, or ``uint8`` with scale/offset). Payloads are
+    base64 in JSON, or ``encoding=binary`` for
+    ``<uint32 header length><JSON header><mask><bands...>``.
+
+    ``format=arrow`` streams the cells as Arrow IPC record batches and
+    ``format=parquet`` returns a GeoParquet file; both are also selected by
+    an ``Accept`` header of ``application/vnd.apache.arrow.stream`` or
+    ``application/vnd.apache.parquet``. Geometry is a WKB column
+    (``geometry=wkb``), centroid ``lon``/``lat`` columns (``geometry=xy``)
+    or omitted (``geometry=none``). ``fields`` and ``bbox`` are applied to
+    the cached columnar data before encoding.
+
     **Example:**
     ```
     GET /api/v1/wi/grid?area=shinagawa&profile=residential_family
     GET /api/v1/wi/grid?area=shinagawa&profile=residential_family&bbox=139.7,35.6,139.8,35.7
+    GET /api/v1/wi/grid?area=shinagawa&profile=residential_family&fields=grid_id,wi_score
+    GET /api/v1/wi/grid?area=shinagawa&profile=residential_family&format=raster&dtype=uint8
+    GET /api/v1/wi/grid?area=shinagawa&profile=residential_family&format=arrow&geometry=xy
     ```
 
     **Response format:**
@@ -75,8 +208,49 @@ async def get_wi_grid(
                     detail=f"Invalid bbox format: {str(e)}"
                 )
 
+        fields_list = None
+        if fields:
+            fields_list = [f.strip() for f in fields.split(',') if f.strip()]
+
+        if format is None:
+            format = negotiate_format(request.headers.get("accept"))
+
+        if format in ("arrow", "parquet"):
+            build_table = partial(
+                wi_service.get_wi_grid_table,
+                area=area,
+                profile=profile,
+                bbox=bbox_obj,
+                fields=fields_list,
+                geometry=geometry
+            )
+            return await run_columnar(executor, "wi_grid", build_table, format, f"wi_{area}_{profile}")
+
+        if format == "geojson":
+            content = await executor.run(
+                "wi_grid", "cpu", wi_service.get_wi_grid_geojson,
+                area=area,
+                profile=profile,
+                bbox=bbox_obj,
+                fields=fields_list
+            )
+            return Response(content=content, media_type="application/json")
+
+        if format == "raster":
+            content, media_type = await executor.run(
+                "wi_grid", "cpu", wi_service.get_wi_grid_raster,
+                area=area,
+                profile=profile,
+                bbox=bbox_obj,
+                fields=fields_list,
+                dtype=dtype,
+                encoding=encoding
+            )
+            return Response(content=content, media_type=media_type)
+
         # Get WI grid data
-        result = wi_service.get_wi_grid(
+        result = await executor.run(
+            "wi_grid", "cpu", wi_service.get_wi_grid,
             area=area,
             profile=profile,
             bbox=bbox_obj,
@@ -85,6 +259,224 @@ async def get_wi_grid(
 
         return result
 
+    except HTTPException:
+        raise
+    except FileNotFoundError as e:
+        raise HTTPException(
+            status_code=404,
+            detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+
+@router.get("/wi/diff")
+async def get_wi_diff(
+    request: Request,
+    area: str = Query(..., description="Area name"),
+    profile_a: str = Query(..., description="First profile"),
+    profile_b: str = Query(..., description="Second profile"),
+    bbox: Optional[str] = Query(None, description="Bounding box: minLon,minLat,maxLon,maxLat"),
+    threshold: Optional[float] = Query(None, ge=0, description="Only return cells with |delta| >= threshold"),
+    format: Optional[str] = Query(None, description="Output format: 'json', 'raster', 'arrow' or 'parquet' (default: from Accept header, else json)"),
+    dtype: str = Query("float32", description="Raster value type: 'float32' or 'uint8'"),
+    encoding: str = Query("base64", description="Raster payload encoding: 'base64' (JSON) or 'binary'"),
+    geometry: str = Query("none", description="Arrow/Parquet geometry: 'wkb', 'xy' (centroid lon/lat columns) or 'none'"),
+    wi_service: WIService = Depends(get_wi_service),
+    executor: RequestExecutor = Depends(get_request_executor)
+):
+    """Get per-cell WI differences between two profiles of an area.
+
+    The two datasets are aligned on their cells on the server and
+    ``delta = wi_score(profile_a) - wi_score(profile_b)`` is returned per
+    cell (positive: ``profile_a`` higher), without geometry, together with
+    difference statistics over every comparable cell in the bbox. With
+    ``threshold`` only cells whose absolute delta reaches it are returned.
+
+    ``format=raster`` returns a ``delta`` band in the same layout as
+    ``/wi/grid?format=raster``; ``arrow``/``parquet`` return ``grid_id`` and
+    ``delta`` columns (plus geometry per ``geometry``). Vector tiles are at
+    ``/wi/diff/tiles/{area}/{profile_a}/{profile_b}/{z}/{x}/{y}.pbf``.
+
+    **Example:**
+    ```
+    GET /api/v1/wi/diff?area=shinagawa&profile_a=residential_family&profile_b=residential_single
+    GET /api/v1/wi/diff?area=shinagawa&profile_a=residential_family&profile_b=residential_single&threshold=10&bbox=139.7,35.6,139.75,35.63
+    ```
+
+    **Response:**
+    ```json
+    {
+      "area": "shinagawa",
+      "profile_a": "residential_family",
+      "profile_b": "residential_single",
+      "count": 2,
+      "threshold": 10.0,
+      "bbox": null,
+      "statistics": {"mean": 1.8, "min": -22.4, "max": 25.1, "std": 6.2, "median": 1.5, "count": 3245,
+                     "a_higher": 1980, "b_higher": 1265, "unchanged": 0, "mean_abs": 4.9, "rmse": 6.4, "correlation": 0.93, ...},
+      "columns": {"grid_id": ["shinagawa_00051_00188", "shinagawa_00123_00456"], "delta": [12.3, -10.8]}
+    }
+    ```
+    """
+    try:
+        bbox_obj = None
+        if bbox:
+            try:
+                bbox_obj = BoundingBox.from_string(bbox)
+            except ValueError as e:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Invalid bbox format: {str(e)}"
+                )
+
+        if format is None:
+            format = negotiate_format(request.headers.get("accept"), default="json")
+
+        if format in ("arrow", "parquet"):
+            build_table = partial(
+                wi_service.get_wi_diff_table,
+                area, profile_a, profile_b, bbox=bbox_obj, threshold=threshold, geometry=geometry
+            )
+            return await run_columnar(
+                executor, "wi_analysis", build_table, format, f"wi_diff_{area}_{profile_a}_{profile_b}"
+            )
+
+        if format == "raster":
+            content, media_type = await executor.run(
+                "wi_analysis", "cpu", wi_service.get_wi_diff_raster,
+                area, profile_a, profile_b, bbox=bbox_obj, threshold=threshold,
+                dtype=dtype, encoding=encoding
+            )
+            return Response(content=content, media_type=media_type)
+
+        if format != "json":
+            raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+
+        content = await executor.run(
+            "wi_analysis", "cpu", wi_service.get_wi_diff,
+            area, profile_a, profile_b, bbox=bbox_obj, threshold=threshold
+        )
+        return Response(content=content, media_type="application/json")
+
+    except HTTPException:
+        raise
+    except FileNotFoundError as e:
+        raise HTTPException(
+            status_code=404,
+            detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+
+@router.get("/wi/compare")
+async def get_wi_compare(
+    request: Request,
+    area: str = Query(..., description="Area name"),
+    profiles: str = Query(..., description="Comma-separated profile names (the first defines the cell order)"),
+    bbox: Optional[str] = Query(None, description="Bounding box: minLon,minLat,maxLon,maxLat"),
+    types: Optional[str] = Query(None, description="Comma-separated amenity types to include per profile, or 'all' (default: wi_score only)"),
+    format: Optional[str] = Query(None, description="Output format: 'json', 'raster', 'arrow' or 'parquet' (default: from Accept header, else json)"),
+    dtype: str = Query("float32", description="Raster value type: 'float32' or 'uint8'"),
+    encoding: str = Query("base64", description="Raster payload encoding: 'base64' (JSON) or 'binary'"),
+    geometry: str = Query("none", description="Arrow/Parquet geometry: 'wkb', 'xy' (centroid lon/lat columns) or 'none'"),
+    wi_service: WIService = Depends(get_wi_service),
+    executor: RequestExecutor = Depends(get_request_executor)
+):
+    """Get several profiles of one area in a single packed response.
+
+    Cells are listed once, by ``grid_id`` (and, for Arrow/Parquet, one
+    geometry column), with a ``wi_score_{profile}`` column per profile and
+    ``score_{type}_{profile}`` columns for the requested amenity types.
+    Columns are taken from the resident datasets, so comparing four
+    profiles costs little more than fetching one. Per-profile ``wi_score``
+    statistics are included as in ``/wi/grid``.
+
+    ``format=raster`` returns one band per column in the layout of
+    ``/wi/grid?format=raster``.
+
+    **Example:**
+    ```
+    GET /api/v1/wi/compare?area=shinagawa&profiles=residential_family,residential_single
+    GET /api/v1/wi/compare?area=shinagawa&profiles=residential_family,residential_single&types=supermarket&format=arrow&geometry=wkb
+    ```
+
+    **Response:**
+    ```json
+    {
+      "area": "shinagawa",
+      "profiles": ["residential_family", "residential_single"],
+      "count": 2,
+      "bbox": null,
+      "statistics": {"residential_family": {"mean": 67.3, ...}, "residential_single": {"mean": 64.1, ...}},
+      "columns": {
+        "grid_id": ["shinagawa_00051_00188", "shinagawa_00051_00189"],
+        "wi_score_residential_family": [72.3, 58.1],
+        "wi_score_residential_single": [70.0, 61.2]
+      }
+    }
+    ```
+    """
+    try:
+        bbox_obj = None
+        if bbox:
+            try:
+                bbox_obj = BoundingBox.from_string(bbox)
+            except ValueError as e:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Invalid bbox format: {str(e)}"
+                )
+
+        profiles_list = [p.strip() for p in profiles.split(',') if p.strip()]
+        types_list = [t.strip() for t in types.split(',') if t.strip()] if types else None
+
+        if format is None:
+            format = negotiate_format(request.headers.get("accept"), default="json")
+
+        if format in ("arrow", "parquet"):
+            build_table = partial(
+                wi_service.get_wi_compare_table,
+                area, profiles_list, bbox=bbox_obj, types=types_list, geometry=geometry
+            )
+            return await run_columnar(executor, "wi_analysis", build_table, format, f"wi_compare_{area}")
+
+        if format == "raster":
+            content, media_type = await executor.run(
+                "wi_analysis", "cpu", wi_service.get_wi_compare_raster,
+                area, profiles_list, bbox=bbox_obj, types=types_list,
+                dtype=dtype, encoding=encoding
+            )
+            return Response(content=content, media_type=media_type)
+
+        if format != "json":
+            raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+
+        content = await executor.run(
+            "wi_analysis", "cpu", wi_service.get_wi_compare,
+            area, profiles_list, bbox=bbox_obj, types=types_list
+        )
+        return Response(content=content, media_type="application/json")
+
+    except HTTPException:
+        raise
     except FileNotFoundError as e:
         raise HTTPException(
             status_code=404,
@@ -108,7 +500,8 @@ async def get_wi_point(
     lon: float = Query(..., ge=-180, le=180, description="Longitude"),
     area: str = Query(..., description="Area name"),
     profile: str = Query(..., description="Profile name"),
-    wi_service: WIService = Depends(get_wi_service)
+    wi_service: WIService = Depends(get_wi_service),
+    executor: RequestExecutor = Depends(get_request_executor)
 ) -> WIPointResponse:
     """Get WI score for a specific point.
 
@@ -137,7 +530,8 @@ async def get_wi_point(
     ```
     """
     try:
-        result = wi_service.calculate_point_wi(
+        result = await executor.run(
+            "wi_query", "io", wi_service.calculate_point_wi,
             lat=lat,
             lon=lon,
             area=area,
@@ -146,11 +540,320 @@ async def get_wi_point(
 
         return WIPointResponse(**result)
 
+    except HTTPException:
+        raise
+    except FileNotFoundError as e:
+        raise HTTPException(
+            status_code=404,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+
+def parse_points(body: bytes, content_type: str) -> Tuple[np.ndarray, np.ndarray, Optional[list]]:
+    """Parse a batch of coordinates from a JSON or NDJSON request body.
+
+    Accepted bodies:
+
+    - JSON ``{"lons": [...], "lats": [...], "ids": [...]}``
+    - JSON ``{"points": [[lon, lat], ...]}`` or
+      ``{"points": [{"lon": ..., "lat": ..., "id": ...}, ...]}``
+    - NDJSON (``application/x-ndjson``), one ``{"lon", "lat", "id"}``
+      object or ``[lon, lat]`` array per line
+
+    Returns:
+        (lons, lats, ids or None)
+
+    Raises:
+        ValueError: If the body cannot be parsed
+    """
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        frame = pd.read_json(io.BytesIO(body), lines=True)
+        if {"lon", "lat"} <= set(frame.columns):
+            ids = frame["id"].tolist() if "id" in frame.columns else None
+            return frame["lon"].to_numpy(float), frame["lat"].to_numpy(float), ids
+        if {0, 1} <= set(frame.columns):
+            return frame[0].to_numpy(float), frame[1].to_numpy(float), None
+        raise ValueError("NDJSON lines must be {\"lon\", \"lat\"} objects or [lon, lat] arrays")
+
+    payload = json.loads(body)
+    if not isinstance(payload, dict):
+        raise ValueError("Body must be a JSON object")
+
+    if "lons" in payload and "lats" in payload:
+        return (
+            np.asarray(payload["lons"], dtype=float),
+            np.asarray(payload["lats"], dtype=float),
+            payload.get("ids")
+        )
+
+    points = payload.get("points")
+    if not isinstance(points, list):
+        raise ValueError("Body must contain 'lons'/'lats' arrays or a 'points' list")
+    if points and isinstance(points[0], dict):
+        frame = pd.DataFrame.from_records(points)
+        ids = frame["id"].tolist() if "id" in frame.columns else None
+        return frame["lon"].to_numpy(float), frame["lat"].to_numpy(float), ids
+
+    coords = np.asarray(points, dtype=float).reshape(-1, 2)
+    return coords[:, 0], coords[:, 1], None
+
+
+@router.post("/wi/points")
+async def score_points(
+    request: Request,
+    profile: str = Query(..., description="Profile name"),
+    area: Optional[str] = Query(None, description="Area name (default: route each point to the area containing it)"),
+    fields: Optional[str] = Query(None, description="Comma-separated score columns (default: wi_score and score_*)"),
+    format: Optional[str] = Query(None, description="Output format: 'json', 'arrow' or 'parquet' (default: from Accept header, else json)"),
+    config: Config = Depends(get_app_config),
+    point_service: PointScoringService = Depends(get_point_scoring_service),
+    executor: RequestExecutor = Depends(get_request_executor)
+):
+    """Score a batch of points.
+
+    Resolves every point to its grid cell in one vectorized pass and
+    returns columnar results in input order. Without ``area``, points are
+    grouped by the area whose grid contains them; points outside every
+    area get null values. With ``area``, points snap to the nearest cell
+    like ``/wi/point``.
+
+    The body is JSON (``{"lons": [...], "lats": [...], "ids": [...]}`` or
+    ``{"points": [[lon, lat], ...]}``) or NDJSON with one
+    ``{"lon", "lat", "id"}`` per line (``Content-Type: application/x-ndjson``).
+
+    **Example:**
+    ```
+    POST /api/v1/wi/points?profile=residential_family
+    {"lons": [139.7386, 139.7012], "lats": [35.6284, 35.6105], "ids": ["a", "b"]}
+    ```
+
+    **Response:**
+    ```json
+    {
+      "profile": "residential_family",
+      "count": 2,
+      "matched": 2,
+      "columns": {
+        "id": ["a", "b"],
+        "area": ["shinagawa", "shinagawa"],
+        "grid_id": ["shinagawa_00123_00456", "shinagawa_00051_00188"],
+        "wi_score": [72.3, 58.1],
+        "score_supermarket": [0.89, 0.61]
+      }
+    }
+    ```
+    """
+    try:
+        try:
+            lons, lats, ids = await parse_body(
+                executor, config, "wi_batch", parse_points,
+                await request.body(), request.headers.get("content-type", "")
+            )
+        except (ValueError, KeyError, TypeError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid points body: {str(e)}")
+
+        if ids is not None and len(ids) != len(lons):
+            raise HTTPException(status_code=400, detail="ids must have one entry per point")
+
+        performance = config.get_api_config().get("performance", {})
+        max_points = performance.get("max_batch_points", 1000000)
+        if len(lons) > max_points:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Too many points: {len(lons)} (max {max_points}); use scripts/score_points.py for larger files"
+            )
+
+        fields_list = None
+        if fields:
+            fields_list = [f.strip() for f in fields.split(',') if f.strip()]
+
+        if format is None:
+            format = negotiate_format(request.headers.get("accept"), default="json")
+
+        if format not in ("arrow", "parquet", "json"):
+            raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+
+        def score():
+            result = point_service.score(lons, lats, profile, area=area, fields=fields_list)
+            if ids is not None:
+                result.insert(0, "id", ids)
+
+            if format in ("arrow", "parquet"):
+                table = pa.Table.from_pandas(result, preserve_index=False)
+                return columnar_response(table, format, f"wi_points_{profile}")
+
+            columns = {
+                name: result[name].astype(object).where(result[name].notna(), None).tolist()
+                for name in result.columns
+            }
+            content = json.dumps({
+                "profile": profile,
+                "area": area,
+                "count": len(result),
+                "matched": int(result["grid_id"].notna().sum()),
+                "columns": columns
+            }, ensure_ascii=False)
+            return Response(content=content, media_type="application/json")
+
+        return await executor.run("wi_batch", "cpu", score)
+
+    except HTTPException:
+        raise
+    except FileNotFoundError as e:
+        raise HTTPException(
+            status_code=404,
+            detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+
+def parse_zones_body(body: bytes) -> list:
+    """Decode a JSON request body and parse it with :func:`parse_zones`."""
+    return parse_zones(json.loads(body))
+
+
+def parse_zones(body: Dict[str, Any]) -> list:
+    """Parse a GeoJSON Geometry, Feature or FeatureCollection into zones.
+
+    Args:
+        body: Decoded GeoJSON object (EPSG:4326)
+
+    Returns:
+        List of ``{"id", "geometry"}`` with shapely (Multi)Polygons
+
+    Raises:
+        ValueError: If the body is not polygonal GeoJSON
+    """
+    if not isinstance(body, dict):
+        raise ValueError("Body must be a GeoJSON object")
+
+    kind = body.get("type")
+    if kind == "FeatureCollection":
+        features = body.get("features") or []
+    elif kind == "Feature":
+        features = [body]
+    else:
+        features = [{"type": "Feature", "geometry": body}]
+
+    zones = []
+    for i, feature in enumerate(features):
+        geometry = shape(feature.get("geometry") or {})
+        if geometry.geom_type not in ("Polygon", "MultiPolygon"):
+            raise ValueError(f"Feature {i}: expected Polygon or MultiPolygon, got {geometry.geom_type}")
+        if geometry.is_empty or not geometry.is_valid:
+            raise ValueError(f"Feature {i}: invalid or empty geometry")
+        zone_id = feature.get("id", (feature.get("properties") or {}).get("id", i))
+        zones.append({"id": zone_id, "geometry": geometry})
+
+    if not zones:
+        raise ValueError("No polygons given")
+    return zones
+
+
+@router.post("/wi/zonal")
+async def get_wi_zonal(
+    request: Request,
+    area: str = Query(..., description="Area name"),
+    profile: str = Query(..., description="Profile name"),
+    weighting: str = Query("centroid", description="'centroid' (cells whose centroid is inside) or 'area' (weight cells by overlap)"),
+    config: Config = Depends(get_app_config),
+    zonal_service: ZonalService = Depends(get_zonal_service),
+    executor: RequestExecutor = Depends(get_request_executor)
+) -> Dict[str, Any]:
+    """Get WI statistics inside user-drawn polygons.
+
+    The body is a GeoJSON Polygon/MultiPolygon geometry, Feature or
+    FeatureCollection in EPSG:4326. Each feature is summarized separately
+    and identified by its ``id`` (or ``properties.id``, else its index).
+
+    With ``weighting=centroid`` a cell belongs to a zone when its centroid
+    lies inside it. With ``weighting=area`` every overlapping cell counts
+    with the fraction of its area inside the zone, and ``weight`` reports
+    the total (in cells).
+
+    **Example:**
+    ```
+    POST /api/v1/wi/zonal?area=shinagawa&profile=residential_family
+    {"type": "Feature", "id": "school-district-3",
+     "geometry": {"type": "Polygon", "coordinates": [[[139.72, 35.60], [139.74, 35.60], [139.74, 35.62], [139.72, 35.60]]]}}
+    ```
+
+    **Response:**
+    ```json
+    {
+      "area": "shinagawa",
+      "profile": "residential_family",
+      "weighting": "centroid",
+      "zones": [
+        {
+          "id": "school-district-3",
+          "count": 412,
+          "wi_score": {"mean": 68.2, "min": 31.0, "max": 92.4, "std": 12.1, "median": 69.0, "count": 412, ...},
+          "amenity_scores": {"supermarket": {"mean": 0.71, "min": 0.2, "max": 1.0, "std": 0.18}}
+        }
+      ]
+    }
+    ```
+    """
+    try:
+        if weighting not in WEIGHTINGS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid weighting: {weighting}. Available: {list(WEIGHTINGS)}"
+            )
+
+        try:
+            zones = await parse_body(
+                executor, config, "wi_batch", parse_zones_body, await request.body()
+            )
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid GeoJSON body: {str(e)}")
+
+        performance = config.get_api_config().get("performance", {})
+        max_zones = performance.get("max_zonal_polygons", 1000)
+        if len(zones) > max_zones:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Too many polygons: {len(zones)} (max {max_zones})"
+            )
+
+        results = await executor.run(
+            "wi_batch", "cpu", zonal_service.zonal_statistics, area, profile, zones, weighting=weighting
+        )
+
+        return {
+            "area": area,
+            "profile": profile,
+            "weighting": weighting,
+            "zones": results
+        }
+
+    except HTTPException:
+        raise
     except FileNotFoundError as e:
         raise HTTPException(
             status_code=404,
             detail=str(e)
         )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -162,16 +865,26 @@ async def get_wi_point(
 async def get_wi_statistics(
     area: str = Query(..., description="Area name"),
     profile: str = Query(..., description="Profile name"),
-    wi_service: WIService = Depends(get_wi_service)
+    bbox: Optional[str] = Query(None, description="Bounding box: minLon,minLat,maxLon,maxLat"),
+    wi_service: WIService = Depends(get_wi_service),
+    executor: RequestExecutor = Depends(get_request_executor)
 ) -> Dict[str, Any]:
     """Get statistics for WI scores.
 
-    Returns statistical summary (mean, min, max, std, median, count) for
-    the specified area-profile combination.
+    Returns statistical summary (mean, min, max, std, median, count,
+    percentiles) for the specified area-profile combination, optionally
+    restricted to the cells intersecting ``bbox``.
+
+    Whole-area statistics are read from the Phase 2 sidecar file. Bbox
+    statistics come from summed-area tables built at load time: count,
+    mean, std, min and max are exact; median and percentiles are estimated
+    from per-block histograms and are within ``quantile_error`` of the
+    exact value (0 when exact).
 
     **Example:**
     ```
     GET /api/v1/wi/statistics?area=shinagawa&profile=residential_family
+    GET /api/v1/wi/statistics?area=shinagawa&profile=residential_family&bbox=139.7,35.6,139.72,35.62
     ```
 
     **Response:**
@@ -182,14 +895,30 @@ async def get_wi_statistics(
       "max": 94.1,
       "std": 18.2,
       "median": 69.5,
-      "count": 3245
+      "count": 3245,
+      "percentiles": {"p10": 41.2, "p25": 55.0, "p75": 80.3, "p90": 87.6},
+      "quantile_error": 0.36
     }
     ```
     """
     try:
-        stats = wi_service.get_wi_statistics(area=area, profile=profile)
+        bbox_obj = None
+        if bbox:
+            try:
+                bbox_obj = BoundingBox.from_string(bbox)
+            except ValueError as e:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Invalid bbox format: {str(e)}"
+                )
+
+        stats = await executor.run(
+            "wi_query", "io", wi_service.get_wi_statistics, area=area, profile=profile, bbox=bbox_obj
+        )
         return stats
 
+    except HTTPException:
+        raise
     except FileNotFoundError as e:
         raise HTTPException(
             status_code=404,
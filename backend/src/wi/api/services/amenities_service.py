@@ -2,64 +2,32 @@
 Amenities service for loading and filtering amenity data
 """
 
-from typing import List, Optional, Dict, Any
-from pathlib import Path
-from functools import lru_cache
-import geopandas as gpd
-from shapely.geometry import box
-from loguru import logger
+from typing import List, Optional
 
+import pyarrow as pa
 
-class AmenitiesService:
-    """Service for managing amenity data"""
+from .amenity_store import AmenityStore
+from .arrow_encoder import project_table
+from .geojson_encoder import feature_collection
+from .metrics import STAGE_SECONDS
 
-    def __init__(self, data_dir: Path):
-        self.data_dir = data_dir
-        self.raw_data_dir = data_dir.parent / "raw"
 
-    @lru_cache(maxsize=10)
-    def _load_amenities_data(self, area: str) -> gpd.GeoDataFrame:
-        """
-        Load amenities data for an area from OSM data
+class AmenitiesService:
+    """Service for managing amenity data
 
-        Looks for amenities_{area}.parquet or amenities_{area}.geojson
-        """
-        # Try Parquet first
-        parquet_path = self.raw_data_dir / f"amenities_{area}.parquet"
-        if parquet_path.exists():
-            logger.info(f"Loading amenities from {parquet_path}")
-            return gpd.read_parquet(parquet_path)
-
-        # Try GeoJSON
-        geojson_path = self.raw_data_dir / f"amenities_{area}.geojson"
-        if geojson_path.exists():
-            logger.info(f"Loading amenities from {geojson_path}")
-            return gpd.read_file(geojson_path)
-
-        # If neither exists, try to extract from WI data
-        wi_parquet = self.data_dir / f"wi_{area}_residential_family.parquet"
-        if not wi_parquet.exists():
-            raise FileNotFoundError(f"Amenities data not found for area: {area}")
-
-        # For now, return empty GeoDataFrame with proper schema
-        # In production, you would extract amenities from OSM during Phase 1
-        logger.warning(f"No amenities data found for {area}, returning empty result")
-        return gpd.GeoDataFrame(
-            {
-                'amenity_type': [],
-                'name': [],
-                'osm_id': [],
-            },
-            geometry=[],
-            crs="EPSG:4326"
-        )
+    Queries the app-scoped ``AmenityStore``: per-type KD-tree lookups
+    select points and their pre-encoded GeoJSON features are concatenated.
+    """
+
+    def __init__(self, store: AmenityStore):
+        self.store = store
 
     def get_amenities(
         self,
         area: str,
         amenity_types: Optional[List[str]] = None,
         bbox: Optional[List[float]] = None
-    ) -> Dict[str, Any]:
+    ) -> bytes:
         """
         Get amenities for an area with optional filtering
 
@@ -69,67 +37,115 @@ class AmenitiesService:
             bbox: Bounding box [min_lon, min_lat, max_lon, max_lat]
 
         Returns:
-            GeoJSON FeatureCollection with amenity points
+            UTF-8 encoded GeoJSON FeatureCollection with amenity points,
+            grouped by type
+        """
+        stages = STAGE_SECONDS.stages("amenities", "points")
+        amenities = self.store.get(area)
+        stages.lap("load")
+        selection = amenities.select(amenity_types, bbox)
+        stages.lap("filter")
+
+        content = feature_collection(amenities.encode(selection), {
+            'area': area,
+            'count': int(sum(len(indices) for _, indices in selection)),
+            'types': [name for name, _ in selection],
+            'filtered_types': amenity_types,
+            'bbox': bbox
+        })
+        stages.lap("encode")
+        return content
+
+    def get_amenity_clusters(
+        self,
+        area: str,
+        zoom: int,
+        amenity_types: Optional[List[str]] = None,
+        bbox: Optional[List[float]] = None
+    ) -> bytes:
+        """
+        Get amenities clustered for a map zoom level
+
+        Below the store's point zoom, clusters come from the per-type
+        pyramids built when the area was loaded, so the response size is
+        bounded by the viewport rather than by data density. From the point
+        zoom on, individual points are returned as by ``get_amenities``.
+
+        Args:
+            area: Area name
+            zoom: Map zoom level
+            amenity_types: List of amenity types to filter
+            bbox: Bounding box [min_lon, min_lat, max_lon, max_lat]
+
+        Returns:
+            UTF-8 encoded GeoJSON FeatureCollection; cluster features have
+            ``cluster``, ``count`` and per-type ``types`` counts
         """
-        # Load amenities data
-        amenities = self._load_amenities_data(area)
-
-        if amenities.empty:
-            return {
-                "type": "FeatureCollection",
-                "features": [],
-                "metadata": {
-                    "area": area,
-                    "count": 0,
-                    "types": []
-                }
-            }
-
-        # Filter by amenity types
-        if amenity_types:
-            amenities = amenities[amenities['amenity_type'].isin(amenity_types)].copy()
-
-        # Filter by bounding box
-        if bbox:
-            min_lon, min_lat, max_lon, max_lat = bbox
-            bbox_geom = box(min_lon, min_lat, max_lon, max_lat)
-
-            # Convert bbox to amenities CRS if needed
-            if amenities.crs and amenities.crs.to_epsg() != 4326:
-                bbox_gdf = gpd.GeoDataFrame({'geometry': [bbox_geom]}, crs="EPSG:4326")
-                bbox_gdf = bbox_gdf.to_crs(amenities.crs)
-                bbox_geom = bbox_gdf.geometry.iloc[0]
-
-            amenities = amenities[amenities.geometry.within(bbox_geom)].copy()
-
-        # Convert to EPSG:4326 for web mapping
-        if amenities.crs and amenities.crs.to_epsg() != 4326:
-            amenities = amenities.to_crs("EPSG:4326")
-
-        # Get unique types
-        unique_types = amenities['amenity_type'].unique().tolist() if not amenities.empty else []
-
-        # Convert to GeoJSON
-        geojson = amenities.to_json()
-
-        # Parse and add metadata
-        import json
-        result = json.loads(geojson)
-        result['metadata'] = {
+        stages = STAGE_SECONDS.stages("amenities", "clusters")
+        amenities = self.store.get(area)
+        stages.lap("load")
+        metadata = {
             'area': area,
-            'count': len(amenities),
-            'types': unique_types,
+            'zoom': zoom,
+            'point_zoom': amenities.point_zoom,
             'filtered_types': amenity_types,
             'bbox': bbox
         }
 
-        return result
+        if zoom >= amenities.point_zoom:
+            selection = amenities.select(amenity_types, bbox)
+            stages.lap("filter")
+            count = int(sum(len(indices) for _, indices in selection))
+            content = feature_collection(amenities.encode(selection), {
+                **metadata,
+                'clustered': False,
+                'count': count,
+                'features': count,
+            })
+            stages.lap("encode")
+            return content
+
+        features, count = amenities.clusters(zoom, amenity_types, bbox)
+        stages.lap("filter")
+        content = feature_collection(b",".join(features), {
+            **metadata,
+            'clustered': True,
+            'count': count,
+            'features': len(features),
+        })
+        stages.lap("encode")
+        return content
+
+    def get_amenities_table(
+        self,
+        area: str,
+        amenity_types: Optional[List[str]] = None,
+        bbox: Optional[List[float]] = None,
+        fields: Optional[List[str]] = None,
+        geometry: str = "wkb"
+    ) -> pa.Table:
+        """
+        Get amenities as an Arrow table for columnar export
+
+        Args:
+            area: Area name
+            amenity_types: List of amenity types to filter
+            bbox: Bounding box [min_lon, min_lat, max_lon, max_lat]
+            fields: Columns to include (default: all)
+            geometry: "wkb", "xy" (lon/lat columns) or "none"
+
+        Returns:
+            Arrow table (GeoParquet ``geo`` metadata when geometry is WKB)
+        """
+        stages = STAGE_SECONDS.stages("amenities", "table")
+        amenities = self.store.get(area)
+        stages.lap("load")
+        positions = amenities.positions(amenities.select(amenity_types, bbox))
+        stages.lap("filter")
+        table = project_table(amenities.arrow, positions, fields, geometry)
+        stages.lap("encode")
+        return table
 
     def get_available_types(self, area: str) -> List[str]:
         """Get list of available amenity types for an area"""
-        amenities = self._load_amenities_data(area)
-
-        if amenities.empty or 'amenity_type' not in amenities.columns:
-            return []
-
-        return sorted(amenities['amenity_type'].unique().tolist())
+        return sorted(self.store.get(area).types)
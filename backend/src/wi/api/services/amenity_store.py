@@ -0,0 +1,430 @@
+"""App-scoped, per-type indexed amenity data."""
+
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import json
+import threading
+
+import geopandas as gpd
+import numpy as np
+import pyarrow as pa
+import shapely
+from loguru import logger
+from scipy.spatial import cKDTree
+
+from ...catalog import DatasetCatalog
+from ...tiles.mercator import ORIGIN_SHIFT, lonlat_to_mercator
+from .arrow_encoder import geodataframe_to_arrow
+from .geojson_encoder import encode_feature_list
+
+# Cluster cells per tile edge, as a power of two (2 -> 4x4 cells of 64 px
+# on a 256 px tile). Cells of zoom z split into exactly four cells of z + 1.
+CLUSTER_CELL_BITS = 2
+
+DEFAULT_POINT_ZOOM = 15
+
+
+def _world_xy(lons: np.ndarray, lats: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Longitude/latitude to Web Mercator world coordinates in [0, 1] (y down)."""
+    x, y = lonlat_to_mercator(lons, lats)
+    return (x + ORIGIN_SHIFT) / (2 * ORIGIN_SHIFT), (ORIGIN_SHIFT - y) / (2 * ORIGIN_SHIFT)
+
+
+def _world_lonlat(x: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Inverse of :func:`_world_xy`."""
+    return x * 360.0 - 180.0, np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * y))))
+
+
+class ClusterLevel:
+    """Clusters of one zoom level, keyed by grid cell (``cx << 32 | cy``)."""
+
+    def __init__(self, keys: np.ndarray, counts: np.ndarray, sum_x: np.ndarray,
+                 sum_y: np.ndarray, points: np.ndarray):
+        """Initialize cluster level.
+
+        Args:
+            keys: Sorted unique cell keys
+            counts: Number of points per cell
+            sum_x: Sum of the points' world x per cell
+            sum_y: Sum of the points' world y per cell
+            points: Index of one point of the cell (the point itself when
+                the count is 1)
+        """
+        self.keys = keys
+        self.counts = counts
+        self.sum_x = sum_x
+        self.sum_y = sum_y
+        self.points = points
+
+    @classmethod
+    def aggregate(cls, keys: np.ndarray, counts: np.ndarray, sum_x: np.ndarray,
+                  sum_y: np.ndarray, points: np.ndarray) -> "ClusterLevel":
+        """Merge entries sharing a key."""
+        keys, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        return cls(
+            keys,
+            np.bincount(inverse, weights=counts).astype(np.int64),
+            np.bincount(inverse, weights=sum_x),
+            np.bincount(inverse, weights=sum_y),
+            points[first]
+        )
+
+    def parent(self) -> "ClusterLevel":
+        """The level one zoom out (each cell merges its four children)."""
+        cx, cy = self.keys >> 32, self.keys & 0xFFFFFFFF
+        return self.aggregate(((cx >> 1) << 32) | (cy >> 1), self.counts, self.sum_x, self.sum_y, self.points)
+
+    def select(self, cells: Optional[Tuple[int, int, int, int]]) -> np.ndarray:
+        """Indices of the clusters whose cell lies in an inclusive cell range."""
+        if cells is None:
+            return np.arange(len(self.keys))
+        cx, cy = self.keys >> 32, self.keys & 0xFFFFFFFF
+        min_cx, min_cy, max_cx, max_cy = cells
+        return np.flatnonzero((cx >= min_cx) & (cx <= max_cx) & (cy >= min_cy) & (cy <= max_cy))
+
+
+class ClusterPyramid:
+    """Grid-based cluster hierarchy of one amenity type.
+
+    The finest level bins the points into the cluster cells of
+    ``max_zoom``; every coarser level is built from the one below by
+    merging child cells, so the whole pyramid costs a few passes over the
+    points and each zoom level holds at most one entry per occupied cell.
+    """
+
+    def __init__(self, lons: np.ndarray, lats: np.ndarray, max_zoom: int):
+        """Build the pyramid for zoom levels 0..max_zoom.
+
+        Args:
+            lons: Longitudes
+            lats: Latitudes
+            max_zoom: Finest clustered zoom level
+        """
+        self.max_zoom = max_zoom
+
+        x, y = _world_xy(lons, lats)
+        scale = 1 << (max_zoom + CLUSTER_CELL_BITS)
+        cx = np.clip((x * scale).astype(np.int64), 0, scale - 1)
+        cy = np.clip((y * scale).astype(np.int64), 0, scale - 1)
+
+        level = ClusterLevel.aggregate(
+            (cx << 32) | cy, np.ones(len(x)), x, y, np.arange(len(x))
+        )
+        levels = [level]
+        for _ in range(max_zoom):
+            level = level.parent()
+            levels.append(level)
+        self.levels: List[ClusterLevel] = levels[::-1]
+
+    @staticmethod
+    def cell_range(zoom: int, bbox: List[float]) -> Tuple[int, int, int, int]:
+        """Inclusive cluster cell range (min_cx, min_cy, max_cx, max_cy) of a bbox."""
+        min_x, max_y = _world_xy(bbox[0], bbox[1])
+        max_x, min_y = _world_xy(bbox[2], bbox[3])
+        scale = 1 << (zoom + CLUSTER_CELL_BITS)
+        return (
+            int(np.clip(min_x * scale, 0, scale - 1)), int(np.clip(min_y * scale, 0, scale - 1)),
+            int(np.clip(max_x * scale, 0, scale - 1)), int(np.clip(max_y * scale, 0, scale - 1))
+        )
+
+
+class AmenityType:
+    """Points of one amenity type: coordinates, KD-tree and encoded features."""
+
+    def __init__(self, positions: np.ndarray, lons: np.ndarray, lats: np.ndarray, fragments: np.ndarray,
+                 cluster_max_zoom: int = DEFAULT_POINT_ZOOM - 1):
+        """Initialize amenity type partition.
+
+        Args:
+            positions: Row positions of the points in the area frame
+            lons: Longitudes
+            lats: Latitudes
+            fragments: Pre-encoded GeoJSON Feature bytes, one per point
+            cluster_max_zoom: Finest zoom level of the cluster pyramid
+        """
+        self.positions = positions
+        self.lons = lons
+        self.lats = lats
+        self.fragments = fragments
+        self.tree = cKDTree(np.column_stack([lons, lats])) if len(lons) else None
+        self.clusters = ClusterPyramid(lons, lats, cluster_max_zoom)
+
+    def query_bbox(self, min_lon: float, min_lat: float, max_lon: float, max_lat: float) -> np.ndarray:
+        """Indices (into this partition, sorted) of the points inside a bbox.
+
+        The KD-tree returns the points within the Chebyshev radius of the
+        bbox centre; only those are tested against the exact bbox.
+        """
+        if self.tree is None:
+            return np.empty(0, dtype=np.int64)
+
+        center = [(min_lon + max_lon) / 2, (min_lat + max_lat) / 2]
+        radius = max(max_lon - min_lon, max_lat - min_lat) / 2
+        candidates = np.asarray(self.tree.query_ball_point(center, radius, p=np.inf), dtype=np.int64)
+        candidates.sort()
+
+        lons, lats = self.lons[candidates], self.lats[candidates]
+        inside = (lons >= min_lon) & (lons <= max_lon) & (lats >= min_lat) & (lats <= max_lat)
+        return candidates[inside]
+
+
+class AreaAmenities:
+    """Amenities of one area, partitioned by type."""
+
+    def __init__(self, area: str, data: gpd.GeoDataFrame, version: Optional[str],
+                 point_zoom: int = DEFAULT_POINT_ZOOM):
+        """Partition an area's amenities, pre-encode their features and
+        build their cluster pyramids.
+
+        Args:
+            area: Area name
+            data: Amenities (any CRS; stored in EPSG:4326)
+            version: Version string of the source file (None: no file)
+            point_zoom: Zoom level from which clustered queries return
+                individual points (pyramids cover the zoom levels below)
+        """
+        if data.crs and data.crs.to_epsg() != 4326:
+            data = data.to_crs("EPSG:4326")
+
+        self.area = area
+        self.data = data
+        self.version = version
+        self.point_zoom = point_zoom
+        self._arrow: Optional[pa.Table] = None
+
+        self.types: Dict[str, AmenityType] = {}
+        if len(data) == 0 or "amenity_type" not in data.columns:
+            return
+
+        points = shapely.centroid(np.asarray(data.geometry.values))
+        lons, lats = shapely.get_x(points), shapely.get_y(points)
+        fragments = np.array(
+            [f.encode("utf-8") for f in encode_feature_list(data)], dtype=object
+        )
+
+        type_values = data["amenity_type"].to_numpy()
+        for amenity_type in sorted(set(type_values.tolist())):
+            positions = np.flatnonzero(type_values == amenity_type)
+            self.types[amenity_type] = AmenityType(
+                positions, lons[positions], lats[positions], fragments[positions],
+                cluster_max_zoom=max(point_zoom - 1, 0)
+            )
+
+    @property
+    def arrow(self) -> pa.Table:
+        """The area's amenities as an Arrow table (built on first use)."""
+        if self._arrow is None:
+            self._arrow = geodataframe_to_arrow(self.data)
+        return self._arrow
+
+    def select(
+        self,
+        amenity_types: Optional[List[str]] = None,
+        bbox: Optional[List[float]] = None
+    ) -> List[Tuple[str, np.ndarray]]:
+        """Select points by type and bbox.
+
+        Args:
+            amenity_types: Types to include (default: all)
+            bbox: [min_lon, min_lat, max_lon, max_lat]
+
+        Returns:
+            (type, indices into that type's partition) for each type with matches
+        """
+        names = self.types if amenity_types is None else [t for t in amenity_types if t in self.types]
+
+        selection = []
+        for name in sorted(set(names)):
+            partition = self.types[name]
+            if bbox:
+                indices = partition.query_bbox(*bbox)
+            else:
+                indices = np.arange(len(partition.positions))
+            if len(indices):
+                selection.append((name, indices))
+        return selection
+
+    def encode(self, selection: List[Tuple[str, np.ndarray]]) -> bytes:
+        """Concatenate the pre-encoded features of a selection."""
+        return b",".join(
+            fragment
+            for name, indices in selection
+            for fragment in self.types[name].fragments[indices]
+        )
+
+    def clusters(
+        self,
+        zoom: int,
+        amenity_types: Optional[List[str]] = None,
+        bbox: Optional[List[float]] = None
+    ) -> Tuple[List[bytes], int]:
+        """Clusters of the selected types at a zoom level.
+
+        The per-type pyramid levels are merged cell by cell, so a cluster
+        counts every selected point in its cell and sits at their mean
+        (Web Mercator) position. Cells holding a single point return that
+        point's own feature.
+
+        Args:
+            zoom: Zoom level (clamped to the pyramid's range)
+            amenity_types: Types to include (default: all)
+            bbox: [min_lon, min_lat, max_lon, max_lat]; clusters whose cell
+                intersects it are returned
+
+        Returns:
+            (encoded features, number of points they represent)
+        """
+        names = sorted(set(self.types if amenity_types is None else [t for t in amenity_types if t in self.types]))
+        zoom = int(min(max(zoom, 0), max(self.point_zoom - 1, 0)))
+        cells = ClusterPyramid.cell_range(zoom, bbox) if bbox else None
+
+        levels = [self.types[name].clusters.levels[zoom] for name in names]
+        selected = [level.select(cells) for level in levels]
+        if not any(len(indices) for indices in selected):
+            return [], 0
+
+        keys = np.concatenate([level.keys[i] for level, i in zip(levels, selected)])
+        keys, inverse = np.unique(keys, return_inverse=True)
+        offsets = np.cumsum([0] + [len(i) for i in selected])
+
+        type_counts = np.zeros((len(names), len(keys)), dtype=np.int64)
+        sum_x, sum_y = np.zeros(len(keys)), np.zeros(len(keys))
+        singles: Dict[int, bytes] = {}
+        for t, (level, indices) in enumerate(zip(levels, selected)):
+            slots = inverse[offsets[t]:offsets[t + 1]]
+            level_counts = level.counts[indices]
+            type_counts[t, slots] = level_counts
+            sum_x[slots] += level.sum_x[indices]
+            sum_y[slots] += level.sum_y[indices]
+
+            single = level_counts == 1
+            fragments = self.types[names[t]].fragments
+            for slot, point in zip(slots[single], level.points[indices[single]]):
+                singles[int(slot)] = fragments[point]
+
+        counts = type_counts.sum(axis=0)
+        lons, lats = _world_lonlat(sum_x / counts, sum_y / counts)
+
+        features = []
+        for slot in range(len(keys)):
+            count = int(counts[slot])
+            if count == 1:
+                features.append(singles[slot])
+                continue
+            key = int(keys[slot])
+            features.append(json.dumps({
+                "id": f"cluster-{zoom}-{key >> 32}-{key & 0xFFFFFFFF}",
+                "type": "Feature",
+                "properties": {
+                    "cluster": True,
+                    "count": count,
+                    "types": {
+                        name: int(n) for name, n in zip(names, type_counts[:, slot]) if n
+                    }
+                },
+                "geometry": {
+                    "type": "Point",
+                    "coordinates": [round(float(lons[slot]), 6), round(float(lats[slot]), 6)]
+                }
+            }, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+
+        return features, int(counts.sum())
+
+    def positions(self, selection: List[Tuple[str, np.ndarray]]) -> np.ndarray:
+        """Sorted row positions of a selection in ``data``."""
+        if not selection:
+            return np.empty(0, dtype=np.int64)
+        return np.sort(np.concatenate([
+            self.types[name].positions[indices] for name, indices in selection
+        ]))
+
+
+class AmenityStore:
+    """Load each area's amenities once and keep them indexed per type.
+
+    Files are looked up as ``raw/amenities_{area}.parquet`` (or
+    ``.geojson``) next to the processed data directory and reloaded when
+    their modification time or size changes.
+    """
+
+    def __init__(self, data_dir: Path, point_zoom: int = DEFAULT_POINT_ZOOM,
+                 catalog: Optional[DatasetCatalog] = None):
+        """Initialize amenity store.
+
+        Args:
+            data_dir: Processed data directory (raw data is in ``../raw``)
+            point_zoom: Zoom level from which clustered queries return
+                individual points
+            catalog: Dataset catalog used to check that an area exists
+                (default: a catalog of ``data_dir``)
+        """
+        self.data_dir = Path(data_dir)
+        self.raw_data_dir = self.data_dir.parent / "raw"
+        self.point_zoom = point_zoom
+        self.catalog = catalog if catalog is not None else DatasetCatalog(self.data_dir)
+
+        self._areas: Dict[str, AreaAmenities] = {}
+        self._lock = threading.Lock()
+
+    def _source(self, area: str) -> Tuple[Optional[Path], Optional[str]]:
+        """Amenities file of an area and its version string (mtime/size)."""
+        for suffix in ("parquet", "geojson"):
+            path = self.raw_data_dir / f"amenities_{area}.{suffix}"
+            if path.exists():
+                stat = path.stat()
+                return path, f"{suffix}-{stat.st_mtime_ns:x}-{stat.st_size:x}"
+        return None, None
+
+    def get(self, area: str) -> AreaAmenities:
+        """Get the indexed amenities of an area, loading them on first use.
+
+        Args:
+            area: Area name
+
+        Returns:
+            AreaAmenities
+
+        Raises:
+            FileNotFoundError: If the area has neither amenities nor WI data
+        """
+        path, version = self._source(area)
+
+        amenities = self._areas.get(area)
+        if amenities is not None and amenities.version == version:
+            return amenities
+
+        with self._lock:
+            amenities = self._areas.get(area)
+            if amenities is None or amenities.version != version:
+                amenities = AreaAmenities(area, self._read(area, path), version, self.point_zoom)
+                self._areas[area] = amenities
+                logger.info(
+                    f"Indexed {len(amenities.data)} amenities for {area} "
+                    f"({len(amenities.types)} types)"
+                )
+
+        return amenities
+
+    def _read(self, area: str, path: Optional[Path]) -> gpd.GeoDataFrame:
+        """Read the amenities file of an area."""
+        if path is not None:
+            logger.info(f"Loading amenities from {path}")
+            if path.suffix == ".parquet":
+                return gpd.read_parquet(path)
+            return gpd.read_file(path)
+
+        # If no file exists, the area must at least have WI data
+        if not self.catalog.has_area(area):
+            raise FileNotFoundError(f"Amenities data not found for area: {area}")
+
+        # In production, amenities are extracted from OSM during Phase 1
+        logger.warning(f"No amenities data found for {area}, returning empty result")
+        return gpd.GeoDataFrame(
+            {
+                'amenity_type': [],
+                'name': [],
+                'osm_id': [],
+            },
+            geometry=[],
+            crs="EPSG:4326"
+        )
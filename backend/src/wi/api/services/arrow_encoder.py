@@ -0,0 +1,223 @@
+"""Apache Arrow IPC and GeoParquet encoding of grid and amenity data."""
+
+import io
+import json
+from typing import Iterator, List, Optional
+
+import geopandas as gpd
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import shapely
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+GEOMETRY_MODES = ("wkb", "xy", "none")
+
+# Accept header media types understood by format negotiation
+ACCEPT_FORMATS = {
+    ARROW_MEDIA_TYPE: "arrow",
+    "application/vnd.apache.arrow.file": "arrow",
+    PARQUET_MEDIA_TYPE: "parquet",
+    "application/x-parquet": "parquet",
+}
+
+
+def negotiate_format(accept: Optional[str], default: str = "geojson") -> str:
+    """Pick a columnar format from an Accept header.
+
+    Args:
+        accept: Accept header value
+        default: Format used when no columnar media type is accepted
+
+    Returns:
+        "arrow", "parquet" or ``default``
+    """
+    for part in (accept or "").split(","):
+        media_type = part.split(";")[0].strip().lower()
+        if media_type in ACCEPT_FORMATS:
+            return ACCEPT_FORMATS[media_type]
+    return default
+
+
+def geodataframe_to_arrow(gdf: gpd.GeoDataFrame) -> pa.Table:
+    """Convert an EPSG:4326 GeoDataFrame to an Arrow table.
+
+    Geometry becomes a WKB ``geometry`` column and the schema carries
+    GeoParquet ``geo`` metadata (no ``crs`` member, i.e. OGC:CRS84).
+
+    Args:
+        gdf: GeoDataFrame in EPSG:4326
+
+    Returns:
+        Arrow table
+    """
+    geometry_name = gdf.geometry.name
+    table = pa.Table.from_pandas(
+        gdf.drop(columns=[geometry_name]).reset_index(drop=True),
+        preserve_index=False
+    )
+    # pandas metadata would describe the dropped geometry column
+    table = table.replace_schema_metadata(None)
+
+    return append_geometry(table, np.asarray(gdf.geometry.values), "wkb")
+
+
+def append_geometry(table: pa.Table, geometries: np.ndarray, geometry: str = "wkb") -> pa.Table:
+    """Add EPSG:4326 geometries to an attribute table.
+
+    Args:
+        table: Attribute table, one row per geometry
+        geometries: shapely object array in EPSG:4326
+        geometry: "wkb" (WKB ``geometry`` column with GeoParquet ``geo``
+            metadata), "xy" (centroid ``lon``/``lat`` columns) or "none"
+
+    Returns:
+        Table with the geometry columns appended
+    """
+    if geometry == "xy":
+        centroids = shapely.centroid(geometries)
+        table = table.append_column("lon", pa.array(shapely.get_x(centroids)))
+        return table.append_column("lat", pa.array(shapely.get_y(centroids)))
+    if geometry != "wkb":
+        return table
+
+    table = table.append_column(
+        "geometry", pa.array(shapely.to_wkb(geometries), type=pa.binary())
+    )
+
+    geometry_types = sorted({t for t in shapely.get_type_id(geometries).tolist()})
+    type_names = {0: "Point", 1: "LineString", 3: "Polygon", 4: "MultiPoint",
+                  5: "MultiLineString", 6: "MultiPolygon"}
+    geo = {
+        "version": "1.0.0",
+        "primary_column": "geometry",
+        "columns": {"geometry": {
+            "encoding": "WKB",
+            "geometry_types": [type_names[t] for t in geometry_types if t in type_names],
+            "bbox": [float(v) for v in shapely.total_bounds(geometries)] if len(geometries) else []
+        }}
+    }
+
+    return table.replace_schema_metadata({"geo": json.dumps(geo)})
+
+
+def select_rows(
+    table: pa.Table,
+    positions: Optional[np.ndarray] = None,
+    columns: Optional[List[str]] = None,
+    geometry: str = "wkb"
+) -> pa.Table:
+    """Select rows and attribute columns of a table.
+
+    Args:
+        table: Table (a ``geometry`` column, if any, is kept)
+        positions: Row positions to keep (None: all rows)
+        columns: Attribute columns to keep (None: all)
+        geometry: Geometry mode of the output, validated here
+
+    Returns:
+        Table with the selected rows
+
+    Raises:
+        ValueError: If a column or geometry mode is unknown
+    """
+    if geometry not in GEOMETRY_MODES:
+        raise ValueError(f"Unknown geometry mode: {geometry}. Available: {list(GEOMETRY_MODES)}")
+
+    attributes = [name for name in table.column_names if name != "geometry"]
+    if columns is not None:
+        missing = [c for c in columns if c not in attributes]
+        if missing:
+            raise ValueError(f"Unknown fields: {missing}. Available: {attributes}")
+        attributes = list(columns)
+
+    if positions is not None:
+        table = table.take(pa.array(positions, type=pa.int64()))
+    if "geometry" in table.column_names:
+        attributes.append("geometry")
+    return table.select(attributes)
+
+
+def project_table(
+    table: pa.Table,
+    positions: Optional[np.ndarray] = None,
+    columns: Optional[List[str]] = None,
+    geometry: str = "wkb"
+) -> pa.Table:
+    """Select rows and columns before encoding.
+
+    Args:
+        table: Table from :func:`geodataframe_to_arrow`
+        positions: Row positions to keep (None: all rows)
+        columns: Attribute columns to keep (None: all)
+        geometry: "wkb" (WKB column), "xy" (centroid ``lon``/``lat``
+            columns) or "none"
+
+    Returns:
+        Projected table
+
+    Raises:
+        ValueError: If a column or geometry mode is unknown
+    """
+    table = select_rows(table, positions, columns, geometry)
+    if geometry == "wkb":
+        return table
+
+    selected = table.drop_columns(["geometry"])
+    if geometry == "xy":
+        wkb = table.column("geometry").to_numpy(zero_copy_only=False)
+        return append_geometry(selected, shapely.from_wkb(wkb), "xy")
+    return selected
+
+
+class _ChunkSink:
+    """File-like sink collecting written chunks for streaming."""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.closed = False
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def iter_ipc_stream(table: pa.Table, batch_size: int = 65536) -> Iterator[bytes]:
+    """Yield an Arrow IPC stream one record batch at a time.
+
+    Args:
+        table: Table to stream
+        batch_size: Maximum rows per record batch
+
+    Yields:
+        Encoded stream chunks (schema message, batches, end-of-stream)
+    """
+    sink = _ChunkSink()
+    writer = pa.ipc.new_stream(sink, table.schema)
+    yield sink.drain()
+
+    for batch in table.to_batches(max_chunksize=batch_size):
+        writer.write_batch(batch)
+        yield sink.drain()
+
+    writer.close()
+    yield sink.drain()
+
+
+def to_parquet_bytes(table: pa.Table) -> bytes:
+    """Encode a table as a (Geo)Parquet file."""
+    buffer = io.BytesIO()
+    pq.write_table(table, buffer, compression="zstd")
+    return buffer.getvalue()
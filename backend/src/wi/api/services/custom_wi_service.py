@@ -3,21 +3,120 @@ Custom WI calculation service
 Allows dynamic WI calculation with user-defined weights
 """
 
-from typing import Dict, Any, List
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
 from pathlib import Path
-import geopandas as gpd
+import hashlib
 import json
+import threading
+
+import diskcache
+import numpy as np
+import pandas as pd
+import shapely
 from loguru import logger
 
+from ...catalog import file_version
 from ...config import get_config
+from ...grid.summary import compute_statistics
+from ...scoring.decay_functions import DecayFunction
+from ...scoring.distance_table import DistanceTable
+from .data_loader import DataLoader
+from .dataset import GridDataset
+from .geojson_encoder import encode_features, feature_collection
+
+# Per-type score arrays kept for reuse across slider changes
+TYPE_SCORE_CACHE_SIZE = 256
+
+
+class ScoreMatrix:
+    """Per-type amenity scores of every profile computed for an area.
+
+    Each profile file stores ``score_{type}`` columns computed with that
+    profile's distance parameters, so one type can have several variants.
+    All variants are aligned on the cells of a base dataset and stacked into
+    one float32 matrix (cells x variants) together with the pre-encoded
+    GeoJSON geometries of the cells.
+    """
+
+    def __init__(
+        self,
+        base: GridDataset,
+        versions: Tuple[Tuple[str, str], ...],
+        matrix: np.ndarray,
+        variants: Dict[str, List[Dict[str, Any]]]
+    ):
+        """Initialize score matrix.
+
+        Args:
+            base: Dataset whose cells define the row order
+            versions: (profile, file version) of every source dataset
+            matrix: Scores, one column per variant
+            variants: Type -> variants ``{"profile", "ideal_distance", "column"}``
+                (``ideal_distance`` is None when the profile is not configured)
+        """
+        self.versions = versions
+        self.matrix = matrix
+        self.variants = variants
+        self.grid_ids = base.frame["grid_id"].to_numpy()
+        self.geometries = shapely.to_geojson(base.cell_geometries(wgs84=True))
+
+    def select(self, amenity_type: str, ideal_distance: float) -> Optional[Dict[str, Any]]:
+        """Pick the variant of a type computed with the closest ideal distance."""
+        candidates = self.variants.get(amenity_type)
+        if not candidates:
+            return None
+        return min(
+            candidates,
+            key=lambda v: abs(v["ideal_distance"] - ideal_distance)
+            if v["ideal_distance"] is not None else np.inf
+        )
 
 
 class CustomWIService:
-    """Service for calculating WI with custom profiles"""
+    """Service for calculating WI with custom profiles
+
+    Per-type scores are rescored from the memory-mapped distance table of
+    the area with vectorized decay kernels and cached by their parameters;
+    types without stored distances use the precomputed columns of the
+    area's ``ScoreMatrix``. A custom WI is then a weighted sum of per-type
+    arrays. Encoded results are kept in a disk-backed cache keyed by area,
+    data versions and the normalized weights, so repeated slider positions
+    are served without recomputing.
+    """
 
-    def __init__(self, data_dir: Path):
-        self.data_dir = data_dir
+    def __init__(
+        self,
+        data_loader: DataLoader,
+        cache_dir: Optional[Path] = None,
+        cache_size_mb: int = 512,
+        table_dir: Optional[Path] = None
+    ):
+        """Initialize custom WI service.
+
+        Args:
+            data_loader: DataLoader instance for accessing precomputed data
+            cache_dir: Directory of the result cache (None: no result cache)
+            cache_size_mb: Size limit of the result cache
+            table_dir: Writable directory of the memory-mapped distance
+                tables (None: always use the precomputed score columns)
+        """
+        self.data_loader = data_loader
         self.config = get_config()
+        self.table_dir = Path(table_dir) if table_dir else None
+
+        self._matrices: Dict[str, ScoreMatrix] = {}
+        self._tables: Dict[str, DistanceTable] = {}
+        self._type_scores: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.result_cache = None
+        if cache_dir is not None:
+            self.result_cache = diskcache.Cache(
+                str(cache_dir),
+                size_limit=int(cache_size_mb * 1024 * 1024),
+                eviction_policy="least-recently-used"
+            )
 
     def get_profile_defaults(self, profile_id: str) -> Dict[str, Any]:
         """
@@ -40,7 +139,9 @@ class CustomWIService:
             weights.append({
                 'amenity_type': amenity_type,
                 'weight': config['weight'],
-                'ideal_distance': config['ideal_distance']
+                'ideal_distance': config['ideal_distance'],
+                'max_distance': config.get('max_distance'),
+                'decay_type': config.get('decay_type', 'exponential')
             })
 
         return {
@@ -50,114 +151,348 @@ class CustomWIService:
             'weights': weights
         }
 
+    def get_score_matrix(self, area: str) -> ScoreMatrix:
+        """
+        Get the score matrix of an area, building it on first use
+
+        Args:
+            area: Area name
+
+        Returns:
+            ScoreMatrix for the current WI files of the area
+
+        Raises:
+            FileNotFoundError: If no WI data exists for the area
+        """
+        profiles = self.data_loader.list_available_profiles(area)
+        if not profiles:
+            raise FileNotFoundError(f"No WI data found for area: {area}")
+
+        # Versions of the datasets being served, so that a matrix is rebuilt
+        # once a reloaded dataset has been swapped in
+        versions = tuple(
+            (profile, self.data_loader.load_dataset(area, profile).version)
+            for profile in profiles
+        )
+
+        with self._lock:
+            matrix = self._matrices.get(area)
+            if matrix is None or matrix.versions != versions:
+                matrix = self._build_score_matrix(area, versions)
+                self._matrices[area] = matrix
+
+        return matrix
+
+    def invalidate(self, area: str):
+        """Drop the in-memory matrices and type scores of an area.
+
+        Stale entries are never served (they are keyed by data version);
+        this only frees their memory when a dataset is republished.
+        """
+        with self._lock:
+            self._matrices.pop(area, None)
+            for key in [k for k in self._type_scores if k[0] == area]:
+                del self._type_scores[key]
+
+    def _build_score_matrix(
+        self,
+        area: str,
+        versions: Tuple[Tuple[str, str], ...]
+    ) -> ScoreMatrix:
+        """Stack the score columns of every profile of an area."""
+        profiles_dict = self.config.profiles.get('profiles', {})
+        base = self.data_loader.load_dataset(area, versions[0][0])
+
+        columns = []
+        variants: Dict[str, List[Dict[str, Any]]] = {}
+        for profile, _ in versions:
+            dataset = self.data_loader.load_dataset(area, profile)
+            amenities = profiles_dict.get(profile, {}).get('amenities', {})
+
+            for column in dataset.frame.columns:
+                if not column.startswith("score_"):
+                    continue
+                amenity_type = column[len("score_"):]
+                ideal_distance = amenities.get(amenity_type, {}).get('ideal_distance')
+                variants.setdefault(amenity_type, []).append({
+                    'profile': profile,
+                    'ideal_distance': float(ideal_distance) if ideal_distance is not None else None,
+                    'column': len(columns)
+                })
+                columns.append(base.align(dataset, column))
+
+        matrix = np.zeros((len(base), len(columns)), dtype=np.float32)
+        for i, values in enumerate(columns):
+            matrix[:, i] = np.nan_to_num(values)
+
+        logger.info(
+            f"Built custom WI score matrix for {area}: {matrix.shape[0]} cells, "
+            f"{len(variants)} types, {matrix.shape[1]} variants from {len(versions)} profiles"
+        )
+
+        return ScoreMatrix(base, versions, matrix, variants)
+
+    def get_distance_table(self, area: str, score_matrix: ScoreMatrix) -> Optional[DistanceTable]:
+        """
+        Get the memory-mapped distance table of an area
+
+        The table is built in ``table_dir`` (never in the data directory,
+        which may be mounted read-only) from the Phase 2
+        ``distances_{area}_{profile}.parquet`` files on first use. Its file
+        name carries a digest of the source and base grid versions, so a
+        republish makes a new table and tables of older versions are
+        removed.
+
+        Args:
+            area: Area name
+            score_matrix: Score matrix whose cell order the table follows
+
+        Returns:
+            DistanceTable, or None when the area has no distance files or
+            the table cannot be written (types then use the precomputed
+            score columns)
+        """
+        if self.table_dir is None:
+            return None
+
+        data_dir = self.data_loader.data_dir
+        files = [
+            data_dir / f"distances_{area}_{profile}.parquet"
+            for profile, _ in score_matrix.versions
+        ]
+        files = [f for f in files if f.exists()]
+        if not files:
+            return None
+
+        expected = {
+            "base": list(score_matrix.versions[0]),
+            "sources": {f.name: file_version(f) for f in files}
+        }
+
+        def current(table):
+            return table is not None and all(
+                table.metadata.get(key) == value for key, value in expected.items()
+            )
+
+        with self._lock:
+            table = self._tables.get(area)
+            if current(table):
+                return table
+
+            digest = hashlib.sha256(json.dumps(expected, sort_keys=True).encode()).hexdigest()[:16]
+            path = self.table_dir / f"distances_{area}.{digest}.arrow"
+            try:
+                table = DistanceTable(path) if path.exists() else None
+                if not current(table):
+                    self.table_dir.mkdir(parents=True, exist_ok=True)
+                    table = DistanceTable.build(path, files, score_matrix.grid_ids, expected)
+                    for stale in self.table_dir.glob(f"distances_{area}.*.arrow"):
+                        if stale != path:
+                            stale.unlink(missing_ok=True)
+            except OSError as e:
+                logger.warning(f"No distance table for {area}, using score columns: {e}")
+                return None
+
+            self._tables[area] = table
+            for key in [k for k in self._type_scores if k[0] == area]:
+                del self._type_scores[key]
+
+        return table
+
     def calculate_custom_wi(
         self,
         area: str,
         profile_name: str,
-        weights: Dict[str, Dict[str, float]]
-    ) -> Dict[str, Any]:
+        weights: Dict[str, Dict[str, Any]]
+    ) -> bytes:
         """
         Calculate WI with custom weights
 
+        WI is the weighted mean of per-type scores (x100). Types present in
+        the area's distance table are rescored from the stored distances
+        with the requested ideal/max distance and decay type, using the same
+        rules as Phase 2; per-type results are cached by their parameters,
+        so moving one slider only rescores that type. Types without stored
+        distances fall back to the precomputed score column whose ideal
+        distance is closest. ``metadata.sources`` reports how each type was
+        scored and types with no data at all are listed in
+        ``metadata.missing_types``.
+
         Args:
             area: Area name
             profile_name: Custom profile name
-            weights: Dict mapping amenity_type to {weight, ideal_distance}
+            weights: Dict mapping amenity_type to {weight, ideal_distance,
+                max_distance (optional), decay_type (optional)}
 
         Returns:
-            GeoJSON with WI scores
-        """
-        logger.info(f"Calculating custom WI for area '{area}' with profile '{profile_name}'")
+            Encoded GeoJSON FeatureCollection with WI scores
 
-        # Load grid data
-        # For simplicity, we'll load from an existing WI result and recalculate
-        # In production, you'd load the grid and amenity data separately
-        processed_dir = self.data_dir
+        Raises:
+            FileNotFoundError: If no WI data exists for the area
+            ValueError: If distance parameters or the decay type are invalid
+        """
+        score_matrix = self.get_score_matrix(area)
+        table = self.get_distance_table(area, score_matrix)
 
-        # Find any existing WI data for this area to get grid structure
-        existing_files = list(processed_dir.glob(f"wi_{area}_*.parquet"))
-        if not existing_files:
-            raise FileNotFoundError(f"No WI data found for area: {area}")
+        selected = {}
+        missing_types = []
+        for amenity_type, config in weights.items():
+            if table is not None and amenity_type in table.ranges:
+                selected[amenity_type] = self._distance_params(amenity_type, config)
+                continue
 
-        # Load existing grid structure
-        base_gdf = gpd.read_parquet(existing_files[0])
-        logger.info(f"Loaded {len(base_gdf)} grid cells for recalculation")
-
-        # Create custom profile dict
-        custom_profile = {
-            'id': 'custom',
-            'name': profile_name,
-            'amenities': {
-                amenity_type: {
-                    'weight': config['weight'],
-                    'ideal_distance': config['ideal_distance']
-                }
-                for amenity_type, config in weights.items()
-            }
-        }
-
-        # Initialize calculator with custom profile
-        # Note: This is a simplified version
-        # In production, you'd need to recalculate accessibility scores
-        # For now, we'll just recalculate WI based on existing amenity scores
-
-        # Recalculate WI scores based on new weights
-        wi_scores = []
-        for _, row in base_gdf.iterrows():
-            amenity_scores = {}
-            total_weighted_score = 0
-            total_weight = 0
-
-            for amenity_type, config in weights.items():
-                score_col = f"score_{amenity_type}"
-                if score_col in base_gdf.columns:
-                    amenity_score = row[score_col]
-                    amenity_scores[amenity_type] = amenity_score
-
-                    weighted_score = amenity_score * config['weight']
-                    total_weighted_score += weighted_score
-                    total_weight += config['weight']
-
-            # Calculate weighted average
-            if total_weight > 0:
-                wi_score = (total_weighted_score / total_weight) * 100
+            variant = score_matrix.select(amenity_type, config['ideal_distance'])
+            if variant is None:
+                missing_types.append(amenity_type)
             else:
-                wi_score = 0
-
-            wi_scores.append(wi_score)
-
-        # Update WI scores
-        result_gdf = base_gdf.copy()
-        result_gdf['wi_score'] = wi_scores
-
-        # Convert to EPSG:4326 for web
-        if result_gdf.crs and result_gdf.crs.to_epsg() != 4326:
-            result_gdf = result_gdf.to_crs("EPSG:4326")
-
-        # Calculate statistics
-        stats = {
-            'mean': float(result_gdf['wi_score'].mean()),
-            'min': float(result_gdf['wi_score'].min()),
-            'max': float(result_gdf['wi_score'].max()),
-            'std': float(result_gdf['wi_score'].std()),
-            'median': float(result_gdf['wi_score'].median()),
-            'count': len(result_gdf)
-        }
+                selected[amenity_type] = dict(variant, source='profile')
 
-        # Convert to GeoJSON
-        geojson_str = result_gdf.to_json()
-        geojson = json.loads(geojson_str)
+        total_weight = sum(weights[t]['weight'] for t in selected)
+        versions = [list(score_matrix.versions), table.metadata["sources"] if table else None]
+        cache_key = self._cache_key(area, versions, weights, selected, total_weight)
+
+        cached = self.result_cache.get(cache_key) if self.result_cache is not None else None
+        if cached is not None:
+            features, stats = cached
+            logger.debug(f"Custom WI cache hit for area '{area}'")
+        else:
+            scores = {
+                t: self._type_score(area, table, t, v) if v['source'] == 'distances'
+                else score_matrix.matrix[:, v['column']]
+                for t, v in selected.items()
+            }
+            features, stats = self._compute(score_matrix, weights, scores, total_weight)
+            if self.result_cache is not None:
+                self.result_cache.set(cache_key, (features, stats))
+            logger.info(f"Custom WI calculation completed for '{area}'. Mean: {stats['mean']:.2f}")
 
-        # Add metadata
-        geojson['metadata'] = {
+        metadata = {
             'area': area,
             'profile_name': profile_name,
             'profile_type': 'custom',
             'weights': weights,
+            'sources': {
+                t: {k: v for k, v in params.items() if k != 'column'}
+                for t, params in selected.items()
+            },
+            'missing_types': missing_types,
             'statistics': stats,
-            'feature_count': len(result_gdf)
+            'feature_count': stats['count']
         }
 
-        logger.info(f"Custom WI calculation completed. Mean: {stats['mean']:.2f}")
+        return feature_collection(features, metadata)
 
-        return geojson
+    def _distance_params(self, amenity_type: str, config: Dict[str, Any]) -> Dict[str, Any]:
+        """Resolve the decay parameters of a type from the request.
+
+        Without ``max_distance`` the ratio max/ideal of the configured
+        profile whose ideal distance is closest is kept (2.5 if none).
+        """
+        ideal_distance = float(config['ideal_distance'])
+        max_distance = config.get('max_distance')
+        decay_type = config.get('decay_type') or 'exponential'
+
+        if max_distance is None:
+            configured = [
+                profile['amenities'][amenity_type]
+                for profile in self.config.profiles.get('profiles', {}).values()
+                if amenity_type in profile.get('amenities', {})
+            ]
+            ratio = 2.5
+            if configured:
+                closest = min(configured, key=lambda c: abs(c['ideal_distance'] - ideal_distance))
+                ratio = closest['max_distance'] / closest['ideal_distance']
+            max_distance = ideal_distance * ratio
+
+        if max_distance <= ideal_distance:
+            raise ValueError(
+                f"max_distance must exceed ideal_distance for {amenity_type}: "
+                f"{max_distance} <= {ideal_distance}"
+            )
+        DecayFunction.get_vectorized(decay_type)
+
+        return {
+            'source': 'distances',
+            'ideal_distance': ideal_distance,
+            'max_distance': float(max_distance),
+            'decay_type': decay_type
+        }
+
+    def _type_score(
+        self,
+        area: str,
+        table: DistanceTable,
+        amenity_type: str,
+        params: Dict[str, Any]
+    ) -> np.ndarray:
+        """Per-cell score of one type from the distance table, cached by parameters."""
+        key = (
+            area, table.version, amenity_type,
+            params['ideal_distance'], params['max_distance'], params['decay_type']
+        )
+
+        with self._lock:
+            scores = self._type_scores.get(key)
+            if scores is not None:
+                self._type_scores.move_to_end(key)
+                return scores
+
+        profiles = self.config.profiles
+        diminishing = profiles.get('diminishing_returns', {'enabled': True, 'exponent': 0.5})
+        scores = table.score(
+            amenity_type,
+            params['ideal_distance'],
+            params['max_distance'],
+            decay_type=params['decay_type'],
+            decay_params=profiles.get('decay_functions', {}).get(params['decay_type'], {}),
+            diminishing_exponent=diminishing['exponent'] if diminishing.get('enabled') else None
+        )
+
+        with self._lock:
+            self._type_scores[key] = scores
+            while len(self._type_scores) > TYPE_SCORE_CACHE_SIZE:
+                self._type_scores.popitem(last=False)
+
+        return scores
+
+    def _compute(
+        self,
+        score_matrix: ScoreMatrix,
+        weights: Dict[str, Dict[str, Any]],
+        scores: Dict[str, np.ndarray],
+        total_weight: float
+    ) -> Tuple[bytes, Dict[str, Any]]:
+        """Weighted mean of per-type scores, encoded as features."""
+        wi_scores = np.zeros(len(score_matrix.grid_ids))
+        if total_weight > 0:
+            for amenity_type, values in scores.items():
+                wi_scores += values * (weights[amenity_type]['weight'] / total_weight * 100)
+
+        properties = pd.DataFrame({'grid_id': score_matrix.grid_ids, 'wi_score': wi_scores})
+        for amenity_type, values in scores.items():
+            properties[f"score_{amenity_type}"] = values.astype(float)
+
+        features = encode_features(properties, list(properties.columns), score_matrix.geometries)
+
+        return features, compute_statistics(wi_scores)
+
+    @staticmethod
+    def _cache_key(
+        area: str,
+        versions: List[Any],
+        weights: Dict[str, Dict[str, Any]],
+        selected: Dict[str, Dict[str, Any]],
+        total_weight: float
+    ) -> str:
+        """Hash of the inputs that determine a result.
+
+        Weights are normalized to their sum, so proportional weight sets
+        share an entry.
+        """
+        normalized = sorted(
+            (t, round(weights[t]['weight'] / total_weight, 6) if total_weight > 0 else 0.0,
+             sorted(params.items()))
+            for t, params in selected.items()
+        )
+        payload = json.dumps([area, versions, normalized])
+        return "custom_wi:" + hashlib.sha256(payload.encode("utf-8")).hexdigest()
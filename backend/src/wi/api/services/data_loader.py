@@ -1,14 +1,29 @@
 """Data loader service for precomputed WI data."""
 
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 from functools import lru_cache
-import re
+import asyncio
+import json
+import threading
+import time
 
 import geopandas as gpd
 import pandas as pd
 from loguru import logger
 
+from .dataset import GridDataset
+from ...catalog import DatasetCatalog, file_version
+from ...grid.columnar import COLUMNAR_SUFFIX, ColumnarGrid, write_columnar
+from ...grid.summary import compute_statistics
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
 
 class DataLoader:
     """Load and cache precomputed WI data from files.
@@ -17,23 +32,414 @@ class DataLoader:
     - Load WI grid data from Parquet/GeoJSON
     - Load grid geometries
     - Load distance calculations
-    - Cache loaded data in memory (LRU)
-    - List available areas
+    - Cache loaded data in memory (LRU, with pinned warm-up datasets)
+    - Serve datasets from memory-mapped columnar copies shared by workers
+    - Reload republished datasets in the background and swap them in
+    - List available areas and profiles from the dataset catalog
+
+    A resident dataset whose file version (mtime/size) changed keeps being
+    served while its replacement is read and indexed on a background
+    thread; the new ``GridDataset`` then replaces the old one in a single
+    dictionary assignment, so readers see either the old or the new
+    dataset, never a partially loaded one. Reload listeners are notified
+    with the old and new versions to purge derived caches.
+
+    With a ``columnar_dir``, each WI file version is converted once into an
+    uncompressed Arrow IPC file that every worker process memory-maps, so
+    the score columns live once in the OS page cache instead of once per
+    process, and geometry is only built for the cells being serialized.
     """
 
-    def __init__(self, data_dir: Path):
+    def __init__(
+        self,
+        data_dir: Path,
+        max_datasets: int = 5,
+        profiles: Iterable[str] = (),
+        check_interval: float = 2.0,
+        columnar_dir: Optional[Path] = None
+    ):
         """Initialize data loader.
 
         Args:
             data_dir: Directory containing processed data files
+            max_datasets: Maximum number of unpinned datasets kept in memory
+            profiles: Known profile names, used to split file names when
+                the data directory has no catalog manifest
+            check_interval: Minimum seconds between version checks of a
+                resident dataset on access
+            columnar_dir: Directory of the memory-mapped columnar copies of
+                the WI files (None: read Parquet into process memory)
         """
         self.data_dir = Path(data_dir)
+        self.max_datasets = max_datasets
         if not self.data_dir.exists():
             logger.warning(f"Data directory does not exist: {self.data_dir}")
 
+        self.catalog = DatasetCatalog(self.data_dir, profiles)
+        self.columnar_dir = Path(columnar_dir) if columnar_dir else None
+
+        self._datasets: "OrderedDict[Tuple[str, str], GridDataset]" = OrderedDict()
+        self._pinned: set = set()
+        self._lock = threading.Lock()
+        self._load_locks: Dict[Tuple[str, str], threading.Lock] = {}
+
+        self.check_interval = check_interval
+        self._checked: Dict[Tuple[str, str], float] = {}
+        self._reloading: set = set()
+        self._reloader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="wi-reload")
+        self._reload_listeners: List[Callable[[str, str, str, Optional[str]], None]] = []
+        self.reloads = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
         logger.info(f"DataLoader initialized with data_dir: {self.data_dir}")
 
-    @lru_cache(maxsize=5)
+    def wi_path(self, area: str, profile: str, format: str = "parquet") -> Path:
+        """Get path of the WI file for an area-profile combination."""
+        if format == "parquet":
+            entry = self.catalog.get(area, profile)
+            if entry is not None:
+                return self.data_dir / entry["files"]["wi"]["name"]
+            return self.data_dir / f"wi_{area}_{profile}.parquet"
+        return self.data_dir / f"wi_{area}_{profile}.geojson"
+
+    def has_dataset(self, area: str, profile: str) -> bool:
+        """Check whether a dataset is published (catalog lookup)."""
+        return (area, profile) in self.catalog
+
+    def published_bounds(self, area: str, profile: str) -> Optional[Tuple[float, float, float, float]]:
+        """WGS84 extent of a dataset from its catalog entry, without loading it.
+
+        Returns:
+            (min_lon, min_lat, max_lon, max_lat), or None if not recorded
+            (e.g. datasets found by directory scan)
+        """
+        entry = self.catalog.get(area, profile)
+        bounds = entry.get("bounds_wgs84") if entry is not None else None
+        return tuple(bounds) if bounds else None
+
+    def load_dataset(
+        self,
+        area: str,
+        profile: str,
+        pin: bool = False
+    ) -> GridDataset:
+        """Load a WI dataset, serving it from the in-memory cache when resident.
+
+        Concurrent callers asking for the same dataset share a single read.
+
+        Args:
+            area: Area name (e.g., "shinagawa")
+            profile: Profile name (e.g., "residential_family")
+            pin: Keep the dataset resident regardless of LRU eviction
+
+        Returns:
+            GridDataset
+
+        Raises:
+            FileNotFoundError: If data file not found
+        """
+        key = (area, profile)
+
+        with self._lock:
+            dataset = self._datasets.get(key)
+            if dataset is not None:
+                self._datasets.move_to_end(key)
+                self.hits += 1
+                if pin:
+                    self._pinned.add(key)
+            else:
+                load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        if dataset is not None:
+            self._check_version(key, dataset)
+            return dataset
+
+        with load_lock:
+            # Another caller may have finished loading while we waited
+            with self._lock:
+                dataset = self._datasets.get(key)
+            if dataset is None:
+                dataset = self._read_dataset(area, profile)
+                self.misses += 1
+
+            with self._lock:
+                self._datasets[key] = dataset
+                self._datasets.move_to_end(key)
+                if pin:
+                    self._pinned.add(key)
+                self._evict()
+                self._checked[key] = time.monotonic()
+
+        return dataset
+
+    def add_reload_listener(self, listener: Callable[[str, str, str, Optional[str]], None]):
+        """Register a callback run after a dataset was reloaded or unpublished.
+
+        Args:
+            listener: Called as ``listener(area, profile, old_version,
+                new_version)``; ``new_version`` is None if the dataset
+                was removed
+        """
+        self._reload_listeners.append(listener)
+
+    def current_version(self, area: str, profile: str) -> Optional[str]:
+        """Version of the published WI file (None if it does not exist)."""
+        try:
+            return file_version(self.wi_path(area, profile))
+        except FileNotFoundError:
+            return None
+
+    def _check_version(self, key: Tuple[str, str], dataset: GridDataset, force: bool = False):
+        """Schedule a background reload if the file changed (at most every check_interval)."""
+        now = time.monotonic()
+        last = self._checked.get(key)
+        if not force and last is not None and now - last < self.check_interval:
+            return
+        self._checked[key] = now
+
+        if self.current_version(*key) != dataset.version:
+            with self._lock:
+                if key in self._reloading:
+                    return
+                self._reloading.add(key)
+            self._reloader.submit(self._reload, key)
+
+    def _reload(self, key: Tuple[str, str]):
+        """Read a changed dataset and swap it in (runs on the reload thread)."""
+        area, profile = key
+        try:
+            with self._lock:
+                old = self._datasets.get(key)
+            if old is None:
+                return
+
+            self.catalog.refresh(force=True)
+            if self.current_version(area, profile) is None:
+                with self._lock:
+                    if self._datasets.get(key) is old:
+                        del self._datasets[key]
+                        self._pinned.discard(key)
+                logger.info(f"WI data unpublished, dropped from cache: {area}/{profile}")
+                self._notify_reload(area, profile, old.version, None)
+                return
+
+            dataset = self._read_dataset(area, profile)
+            if dataset.version == old.version:
+                return
+
+            with self._lock:
+                # Atomic swap: readers hold either the old or the new object
+                if self._datasets.get(key) is not old:
+                    return
+                self._datasets[key] = dataset
+                self.reloads += 1
+
+            logger.info(f"Reloaded WI data: {area}/{profile} ({old.version} -> {dataset.version})")
+            self._notify_reload(area, profile, old.version, dataset.version)
+
+        except Exception as e:
+            logger.error(f"Failed to reload WI data {area}/{profile}: {e}")
+        finally:
+            with self._lock:
+                self._reloading.discard(key)
+
+    def _notify_reload(self, area: str, profile: str, old_version: str, new_version: Optional[str]):
+        """Invalidate loader-level caches and run the reload listeners."""
+        self.load_grid_data.cache_clear()
+        self.load_distances_data.cache_clear()
+        for listener in self._reload_listeners:
+            try:
+                listener(area, profile, old_version, new_version)
+            except Exception as e:
+                logger.error(f"Reload listener failed for {area}/{profile}: {e}")
+
+    def check_for_updates(self):
+        """Check every resident dataset for a new version now."""
+        self.catalog.refresh(force=True)
+        with self._lock:
+            datasets = list(self._datasets.items())
+        for key, dataset in datasets:
+            self._check_version(key, dataset, force=True)
+
+    async def watch(self, interval: float):
+        """Check resident datasets for new versions every ``interval`` seconds."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await loop.run_in_executor(None, self.check_for_updates)
+            except Exception as e:
+                logger.error(f"Dataset update check failed: {e}")
+
+    def _read_dataset(self, area: str, profile: str) -> GridDataset:
+        """Read a WI parquet file from disk."""
+        file_path = self.wi_path(area, profile)
+
+        if not self.has_dataset(area, profile):
+            raise FileNotFoundError(
+                f"WI data not found: {file_path}. "
+                f"Please run Phase 2: python scripts/phase2_compute_wi.py "
+                f"--area {area} --profile {profile}"
+            )
+
+        logger.info(f"Loading WI data: {file_path}")
+
+        version = file_version(file_path)
+        start = time.perf_counter()
+        columnar = self._open_columnar(area, profile, file_path, version) if self.columnar_dir else None
+        if columnar is not None:
+            dataset = GridDataset(
+                area, profile, None, version, time.perf_counter() - start, columnar=columnar
+            )
+        else:
+            wi_data = gpd.read_parquet(file_path)
+            dataset = GridDataset(area, profile, wi_data, version, time.perf_counter() - start)
+
+        logger.info(
+            f"Loaded {len(dataset)} grid cells for {area}/{profile} "
+            f"in {dataset.load_seconds:.2f}s ({'memory-mapped' if columnar is not None else 'in memory'})"
+        )
+
+        dataset.build_index()
+
+        return dataset
+
+    def columnar_path(self, area: str, profile: str, version: str) -> Path:
+        """Path of the columnar copy of a WI file version."""
+        return self.columnar_dir / f"wi_{area}_{profile}.{version}{COLUMNAR_SUFFIX}"
+
+    def _open_columnar(
+        self,
+        area: str,
+        profile: str,
+        file_path: Path,
+        version: str
+    ) -> Optional[ColumnarGrid]:
+        """Map the columnar copy of a WI file, converting the file once if needed.
+
+        The first process to need a version converts it under an advisory
+        lock while the others wait, then all of them map the same file.
+        Copies of older versions are removed after a conversion; processes
+        still mapping one keep reading it until they swap datasets.
+
+        Returns:
+            ColumnarGrid, or None if the copy cannot be made (the caller
+            then reads the Parquet file into memory)
+        """
+        path = self.columnar_path(area, profile, version)
+        try:
+            if not path.exists():
+                self.columnar_dir.mkdir(parents=True, exist_ok=True)
+                with open(self.columnar_dir / f".wi_{area}_{profile}.lock", "w") as lock:
+                    if fcntl is not None:
+                        fcntl.flock(lock, fcntl.LOCK_EX)
+                    if not path.exists():
+                        logger.info(f"Converting {file_path.name} to columnar layout: {path}")
+                        write_columnar(gpd.read_parquet(file_path), path, version)
+                        for stale in self.columnar_dir.glob(f"wi_{area}_{profile}.*{COLUMNAR_SUFFIX}"):
+                            if stale != path:
+                                stale.unlink(missing_ok=True)
+
+            columnar = ColumnarGrid(path)
+            if columnar.version != version:
+                raise ValueError(f"version {columnar.version} does not match {version}")
+            return columnar
+
+        except (OSError, ValueError) as e:
+            logger.warning(f"No columnar copy of {area}/{profile}, reading Parquet: {e}")
+            return None
+
+    def _evict(self):
+        """Drop least recently used unpinned datasets beyond the cache limit.
+
+        Must be called with ``self._lock`` held.
+        """
+        unpinned = [key for key in self._datasets if key not in self._pinned]
+        while len(unpinned) > self.max_datasets:
+            key = unpinned.pop(0)
+            del self._datasets[key]
+            self.evictions += 1
+            logger.info(f"Evicted WI data from cache: {key[0]}/{key[1]}")
+
+    def preload(self, area: str, profile: str) -> GridDataset:
+        """Load a dataset and pin it in memory (startup warm-up).
+
+        Args:
+            area: Area name
+            profile: Profile name
+
+        Returns:
+            GridDataset
+        """
+        return self.load_dataset(area, profile, pin=True)
+
+    def refresh_dataset(self, area: str, profile: str) -> GridDataset:
+        """Bring a just-published dataset into the cache now.
+
+        A resident dataset is re-read and swapped in on the calling thread
+        (with the reload listeners run) instead of waiting for the next
+        version check; otherwise the dataset is loaded.
+
+        Args:
+            area: Area name
+            profile: Profile name
+
+        Returns:
+            GridDataset
+
+        Raises:
+            FileNotFoundError: If the dataset is not published
+        """
+        key = (area, profile)
+        self.catalog.refresh(force=True)
+        with self._lock:
+            reload = key in self._datasets and key not in self._reloading
+            if reload:
+                self._reloading.add(key)
+        if reload:
+            self._reload(key)
+        return self.load_dataset(area, profile)
+
+    def is_resident(self, area: str, profile: str) -> bool:
+        """Check whether a dataset is currently held in memory."""
+        with self._lock:
+            return (area, profile) in self._datasets
+
+    def resident_datasets(self) -> List[dict]:
+        """Describe datasets currently held in memory.
+
+        Returns:
+            List of dataset summaries (version, load time, memory footprint)
+        """
+        with self._lock:
+            datasets = list(self._datasets.items())
+
+        return [
+            {**dataset.describe(), "pinned": key in self._pinned}
+            for key, dataset in datasets
+        ]
+
+    def cache_stats(self) -> Dict[str, int]:
+        """Report dataset cache size and hit counters."""
+        with self._lock:
+            return {
+                "datasets": len(self._datasets),
+                "pinned": len(self._pinned),
+                "max_datasets": self.max_datasets,
+                "memory_bytes": sum(dataset.memory_bytes for dataset in self._datasets.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "reloads": self.reloads
+            }
+
+    def resident_dataset_objects(self) -> List[GridDataset]:
+        """Datasets currently held in memory."""
+        with self._lock:
+            return list(self._datasets.values())
+
     def load_wi_data(
         self,
         area: str,
@@ -54,9 +460,10 @@ class DataLoader:
             FileNotFoundError: If data file not found
         """
         if format == "parquet":
-            file_path = self.data_dir / f"wi_{area}_{profile}.parquet"
-        else:  # geojson
-            file_path = self.data_dir / f"wi_{area}_{profile}.geojson"
+            return self.load_dataset(area, profile).data
+
+        # GeoJSON is only used for ad-hoc inspection and is not cached
+        file_path = self.wi_path(area, profile, format="geojson")
 
         if not file_path.exists():
             raise FileNotFoundError(
@@ -66,12 +473,7 @@ class DataLoader:
             )
 
         logger.info(f"Loading WI data: {file_path}")
-
-        if format == "parquet":
-            wi_data = gpd.read_parquet(file_path)
-        else:
-            wi_data = gpd.read_file(file_path)
-
+        wi_data = gpd.read_file(file_path)
         logger.info(f"Loaded {len(wi_data)} grid cells for {area}/{profile}")
 
         return wi_data
@@ -137,7 +539,7 @@ class DataLoader:
         return distances_df
 
     def list_available_areas(self) -> list[str]:
-        """List all available areas by scanning data directory.
+        """List all available areas from the dataset catalog.
 
         Returns:
             List of area names
@@ -146,22 +548,26 @@ class DataLoader:
             >>> loader.list_available_areas()
             ["shinagawa", "shibuya", "meguro"]
         """
-        if not self.data_dir.exists():
-            return []
+        return self.catalog.areas()
 
-        # Pattern: wi_{area}_{profile}.parquet
-        pattern = re.compile(r"wi_(.+?)_(.+?)\.parquet")
+    def list_available_datasets(self) -> List[Tuple[str, str]]:
+        """List all (area, profile) combinations with WI data.
 
-        areas = set()
-        for file_path in self.data_dir.glob("wi_*.parquet"):
-            match = pattern.match(file_path.name)
-            if match:
-                area = match.group(1)
-                areas.add(area)
+        Returns:
+            Sorted list of (area, profile) tuples
+        """
+        return self.catalog.keys()
 
-        logger.info(f"Found {len(areas)} areas: {sorted(areas)}")
+    def list_areas_for_profile(self, profile: str) -> List[str]:
+        """List areas that have WI data for a profile.
 
-        return sorted(list(areas))
+        Args:
+            profile: Profile name
+
+        Returns:
+            Sorted list of area names
+        """
+        return self.catalog.areas_for_profile(profile)
 
     def list_available_profiles(self, area: Optional[str] = None) -> list[str]:
         """List available profiles for a given area.
@@ -172,53 +578,53 @@ class DataLoader:
         Returns:
             List of profile names
         """
-        if not self.data_dir.exists():
-            return []
+        return self.catalog.profiles_for_area(area)
 
-        if area:
-            pattern = re.compile(rf"wi_{re.escape(area)}_(.+?)\.parquet")
-        else:
-            pattern = re.compile(r"wi_.+?_(.+?)\.parquet")
-
-        profiles = set()
-        for file_path in self.data_dir.glob("wi_*.parquet"):
-            match = pattern.match(file_path.name)
-            if match:
-                profile = match.group(1)
-                profiles.add(profile)
-
-        return sorted(list(profiles))
+    def stats_path(self, area: str, profile: str) -> Path:
+        """Path of the statistics sidecar written by Phase 2."""
+        return self.data_dir / f"wi_{area}_{profile}.stats.json"
 
     def get_wi_statistics(
         self,
         area: str,
         profile: str
     ) -> dict:
-        """Calculate statistics for WI scores.
+        """Get whole-area statistics for WI scores.
+
+        Read from the Phase 2 sidecar (``wi_{area}_{profile}.stats.json``)
+        when its ``source_version`` matches the WI file, so the dataset does
+        not need to be loaded. Otherwise computed from the dataset's
+        summary tables.
 
         Args:
             area: Area name
             profile: Profile name
 
         Returns:
-            Dictionary with mean, min, max, std, median
+            Dictionary with mean, min, max, std, median, count, percentiles
         """
-        wi_data = self.load_wi_data(area, profile)
-
-        stats = {
-            "mean": float(wi_data["wi_score"].mean()),
-            "min": float(wi_data["wi_score"].min()),
-            "max": float(wi_data["wi_score"].max()),
-            "std": float(wi_data["wi_score"].std()),
-            "median": float(wi_data["wi_score"].median()),
-            "count": len(wi_data)
-        }
-
-        return stats
+        sidecar = self.stats_path(area, profile)
+        wi_path = self.wi_path(area, profile)
+        if sidecar.exists() and wi_path.exists():
+            try:
+                with open(sidecar, encoding="utf-8") as f:
+                    stats = json.load(f)
+                if stats.get("source_version") == file_version(wi_path):
+                    return stats["wi_score"]
+                logger.info(f"Statistics sidecar is stale: {sidecar}")
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Ignoring unreadable statistics sidecar {sidecar}: {e}")
+
+        dataset = self.load_dataset(area, profile)
+        if dataset.summary is not None:
+            return dataset.summary.window_statistics()
+        return compute_statistics(dataset.frame["wi_score"].to_numpy(dtype=float))
 
     def clear_cache(self):
         """Clear all cached data."""
-        self.load_wi_data.cache_clear()
+        with self._lock:
+            self._datasets.clear()
+            self._pinned.clear()
         self.load_grid_data.cache_clear()
         self.load_distances_data.cache_clear()
         logger.info("Data cache cleared")
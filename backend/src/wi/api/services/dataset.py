@@ -0,0 +1,444 @@
+"""WI dataset (in memory or memory-mapped) held by the DataLoader cache."""
+
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+import threading
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import shapely
+from pyproj import Transformer
+from scipy.spatial import cKDTree
+from shapely.geometry import box
+
+from ...config import get_config
+from ...grid.columnar import ColumnarGrid
+from ...grid.lattice import GridLattice
+from ...grid.summary import GridSummary
+
+_MISSING = object()
+
+
+class GridDataset:
+    """A loaded WI grid for one area-profile combination.
+
+    Wraps the GeoDataFrame together with the bookkeeping the API reports
+    about resident data (file version, load time, memory footprint) and
+    the structures derived from it (spatial index, reprojected frames).
+    Derived structures live on the dataset object, so they are dropped
+    together with it when the dataset is evicted or replaced.
+
+    A dataset backed by a memory-mapped columnar file holds no shapely
+    objects: ``frame`` views the mapped score columns, the lattice comes
+    from the stored cell indices, and geometries are built only for the
+    cells being serialized (``cell_geometries``). ``data`` still returns a
+    full GeoDataFrame, materialized on first use, for callers that need one.
+    """
+
+    def __init__(
+        self,
+        area: str,
+        profile: str,
+        data: Optional[gpd.GeoDataFrame],
+        version: str,
+        load_seconds: float,
+        columnar: Optional[ColumnarGrid] = None
+    ):
+        """Initialize dataset.
+
+        Args:
+            area: Area name
+            profile: Profile name
+            data: WI grid GeoDataFrame (None when ``columnar`` is given)
+            version: Version string of the source file
+            load_seconds: Time spent reading the source file
+            columnar: Memory-mapped columnar file of the grid
+        """
+        self.area = area
+        self.profile = profile
+        self.version = version
+        self.load_seconds = load_seconds
+        self.loaded_at = datetime.utcnow()
+        self.columnar = columnar
+
+        self._data = data
+        if columnar is not None:
+            self._frame = columnar.frame()
+            self.crs = columnar.crs
+            self.memory_bytes = columnar.nbytes
+        else:
+            self._frame = pd.DataFrame(data.drop(columns=data.geometry.name))
+            self.crs = data.crs
+            self.memory_bytes = self._estimate_memory(data)
+
+        self._derived: Dict[str, Any] = {}
+        self._derived_lock = threading.RLock()
+
+    def derived(self, name: str, builder: Callable[[], Any]) -> Any:
+        """Get a structure derived from this dataset, building it once.
+
+        Args:
+            name: Cache name of the derived structure
+            builder: Zero-argument callable that builds it
+
+        Returns:
+            The derived structure
+        """
+        value = self._derived.get(name, _MISSING)
+        if value is _MISSING:
+            with self._derived_lock:
+                value = self._derived.get(name, _MISSING)
+                if value is _MISSING:
+                    value = builder()
+                    self._derived[name] = value
+        return value
+
+    def drop_derived(self, predicate: Callable[[str], bool]) -> int:
+        """Drop derived structures whose names match a predicate.
+
+        Returns:
+            Number of structures dropped
+        """
+        with self._derived_lock:
+            names = [name for name in self._derived if predicate(name)]
+            for name in names:
+                del self._derived[name]
+        return len(names)
+
+    def __len__(self) -> int:
+        return len(self._frame)
+
+    @property
+    def data(self) -> gpd.GeoDataFrame:
+        """WI grid GeoDataFrame (built from the columnar file on first use)."""
+        if self._data is not None:
+            return self._data
+        return self.derived("data", self.columnar.to_geodataframe)
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """Attribute columns (grid_id, scores) in row order, without geometry."""
+        return self._frame
+
+    @property
+    def attribute_table(self) -> pa.Table:
+        """Attribute columns as an Arrow table (the mapped buffers for columnar datasets)."""
+        def build():
+            if self.columnar is not None:
+                return self.columnar.attributes()
+            table = pa.Table.from_pandas(self._frame, preserve_index=False)
+            return table.replace_schema_metadata(None)
+        return self.derived("attribute_table", build)
+
+    @property
+    def wgs84(self) -> gpd.GeoDataFrame:
+        """WI grid in EPSG:4326 (the stored frame when already in WGS84)."""
+        def build():
+            if self.crs and self.crs.to_epsg() != 4326:
+                return self.data.to_crs(epsg=4326)
+            return self.data
+        return self.derived("wgs84", build)
+
+    @property
+    def lattice(self) -> Optional[GridLattice]:
+        """Regular lattice (origin, cell size, cell index), None if irregular."""
+        if self.columnar is not None:
+            return self.derived("lattice", self.columnar.lattice)
+        return self.derived("lattice", lambda: GridLattice.from_grid(self.data))
+
+    @property
+    def sindex_wgs84(self):
+        """STRtree spatial index over the EPSG:4326 cell geometries."""
+        return self.derived("sindex_wgs84", lambda: self.wgs84.sindex)
+
+    @property
+    def sindex(self):
+        """STRtree spatial index over the cell geometries in the stored CRS."""
+        return self.derived("sindex", lambda: self.data.sindex)
+
+    @property
+    def summary(self) -> Optional[GridSummary]:
+        """Summed-area tables of wi_score on the lattice, None if irregular."""
+        def build():
+            if self.lattice is None or "wi_score" not in self.frame.columns:
+                return None
+            return GridSummary(self.lattice, self.frame["wi_score"].to_numpy(dtype=float))
+        return self.derived("summary", build)
+
+    def build_index(self):
+        """Build the structures used by bbox queries (at load time)."""
+        if self.lattice is None:
+            self.sindex
+        else:
+            self.bounds
+            self.summary
+
+    def query_bbox(
+        self,
+        min_lon: float,
+        min_lat: float,
+        max_lon: float,
+        max_lat: float
+    ) -> np.ndarray:
+        """Positions of the cells intersecting a WGS84 bounding box.
+
+        On a regular lattice the candidate cells are the row/column range
+        covering the bbox, found by arithmetic; otherwise they come from the
+        STRtree. Only candidates are tested against the bbox, so the cost is
+        proportional to the result size rather than the grid size.
+
+        Args:
+            min_lon, min_lat, max_lon, max_lat: Bounding box in EPSG:4326
+
+        Returns:
+            Sorted positions into ``data``
+        """
+        geographic = self.derived("geographic", self._is_geographic)
+        lattice = self.lattice
+        if lattice is None or not geographic:
+            bbox_geom = box(min_lon, min_lat, max_lon, max_lat)
+            if not geographic:
+                bbox_geom = self._transform_geometry(self.crs, bbox_geom)
+            if lattice is None:
+                return np.sort(self.sindex.query(bbox_geom, predicate="intersects"))
+
+        # Envelope of the bbox in the lattice CRS (edges densified for curvature)
+        minx, miny, maxx, maxy = self._transformer(lattice.crs).transform_bounds(
+            min_lon, min_lat, max_lon, max_lat, densify_pts=8
+        )
+        col0 = max(int(np.floor((minx - lattice.origin_x) / lattice.cell_size)) - 1, 0)
+        col1 = min(int(np.floor((maxx - lattice.origin_x) / lattice.cell_size)) + 2, lattice.n_cols)
+        row0 = max(int(np.floor((miny - lattice.origin_y) / lattice.cell_size)) - 1, 0)
+        row1 = min(int(np.floor((maxy - lattice.origin_y) / lattice.cell_size)) + 2, lattice.n_rows)
+        if col0 >= col1 or row0 >= row1:
+            return np.empty(0, dtype=np.int64)
+
+        candidates = lattice.cell_index[row0:row1, col0:col1].ravel()
+        candidates = np.sort(candidates[candidates >= 0]).astype(np.int64)
+        if not geographic:
+            return candidates[shapely.intersects(self.cell_geometries(candidates), bbox_geom)]
+
+        # Cells whose envelope lies inside the bbox intersect it and cells whose
+        # envelope is disjoint do not; only those straddling an edge are tested
+        bounds = self.bounds[candidates]
+        inside = (
+            (bounds[:, 0] >= min_lon) & (bounds[:, 2] <= max_lon)
+            & (bounds[:, 1] >= min_lat) & (bounds[:, 3] <= max_lat)
+        )
+        disjoint = (
+            (bounds[:, 2] < min_lon) | (bounds[:, 0] > max_lon)
+            | (bounds[:, 3] < min_lat) | (bounds[:, 1] > max_lat)
+        )
+        straddling = ~inside & ~disjoint
+        keep = inside
+        if straddling.any():
+            keep[straddling] = shapely.intersects(
+                self.cell_geometries(candidates[straddling]),
+                shapely.box(min_lon, min_lat, max_lon, max_lat)
+            )
+        return candidates[keep]
+
+    def locate(
+        self,
+        lons: np.ndarray,
+        lats: np.ndarray,
+        nearest: bool = True
+    ) -> np.ndarray:
+        """Positions of the grid cells nearest to WGS84 points.
+
+        Points inside a cell of a regular lattice resolve by arithmetic on the
+        lattice origin and cell size. Points outside the lattice, and all
+        points on irregular grids, go to a KD-tree of cell centroids. Nothing
+        is written to the cached data.
+
+        Args:
+            lons: Longitudes
+            lats: Latitudes
+            nearest: Snap points outside every cell to the nearest cell;
+                when False they get position -1
+
+        Returns:
+            Positions into ``data`` (one per point)
+        """
+        lons = np.atleast_1d(np.asarray(lons, dtype=float))
+        lats = np.atleast_1d(np.asarray(lats, dtype=float))
+        if len(self) == 0:
+            raise ValueError(f"No grid cells for {self.area}/{self.profile}")
+
+        lattice = self.lattice
+        crs = lattice.crs if lattice is not None else self._metric_crs
+        x, y = self._transformer(crs).transform(lons, lats)
+        x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+
+        if lattice is not None:
+            positions = lattice.locate(x, y)
+        else:
+            positions = np.full(len(lons), -1, dtype=np.int64)
+            if not nearest:
+                points = shapely.points(lons, lats)
+                if not self.derived("geographic", self._is_geographic):
+                    points = self._transform_geometry(self.crs, points)
+                point_index, cell_index = self.sindex.query(points, predicate="intersects")
+                positions[point_index] = cell_index
+
+        missing = positions < 0
+        if nearest and missing.any():
+            _, closest = self.centroid_tree.query(np.column_stack([x[missing], y[missing]]))
+            positions[missing] = closest
+
+        return positions
+
+    def align(self, other: "GridDataset", column: str = "wi_score") -> np.ndarray:
+        """Get another dataset's column in this dataset's row order.
+
+        Datasets of the same area share their cells, so this is usually a
+        plain copy; otherwise rows are joined on ``grid_id``. The result is
+        cached per other dataset version.
+
+        Args:
+            other: Dataset to align (typically another profile of this area)
+            column: Numeric column of ``other``
+
+        Returns:
+            float array with one value per row of ``self.frame`` (NaN where
+            ``other`` has no matching cell)
+        """
+        def build():
+            ids = self.frame["grid_id"].to_numpy()
+            other_ids = other.frame["grid_id"].to_numpy()
+            values = other.frame[column].to_numpy(dtype=float)
+            if len(ids) == len(other_ids) and np.array_equal(ids, other_ids):
+                return values
+
+            index = pd.Index(other_ids).get_indexer(ids)
+            aligned = np.full(len(ids), np.nan)
+            aligned[index >= 0] = values[index[index >= 0]]
+            return aligned
+
+        name = f"align:{other.area}:{other.profile}:{other.version}:{column}"
+        return self.derived(name, build)
+
+    @property
+    def centroids_wgs84(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Cell centroid longitudes and latitudes."""
+        def build():
+            centroids = shapely.centroid(self.cell_geometries(wgs84=True))
+            return shapely.get_x(centroids), shapely.get_y(centroids)
+        return self.derived("centroids_wgs84", build)
+
+    @property
+    def bounds_wgs84(self) -> tuple:
+        """Extent of the grid (min_lon, min_lat, max_lon, max_lat)."""
+        def build():
+            if self.derived("geographic", self._is_geographic):
+                bounds = self.bounds
+                return (
+                    float(bounds[:, 0].min()), float(bounds[:, 1].min()),
+                    float(bounds[:, 2].max()), float(bounds[:, 3].max())
+                )
+            return tuple(float(v) for v in shapely.total_bounds(self.cell_geometries(wgs84=True)))
+        return self.derived("bounds_wgs84", build)
+
+    def _is_geographic(self) -> bool:
+        """Whether the stored CRS is WGS84 (or unset)."""
+        return self.crs is None or self.crs.to_epsg() == 4326
+
+    @property
+    def _metric_crs(self) -> str:
+        """Projected CRS for distances (the grid CRS from settings)."""
+        return get_config().get_grid_config().get("crs", "EPSG:6677")
+
+    @property
+    def centroid_tree(self) -> cKDTree:
+        """KD-tree over the cell centroids in projected coordinates."""
+        def build():
+            if self.lattice is not None:
+                return cKDTree(self.lattice.centroids())
+            projected = self.data.geometry
+            if self.crs is not None:
+                projected = projected.to_crs(self._metric_crs)
+            centroids = shapely.centroid(np.asarray(projected.values))
+            return cKDTree(np.column_stack([shapely.get_x(centroids), shapely.get_y(centroids)]))
+        return self.derived("centroid_tree", build)
+
+    @property
+    def geometries(self) -> np.ndarray:
+        """Cell geometries in the stored CRS as a shapely object array."""
+        return self.derived("geometries", lambda: np.asarray(self.data.geometry.values))
+
+    def cell_geometries(self, positions: Optional[np.ndarray] = None, wgs84: bool = False) -> np.ndarray:
+        """Geometries of some cells, built on demand for columnar datasets.
+
+        Args:
+            positions: Cell positions (None: all cells)
+            wgs84: Return EPSG:4326 geometries instead of the stored CRS
+
+        Returns:
+            shapely object array, one geometry per position
+        """
+        if wgs84 and not self.derived("geographic", self._is_geographic):
+            if self.columnar is not None and "wgs84" not in self._derived:
+                # Reproject only the selected cells, never the whole grid
+                transformer = self.derived(
+                    "transformer_wgs84",
+                    lambda: Transformer.from_crs(self.crs, "EPSG:4326", always_xy=True)
+                )
+                return shapely.transform(
+                    self.cell_geometries(positions),
+                    lambda coords: np.column_stack(transformer.transform(coords[:, 0], coords[:, 1]))
+                )
+            geometries = np.asarray(self.wgs84.geometry.values)
+        elif self.columnar is not None and "geometries" not in self._derived:
+            return self.columnar.geometries(positions)
+        else:
+            geometries = self.geometries
+        return geometries if positions is None else geometries[positions]
+
+    @property
+    def bounds(self) -> np.ndarray:
+        """Cell envelopes (minx, miny, maxx, maxy) in the stored CRS."""
+        if self.columnar is not None:
+            return self.derived("bounds", self.columnar.bounds)
+        return self.derived("bounds", lambda: shapely.bounds(self.geometries))
+
+    def _transformer(self, crs) -> Transformer:
+        """Cached WGS84 -> ``crs`` transformer."""
+        return self.derived(
+            f"transformer_{crs}",
+            lambda: Transformer.from_crs("EPSG:4326", crs, always_xy=True)
+        )
+
+    def _transform_geometry(self, crs, geometry):
+        """Transform a WGS84 geometry to ``crs``."""
+        transformer = self._transformer(crs)
+        return shapely.transform(
+            geometry,
+            lambda coords: np.column_stack(transformer.transform(coords[:, 0], coords[:, 1]))
+        )
+
+    @staticmethod
+    def _estimate_memory(data: gpd.GeoDataFrame) -> int:
+        """Estimate the resident size of a GeoDataFrame in bytes.
+
+        ``memory_usage(deep=True)`` only counts the geometry pointers, so
+        coordinate storage (2 x float64 per vertex) is added on top.
+        """
+        total = int(data.memory_usage(deep=True).sum())
+        if "geometry" in data and len(data) > 0:
+            total += int(shapely.get_num_coordinates(data.geometry.values).sum()) * 16
+        return total
+
+    def describe(self) -> Dict[str, Any]:
+        """Summarize the dataset for status endpoints."""
+        return {
+            "area": self.area,
+            "profile": self.profile,
+            "version": self.version,
+            "cells": len(self),
+            "load_seconds": round(self.load_seconds, 3),
+            "memory_bytes": self.memory_bytes,
+            "storage": "mmap" if self.columnar is not None else "memory",
+            "loaded_at": self.loaded_at.isoformat()
+        }
@@ -0,0 +1,277 @@
+"""Bounded execution of blocking service calls off the event loop."""
+
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+import asyncio
+import math
+import multiprocessing
+import threading
+import time
+
+from fastapi import HTTPException
+from loguru import logger
+
+POOLS = ("io", "cpu", "process")
+
+
+class Saturated(HTTPException):
+    """Request rejected because an endpoint group is at capacity.
+
+    429 when the group's queue is full, 503 when a queued call waited
+    longer than the group's timeout. Both carry ``Retry-After``. Being an
+    ``HTTPException``, it passes through the routers' ``except
+    HTTPException: raise`` clauses unchanged.
+    """
+
+    def __init__(self, status_code: int, detail: str, retry_after: float):
+        super().__init__(
+            status_code=status_code,
+            detail=detail,
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+
+
+class EndpointLimit:
+    """Admission control for one endpoint group.
+
+    At most ``concurrency`` calls run at a time and up to ``queue`` more
+    wait for a slot, each for at most ``timeout`` seconds. The slot is
+    released when the call finishes in its pool, not when the request
+    goes away, so a client that disconnects cannot push the group over
+    its limit.
+    """
+
+    def __init__(self, name: str, concurrency: int, queue: int, timeout: float):
+        """Initialize limit.
+
+        Args:
+            name: Endpoint group name
+            concurrency: Calls running at the same time
+            queue: Calls waiting for a slot before new ones get 429
+            timeout: Seconds a call may wait before it gets 503
+        """
+        self.name = name
+        self.concurrency = concurrency
+        self.queue = queue
+        self.timeout = timeout
+
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        # Moving average of call durations, for Retry-After
+        self.mean_seconds = 0.0
+
+    def retry_after(self) -> float:
+        """Estimated seconds until a new call would get a slot."""
+        return self.mean_seconds * (self.waiting + 1) / self.concurrency
+
+    async def acquire(self) -> None:
+        """Wait for a slot.
+
+        Raises:
+            Saturated: 429 if the queue is full, 503 if the wait timed out
+        """
+        if self._semaphore.locked() and self.waiting >= self.queue:
+            self.rejected += 1
+            raise Saturated(
+                429, f"Too many concurrent {self.name} requests, retry later", self.retry_after()
+            )
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise Saturated(
+                503, f"{self.name} requests are queued for longer than {self.timeout:g}s",
+                self.retry_after()
+            )
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        self.admitted += 1
+
+    def release(self, seconds: float) -> None:
+        """Free a slot after a call that ran for ``seconds``."""
+        self.active -= 1
+        self.mean_seconds += 0.1 * (seconds - self.mean_seconds)
+        self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Limits and counters of the group."""
+        return {
+            "concurrency": self.concurrency,
+            "queue": self.queue,
+            "timeout_seconds": self.timeout,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "mean_seconds": round(self.mean_seconds, 4)
+        }
+
+
+class RequestExecutor:
+    """Runs blocking service calls on bounded pools, per endpoint group.
+
+    Routers are ``async def``; calling pandas/geopandas code from them
+    directly blocks the event loop, and with it every other request of the
+    worker, ``/health`` included. Calls go through :meth:`run` instead:
+
+    - ``io`` threads for calls dominated by file reads and cache lookups
+      (dataset loads, point lookups, statistics), so they do not queue
+      behind encodes;
+    - ``cpu`` threads for encoding and geometry work (numpy, shapely and
+      pyarrow release the GIL for most of it);
+    - ``process`` workers for self-contained, GIL-bound work such as
+      parsing large request bodies. Service calls stay on threads because
+      they need the per-process dataset caches.
+
+    Each endpoint group has an :class:`EndpointLimit`; groups without
+    their own configuration share ``default``. Endpoints that are not
+    routed through the executor (health, listings) never wait on it.
+    """
+
+    def __init__(
+        self,
+        io_threads: int = 8,
+        cpu_threads: Optional[int] = None,
+        process_workers: int = 2,
+        limits: Optional[Dict[str, Dict[str, Any]]] = None
+    ):
+        """Initialize executor.
+
+        Args:
+            io_threads: Threads of the ``io`` pool
+            cpu_threads: Threads of the ``cpu`` pool (default: CPU count)
+            process_workers: Processes of the ``process`` pool (created on first use)
+            limits: Endpoint group -> ``{"concurrency", "queue", "timeout_seconds"}``
+        """
+        cpu_threads = cpu_threads or multiprocessing.cpu_count()
+        self.sizes = {"io": io_threads, "cpu": cpu_threads, "process": process_workers}
+        self._pools: Dict[str, Executor] = {
+            "io": ThreadPoolExecutor(max_workers=io_threads, thread_name_prefix="wi-io"),
+            "cpu": ThreadPoolExecutor(max_workers=cpu_threads, thread_name_prefix="wi-cpu"),
+        }
+        self._pool_lock = threading.Lock()
+
+        # Calls submitted to a pool and not finished / started
+        self.pending = {pool: 0 for pool in POOLS}
+        self.running = {pool: 0 for pool in POOLS}
+        self._count_lock = threading.Lock()
+
+        limits = dict(limits or {})
+        limits.setdefault("default", {})
+        self.limits = {
+            name: EndpointLimit(
+                name,
+                concurrency=config.get("concurrency", 8),
+                queue=config.get("queue", 32),
+                timeout=config.get("timeout_seconds", 10.0)
+            )
+            for name, config in limits.items()
+        }
+
+    def pool(self, name: str) -> Executor:
+        """Get a pool by name (the process pool is started on first use)."""
+        if name == "process" and "process" not in self._pools:
+            with self._pool_lock:
+                if "process" not in self._pools:
+                    # spawn: forking a process that runs thread pools is unsafe
+                    self._pools["process"] = ProcessPoolExecutor(
+                        max_workers=self.sizes["process"],
+                        mp_context=multiprocessing.get_context("spawn")
+                    )
+        return self._pools[name]
+
+    def limit(self, group: str) -> EndpointLimit:
+        """Admission limit of an endpoint group."""
+        return self.limits.get(group) or self.limits["default"]
+
+    async def run(self, group: str, pool: str, fn: Callable, *args, **kwargs) -> Any:
+        """Run a blocking call on a pool under an endpoint group's limit.
+
+        Args:
+            group: Endpoint group (key of ``limits``)
+            pool: "io", "cpu" or "process" (``fn`` and its arguments must
+                be picklable for "process")
+            fn: Callable to run
+            *args, **kwargs: Arguments of ``fn``
+
+        Returns:
+            Return value of ``fn`` (its exceptions propagate)
+
+        Raises:
+            Saturated: If the group is at capacity
+        """
+        limit = self.limit(group)
+        await limit.acquire()
+
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        with self._count_lock:
+            self.pending[pool] += 1
+        try:
+            call = partial(fn, *args, **kwargs)
+            if pool == "process":
+                future = self.pool(pool).submit(call)
+            else:
+                future = self.pool(pool).submit(self._track, pool, call)
+        except BaseException:
+            with self._count_lock:
+                self.pending[pool] -= 1
+            limit.release(time.perf_counter() - start)
+            raise
+
+        def done(_: Future):
+            with self._count_lock:
+                self.pending[pool] -= 1
+            try:
+                loop.call_soon_threadsafe(limit.release, time.perf_counter() - start)
+            except RuntimeError:
+                pass  # event loop already closed (shutdown)
+
+        future.add_done_callback(done)
+        return await asyncio.wrap_future(future)
+
+    def _track(self, pool: str, call: Callable) -> Any:
+        """Run a call on a pool thread, counting it as running."""
+        with self._count_lock:
+            self.running[pool] += 1
+        try:
+            return call()
+        finally:
+            with self._count_lock:
+                self.running[pool] -= 1
+
+    def queue_depth(self, pool: str) -> int:
+        """Calls submitted to a pool that have not started yet."""
+        if pool == "process":
+            return max(0, self.pending[pool] - self.sizes[pool])
+        return self.pending[pool] - self.running[pool]
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool occupancy, queue depths and per-group counters."""
+        return {
+            "pools": {
+                pool: {
+                    "workers": self.sizes[pool],
+                    "pending": self.pending[pool],
+                    "queued": self.queue_depth(pool)
+                }
+                for pool in POOLS
+            },
+            "limits": {name: limit.stats() for name, limit in self.limits.items()}
+        }
+
+    def shutdown(self) -> None:
+        """Stop the pools without waiting for running calls."""
+        for pool in self._pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        logger.info("Request executor shut down")
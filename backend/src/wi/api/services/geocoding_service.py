@@ -1,41 +1,156 @@
 """
 Geocoding Service using Nominatim OSM API
-Provides address search functionality with rate limiting
+Provides address search functionality with rate limiting and caching
 """
 
 import asyncio
-from typing import List, Dict, Optional
-from datetime import datetime
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import diskcache
 import httpx
 from loguru import logger
 
+from ...geocoding import Gazetteer
+from .metrics import GEOCODING_RATE_LIMIT_SECONDS, GEOCODING_UPSTREAM_SECONDS
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a search query for cache keys.
+
+    NFKC folds full-width/half-width variants (e.g. ``１２３`` and ``123``,
+    ``ｼﾅｶﾞﾜ`` and ``シナガワ``), whitespace runs collapse to one space and
+    Latin text is case-folded.
+    """
+    return " ".join(unicodedata.normalize("NFKC", query).casefold().split())
+
+
+class TokenBucket:
+    """Async token bucket shared by all callers.
+
+    Waiters queue on an ``asyncio.Lock`` (FIFO), so concurrent requests are
+    released one by one at ``rate`` per second, with at most ``capacity``
+    requests in a burst.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        """Initialize token bucket.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum number of stored tokens
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it."""
+        async with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+            if self._tokens < 1.0:
+                await asyncio.sleep((1.0 - self._tokens) / self.rate)
+                self._tokens = 1.0
+                self._updated = time.monotonic()
+
+            self._tokens -= 1.0
+
 
 class GeocodingService:
     """
     Geocoding service using Nominatim OpenStreetMap API
     Rate limit: 1 request per second per policy
+
+    One instance is shared by the application. Upstream requests go through
+    a persistent connection pool and a token bucket; identical queries that
+    are in flight at the same time share one upstream request, and results
+    are kept in a bounded in-memory TTL cache backed by ``diskcache``, so
+    repeated searches do not spend the upstream budget.
+
+    When an offline gazetteer is available, it is consulted first: searches
+    it can answer (places inside the covered areas) never go upstream.
     """
 
     BASE_URL = "https://nominatim.openstreetmap.org/search"
     USER_AGENT = "WalkabilityIndexApp/1.0 (https://github.com/yourorg/wi-app)"
 
-    # Rate limiting: Track last request time
-    _last_request_time: Optional[float] = None
-    _min_request_interval = 1.0  # seconds
+    def __init__(
+        self,
+        base_url: str = BASE_URL,
+        user_agent: str = USER_AGENT,
+        requests_per_second: float = 1.0,
+        timeout: float = 10.0,
+        cache_ttl: float = 86400.0,
+        max_cached_queries: int = 1024,
+        cache_dir: Optional[Path] = None,
+        cache_size_mb: float = 64,
+        gazetteer: Optional[Gazetteer] = None
+    ):
+        """
+        Initialize geocoding service
+
+        Args:
+            base_url: Nominatim search endpoint (a local stub in tests)
+            user_agent: User-Agent sent upstream (required by Nominatim)
+            requests_per_second: Upstream rate limit across all callers
+            timeout: Upstream request timeout in seconds
+            cache_ttl: Lifetime of cached results in seconds
+            max_cached_queries: Size of the in-memory result cache
+            cache_dir: Directory of the persistent result cache (None: memory only)
+            cache_size_mb: Size limit of the persistent result cache
+            gazetteer: Offline gazetteer searched before Nominatim
+        """
+        self.base_url = base_url
+        self.user_agent = user_agent
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self.max_cached_queries = max_cached_queries
+        self.gazetteer = gazetteer
+
+        self._bucket = TokenBucket(requests_per_second)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._in_flight: Dict[Tuple, asyncio.Task] = {}
+        self._memory: "OrderedDict[Tuple, Tuple[float, List[Dict]]]" = OrderedDict()
+
+        self.disk_cache = None
+        if cache_dir is not None:
+            self.disk_cache = diskcache.Cache(
+                str(cache_dir),
+                size_limit=int(cache_size_mb * 1024 * 1024),
+                eviction_policy="least-recently-used"
+            )
+
+        self.stats = {"gazetteer_hits": 0, "memory_hits": 0, "disk_hits": 0, "coalesced": 0, "upstream": 0}
 
-    @classmethod
-    async def _rate_limit(cls):
-        """Enforce rate limiting of 1 request per second"""
-        if cls._last_request_time is not None:
-            elapsed = asyncio.get_event_loop().time() - cls._last_request_time
-            if elapsed < cls._min_request_interval:
-                await asyncio.sleep(cls._min_request_interval - elapsed)
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Persistent HTTP client (created on first use)."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                headers={"User-Agent": self.user_agent},
+                limits=httpx.Limits(max_connections=4, max_keepalive_connections=2)
+            )
+        return self._client
 
-        cls._last_request_time = asyncio.get_event_loop().time()
+    async def close(self) -> None:
+        """Close the HTTP client and the persistent cache."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self.disk_cache is not None:
+            self.disk_cache.close()
 
-    @classmethod
     async def search_address(
-        cls,
+        self,
         query: str,
         limit: int = 5,
         country_codes: str = "jp"
@@ -54,8 +169,48 @@ class GeocodingService:
         Raises:
             httpx.HTTPError: If API request fails
         """
-        # Enforce rate limiting
-        await cls._rate_limit()
+        if self.gazetteer is not None:
+            results = self.gazetteer.search(query, limit)
+            if results:
+                self.stats["gazetteer_hits"] += 1
+                return results
+
+        key = (normalize_query(query), limit, country_codes)
+
+        results = self._cache_get(key)
+        if results is not None:
+            return results
+
+        # Single flight: identical queries share one upstream request. The
+        # request runs as its own task so a caller that disconnects does
+        # not cancel it for the others.
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch_and_cache(key))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        else:
+            self.stats["coalesced"] += 1
+
+        return await asyncio.shield(task)
+
+    async def _fetch_and_cache(self, key: Tuple) -> List[Dict]:
+        """Fetch a query upstream and cache the results."""
+        results = await self._fetch(key)
+        self._cache_set(key, results)
+        return results
+
+    def _finish(self, key: Tuple, task: asyncio.Task) -> None:
+        """Forget a completed in-flight request."""
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the exception as retrieved even if every caller went away
+        if not task.cancelled():
+            task.exception()
+
+    async def _fetch(self, key: Tuple) -> List[Dict]:
+        """Query Nominatim (rate limited) and format the results."""
+        query, limit, country_codes = key
 
         params = {
             "q": query,
@@ -65,40 +220,42 @@ class GeocodingService:
             "addressdetails": 1,
         }
 
-        headers = {
-            "User-Agent": cls.USER_AGENT,
-        }
+        waited = time.perf_counter()
+        await self._bucket.acquire()
+        GEOCODING_RATE_LIMIT_SECONDS.observe(time.perf_counter() - waited)
+        self.stats["upstream"] += 1
 
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                logger.info(f"Geocoding search: query='{query}', limit={limit}")
-
-                response = await client.get(
-                    cls.BASE_URL,
-                    params=params,
-                    headers=headers
-                )
-                response.raise_for_status()
-
-                results = response.json()
-
-                logger.info(f"Geocoding returned {len(results)} results")
-
-                # Transform results to our format
-                formatted_results = [
-                    {
-                        "place_id": result.get("place_id"),
-                        "display_name": result.get("display_name"),
-                        "lat": float(result.get("lat")),
-                        "lon": float(result.get("lon")),
-                        "type": result.get("type"),
-                        "importance": result.get("importance"),
-                        "address": result.get("address", {}),
-                    }
-                    for result in results
-                ]
-
-                return formatted_results
+            logger.info(f"Geocoding search: query='{query}', limit={limit}")
+
+            start = time.perf_counter()
+            try:
+                response = await self.client.get(self.base_url, params=params)
+            except httpx.HTTPError:
+                GEOCODING_UPSTREAM_SECONDS.observe(time.perf_counter() - start, "error")
+                raise
+            GEOCODING_UPSTREAM_SECONDS.observe(
+                time.perf_counter() - start, "ok" if response.is_success else str(response.status_code)
+            )
+            response.raise_for_status()
+
+            results = response.json()
+
+            logger.info(f"Geocoding returned {len(results)} results")
+
+            # Transform results to our format
+            return [
+                {
+                    "place_id": result.get("place_id"),
+                    "display_name": result.get("display_name"),
+                    "lat": float(result.get("lat")),
+                    "lon": float(result.get("lon")),
+                    "type": result.get("type"),
+                    "importance": result.get("importance"),
+                    "address": result.get("address", {}),
+                }
+                for result in results
+            ]
 
         except httpx.HTTPError as e:
             logger.error(f"Geocoding API error: {e}")
@@ -106,3 +263,51 @@ class GeocodingService:
         except Exception as e:
             logger.error(f"Unexpected error in geocoding: {e}")
             raise
+
+    def _cache_get(self, key: Tuple) -> Optional[List[Dict]]:
+        """Look up a query in the memory cache, then the persistent cache."""
+        entry = self._memory.get(key)
+        if entry is not None:
+            expires, results = entry
+            if expires > time.monotonic():
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return results
+            del self._memory[key]
+
+        if self.disk_cache is not None:
+            entry = self.disk_cache.get(self._disk_key(key), expire_time=True)
+            results, expire_time = entry if entry is not None else (None, None)
+            if results is not None:
+                self.stats["disk_hits"] += 1
+                remaining = self.cache_ttl if expire_time is None else expire_time - time.time()
+                self._remember(key, results, remaining)
+                return results
+
+        return None
+
+    def _cache_set(self, key: Tuple, results: List[Dict]) -> None:
+        """Store results in both caches."""
+        self._remember(key, results, self.cache_ttl)
+        if self.disk_cache is not None:
+            self.disk_cache.set(self._disk_key(key), results, expire=self.cache_ttl)
+
+    def _remember(self, key: Tuple, results: List[Dict], ttl: float) -> None:
+        """Insert into the memory cache, evicting the least recently used."""
+        self._memory[key] = (time.monotonic() + ttl, results)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_cached_queries:
+            self._memory.popitem(last=False)
+
+    @staticmethod
+    def _disk_key(key: Tuple) -> str:
+        query, limit, country_codes = key
+        return f"nominatim:{country_codes}:{limit}:{query}"
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache and upstream counters."""
+        return {
+            **self.stats,
+            "memory_entries": len(self._memory),
+            "gazetteer_entries": len(self.gazetteer) if self.gazetteer is not None else 0
+        }
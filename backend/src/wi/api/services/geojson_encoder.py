@@ -0,0 +1,98 @@
+"""Direct GeoJSON encoding of GeoDataFrames to bytes.
+
+``GeoDataFrame.to_json()`` builds a Python dict per feature and runs it
+through ``json.dumps``; callers then used to ``json.loads`` the result only
+for FastAPI to serialize it again. This encoder produces the same
+FeatureCollection structure in one pass: geometries are serialized in C by
+``shapely.to_geojson`` and properties by pandas' native JSON writer.
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Sequence
+
+import geopandas as gpd
+import shapely
+
+
+def encode_features(
+    gdf: gpd.GeoDataFrame,
+    columns: Optional[List[str]] = None,
+    geometries: Optional[Sequence[str]] = None
+) -> bytes:
+    """Encode GeoDataFrame rows as comma-separated GeoJSON Feature objects.
+
+    Args:
+        gdf: GeoDataFrame to encode (expected in EPSG:4326)
+        columns: Property columns to include (default: all non-geometry)
+        geometries: Pre-encoded GeoJSON geometry strings, one per row
+            (default: encode ``gdf.geometry``)
+
+    Returns:
+        UTF-8 bytes of the features, without the surrounding array brackets
+    """
+    return ",".join(encode_feature_list(gdf, columns, geometries)).encode("utf-8")
+
+
+def encode_feature_list(
+    gdf: gpd.GeoDataFrame,
+    columns: Optional[List[str]] = None,
+    geometries: Optional[Sequence[str]] = None
+) -> List[str]:
+    """Encode GeoDataFrame rows as one GeoJSON Feature string per row.
+
+    Args:
+        gdf: GeoDataFrame to encode (expected in EPSG:4326); a plain
+            DataFrame works when ``columns`` and ``geometries`` are given
+        columns: Property columns to include (default: all non-geometry)
+        geometries: Pre-encoded GeoJSON geometry strings, one per row
+            (default: encode ``gdf.geometry``)
+
+    Returns:
+        Feature strings in row order
+    """
+    if len(gdf) == 0:
+        return []
+
+    if columns is None:
+        geometry_name = gdf.geometry.name
+        columns = [c for c in gdf.columns if c != geometry_name]
+
+    if geometries is None:
+        geometries = shapely.to_geojson(gdf.geometry.values)
+
+    if columns:
+        properties = (
+            gdf[columns]
+            .to_json(orient="records", lines=True, force_ascii=False)
+            .rstrip("\n")
+            .split("\n")
+        )
+    else:
+        properties = ["{}"] * len(gdf)
+
+    ids = gdf.index.astype(str)
+
+    return [
+        '{"id":"%s","type":"Feature","properties":%s,"geometry":%s}'
+        % (feature_id, props, geometry if geometry is not None else "null")
+        for feature_id, props, geometry in zip(ids, properties, geometries)
+    ]
+
+
+def feature_collection(features: bytes, metadata: Dict[str, Any]) -> bytes:
+    """Wrap pre-encoded features into a FeatureCollection with metadata.
+
+    Args:
+        features: Output of :func:`encode_features`
+        metadata: Metadata dict spliced in as the ``metadata`` member
+
+    Returns:
+        UTF-8 bytes of the complete FeatureCollection
+    """
+    return b"".join([
+        b'{"type":"FeatureCollection","features":[',
+        features,
+        b'],"metadata":',
+        json.dumps(metadata, ensure_ascii=False).encode("utf-8"),
+        b"}"
+    ])
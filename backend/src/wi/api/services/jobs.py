@@ -0,0 +1,619 @@
+"""Background jobs for long-running computations.
+
+Custom-profile runs, rescoring of a dataset from its stored distances and
+full Phase 2 pipelines run in local worker processes, never inside a
+request. Jobs are tracked in a SQLite store shared by all API worker
+processes, so their status survives restarts and any worker can report
+on any job.
+"""
+
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing
+
+from loguru import logger
+
+from ...catalog import file_version, publish_path
+from ...config import get_config
+from ...pipeline import compute_wi, input_files, rescore_wi
+from .data_loader import DataLoader
+
+JOB_KINDS = ("custom", "rescore", "phase2")
+
+ACTIVE = ("queued", "running")
+FINISHED = ("succeeded", "failed", "cancelled")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT,
+    result TEXT,
+    error TEXT,
+    owner TEXT,
+    heartbeat REAL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_key ON jobs (key, status);
+CREATE INDEX IF NOT EXISTS jobs_created ON jobs (created_at);
+"""
+
+
+def _timestamp(value: Optional[float]) -> Optional[str]:
+    """ISO 8601 (UTC) form of an epoch timestamp."""
+    if value is None:
+        return None
+    return datetime.fromtimestamp(value, timezone.utc).isoformat(timespec="seconds")
+
+
+class JobStore:
+    """Persistent job records in SQLite (WAL mode).
+
+    Every call opens its own short-lived connection, so the store can be
+    used from the event loop's pool threads, the process pool's callback
+    thread and the worker processes alike. Writes that must not race
+    between API workers (deduplication, claiming orphaned jobs) run in
+    ``BEGIN IMMEDIATE`` transactions.
+    """
+
+    def __init__(self, path: Path):
+        """Initialize store, creating the database if needed.
+
+        Args:
+            path: SQLite database file
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @staticmethod
+    def _job(row: sqlite3.Row) -> Dict[str, Any]:
+        """API representation of a job row."""
+        return {
+            "id": row["id"],
+            "kind": row["kind"],
+            "status": row["status"],
+            "progress": round(row["progress"], 4),
+            "message": row["message"],
+            "params": json.loads(row["params"]),
+            "result": json.loads(row["result"]) if row["result"] is not None else None,
+            "error": row["error"],
+            "created_at": _timestamp(row["created_at"]),
+            "started_at": _timestamp(row["started_at"]),
+            "finished_at": _timestamp(row["finished_at"]),
+        }
+
+    def submit(
+        self,
+        kind: str,
+        key: str,
+        params: Dict[str, Any],
+        owner: str
+    ) -> Tuple[Dict[str, Any], bool]:
+        """Queue a job unless an identical one is queued, running or succeeded.
+
+        Args:
+            kind: Job kind
+            key: Deduplication key (kind, parameters and input versions)
+            params: Job parameters
+            owner: Job manager that will run the job
+
+        Returns:
+            (job, created): the new job, or the existing identical job
+        """
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT * FROM jobs WHERE key = ? AND status IN ('queued', 'running', 'succeeded') "
+                    "ORDER BY created_at DESC LIMIT 1",
+                    (key,)
+                ).fetchone()
+                if row is None:
+                    job_id = uuid.uuid4().hex
+                    conn.execute(
+                        "INSERT INTO jobs (id, kind, key, params, status, owner, heartbeat, created_at) "
+                        "VALUES (?, ?, ?, ?, 'queued', ?, ?, ?)",
+                        (job_id, kind, key, json.dumps(params, ensure_ascii=False), owner, now, now)
+                    )
+                    row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                    created = True
+                else:
+                    created = False
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return self._job(row), created
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job (None if unknown)."""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._job(row) if row is not None else None
+
+    def list(self, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Most recent jobs first, optionally of one status."""
+        query, args = "SELECT * FROM jobs", []
+        if status is not None:
+            query += " WHERE status = ?"
+            args.append(status)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        args.append(limit)
+        with closing(self._connect()) as conn:
+            rows = conn.execute(query, args).fetchall()
+        return [self._job(row) for row in rows]
+
+    def _update(self, sql: str, args: tuple) -> bool:
+        with closing(self._connect()) as conn:
+            return conn.execute(sql, args).rowcount > 0
+
+    def start(self, job_id: str) -> bool:
+        """Mark a queued job as running (False if it was cancelled meanwhile)."""
+        now = time.time()
+        return self._update(
+            "UPDATE jobs SET status = 'running', started_at = ?, heartbeat = ? "
+            "WHERE id = ? AND status = 'queued'",
+            (now, now, job_id)
+        )
+
+    def progress(self, job_id: str, fraction: float, message: str) -> None:
+        """Record the progress of a running job."""
+        self._update(
+            "UPDATE jobs SET progress = ?, message = ?, heartbeat = ? WHERE id = ? AND status = 'running'",
+            (min(max(fraction, 0.0), 1.0), message, time.time(), job_id)
+        )
+
+    def finish(self, job_id: str, result: Dict[str, Any]) -> bool:
+        """Mark a running job as succeeded with its result summary."""
+        return self._update(
+            "UPDATE jobs SET status = 'succeeded', progress = 1, message = 'Done', result = ?, "
+            "finished_at = ? WHERE id = ? AND status = 'running'",
+            (json.dumps(result, ensure_ascii=False), time.time(), job_id)
+        )
+
+    def fail(self, job_id: str, error: str) -> bool:
+        """Mark a queued or running job as failed."""
+        return self._update(
+            "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? "
+            "WHERE id = ? AND status IN ('queued', 'running')",
+            (error, time.time(), job_id)
+        )
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a job that has not started (False if it is running or finished)."""
+        return self._update(
+            "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+            (time.time(), job_id)
+        )
+
+    def heartbeat(self, owner: str) -> None:
+        """Refresh the heartbeat of the active jobs of a job manager."""
+        self._update(
+            "UPDATE jobs SET heartbeat = ? WHERE owner = ? AND status IN ('queued', 'running')",
+            (time.time(), owner)
+        )
+
+    def claim_orphans(self, owner: str, stale_before: float) -> List[Dict[str, Any]]:
+        """Take over the jobs of job managers that stopped heart-beating.
+
+        Orphaned running jobs are failed (their worker process is gone);
+        orphaned queued jobs are reassigned to ``owner``.
+
+        Args:
+            owner: Job manager taking over
+            stale_before: Heartbeats older than this epoch time are stale
+
+        Returns:
+            The queued jobs now owned by ``owner``
+        """
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = 'Interrupted: the API process running it stopped', "
+                    "finished_at = ? WHERE status = 'running' AND heartbeat < ?",
+                    (now, stale_before)
+                )
+                rows = conn.execute(
+                    "SELECT * FROM jobs WHERE status = 'queued' AND heartbeat < ? ORDER BY created_at",
+                    (stale_before,)
+                ).fetchall()
+                conn.executemany(
+                    "UPDATE jobs SET owner = ?, heartbeat = ? WHERE id = ?",
+                    [(owner, now, row["id"]) for row in rows]
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return [self._job(row) for row in rows]
+
+    def prune(self, finished_before: float) -> List[str]:
+        """Delete finished jobs older than an epoch time; returns their ids."""
+        with closing(self._connect()) as conn:
+            ids = [row["id"] for row in conn.execute(
+                "SELECT id FROM jobs WHERE status IN ('succeeded', 'failed', 'cancelled') AND finished_at < ?",
+                (finished_before,)
+            )]
+            conn.executemany("DELETE FROM jobs WHERE id = ?", [(job_id,) for job_id in ids])
+        return ids
+
+
+# Services of a worker process, kept across the jobs it runs
+_worker_services: Dict[str, Any] = {}
+
+
+def run_job(db_path: str, job_id: str, kind: str, params: Dict[str, Any], settings: Dict[str, Any]):
+    """Run a job in a worker process (entry point of the process pool).
+
+    Args:
+        db_path: Job store database
+        job_id: Job id
+        kind: Job kind
+        params: Job parameters
+        settings: Paths and sizes from the API configuration
+
+    Returns:
+        Result summary, or None if the job was cancelled before it started
+    """
+    store = JobStore(db_path)
+    if not store.start(job_id):
+        return None
+
+    def progress(fraction: float, message: str):
+        store.progress(job_id, fraction, message)
+
+    logger.info(f"Job {job_id} ({kind}) started in process {os.getpid()}")
+    return JOB_RUNNERS[kind](job_id, params, settings, progress)
+
+
+def _custom_wi_service(settings: Dict[str, Any]):
+    """Custom WI service of the worker process, sharing the API's caches on disk."""
+    service = _worker_services.get("custom")
+    if service is None:
+        from .custom_wi_service import CustomWIService
+
+        loader = DataLoader(
+            Path(settings["data_dir"]),
+            profiles=get_config().list_profiles(),
+            columnar_dir=settings["columnar_dir"]
+        )
+        service = CustomWIService(
+            loader,
+            cache_dir=Path(settings["custom_wi_dir"]),
+            cache_size_mb=settings["custom_wi_mb"],
+            table_dir=Path(settings["distances_dir"])
+        )
+        _worker_services["custom"] = service
+    return service
+
+
+def _run_custom(job_id: str, params: Dict[str, Any], settings: Dict[str, Any], progress: Callable):
+    """Custom-profile WI; the result also lands in the custom WI result cache."""
+    progress(0.05, "Computing custom WI...")
+    content = _custom_wi_service(settings).calculate_custom_wi(
+        area=params["area"],
+        profile_name=params["profile_name"],
+        weights=params["weights"]
+    )
+
+    progress(0.95, "Saving result...")
+    path = Path(settings["results_dir"]) / f"{job_id}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with publish_path(path) as tmp:
+        tmp.write_bytes(content)
+
+    return {"area": params["area"], "result_file": path.name, "size": len(content)}
+
+
+def _run_rescore(job_id: str, params: Dict[str, Any], settings: Dict[str, Any], progress: Callable):
+    """Recompute WI of a dataset from its stored distances and republish it."""
+    return rescore_wi(
+        params["area"], params["profile"], Path(settings["data_dir"]),
+        skip_tiles=params.get("skip_tiles", False),
+        tile_workers=settings["tile_workers"],
+        progress=progress
+    )
+
+
+def _run_phase2(job_id: str, params: Dict[str, Any], settings: Dict[str, Any], progress: Callable):
+    """Full Phase 2 pipeline for an area and profile."""
+    return compute_wi(
+        params["area"], params["profile"], Path(settings["data_dir"]),
+        max_distance=params.get("max_distance", 1000),
+        skip_tiles=params.get("skip_tiles", False),
+        tile_workers=settings["tile_workers"],
+        progress=progress
+    )
+
+
+JOB_RUNNERS = {"custom": _run_custom, "rescore": _run_rescore, "phase2": _run_phase2}
+# Kinds that write datasets into the data directory (the others only write
+# to the cache directory)
+PUBLISHING_KINDS = ("rescore", "phase2")
+
+
+class JobManager:
+    """Submits jobs to a local process pool and tracks them in a JobStore.
+
+    - Identical submissions (same kind, parameters and input file versions)
+      return the queued, running or succeeded job instead of a new one.
+    - Rescore and Phase 2 jobs publish into the data directory; the
+      republished dataset is loaded into the dataset cache before the job
+      is reported as succeeded. Custom-profile results land in the custom
+      WI result cache and in a result file under ``results_dir``.
+    - Each manager heart-beats its active jobs; queued jobs of a manager
+      that stopped (restart, crashed worker) are taken over by another one,
+      and its running jobs are failed.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        data_loader: DataLoader,
+        settings: Dict[str, Any],
+        workers: int = 1,
+        heartbeat_interval: float = 10.0,
+        retention_days: float = 7.0
+    ):
+        """Initialize job manager.
+
+        Args:
+            store: Job store
+            data_loader: The API's DataLoader (input versions, publishing)
+            settings: Passed to :func:`run_job` (``data_dir``, ``results_dir``,
+                ``columnar_dir``, ``custom_wi_dir``, ``custom_wi_mb``, ``distances_dir``,
+                ``tile_workers``)
+            workers: Worker processes running jobs
+            heartbeat_interval: Seconds between heartbeats and orphan checks
+            retention_days: Finished jobs and result files are kept this long
+        """
+        self.store = store
+        self.data_loader = data_loader
+        self.settings = settings
+        self.results_dir = Path(settings["results_dir"])
+        self.heartbeat_interval = heartbeat_interval
+        self.retention_days = retention_days
+
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.workers = workers
+        self._pool = self._new_pool()
+        self._pool_lock = threading.Lock()
+        self._futures: Dict[str, Future] = {}
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        """Create the worker pool."""
+        # spawn: forking a process that runs thread pools is unsafe
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def _replace_pool(self, broken: ProcessPoolExecutor):
+        """Replace the pool after a worker process died.
+
+        A ``ProcessPoolExecutor`` whose worker was killed (out of memory,
+        segfault) rejects every later submission; only the first caller
+        seeing a given broken pool replaces it.
+        """
+        with self._pool_lock:
+            if self._pool is broken:
+                logger.warning("Job worker process died; starting a new job pool")
+                broken.shutdown(wait=False, cancel_futures=True)
+                self._pool = self._new_pool()
+
+    def job_key(self, kind: str, params: Dict[str, Any]) -> str:
+        """Deduplication key: kind, parameters and versions of the job's inputs.
+
+        Raises:
+            FileNotFoundError: If the inputs of the job do not exist
+            ValueError: If the kind or the profile is unknown
+        """
+        if kind == "custom":
+            area = params["area"]
+            profiles = self.data_loader.list_available_profiles(area)
+            if not profiles:
+                raise FileNotFoundError(f"No WI data found for area: {area}")
+            inputs = {profile: self.data_loader.current_version(area, profile) for profile in profiles}
+        elif kind in ("rescore", "phase2"):
+            profile = get_config().get_profile(params["profile"])
+            files = input_files(params["area"], params["profile"], self.data_loader.data_dir, kind)
+            inputs = {
+                "profile": profile,
+                "files": {role: file_version(path) for role, path in files.items()}
+            }
+        else:
+            raise ValueError(f"Unknown job kind: {kind} (expected one of {', '.join(JOB_KINDS)})")
+
+        payload = json.dumps([kind, params, inputs], sort_keys=True, default=str)
+        return f"{kind}:" + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def submit(self, kind: str, params: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        """Queue a job, or return the identical job already known.
+
+        Args:
+            kind: "custom", "rescore" or "phase2"
+            params: Job parameters
+
+        Returns:
+            (job, created)
+
+        Raises:
+            FileNotFoundError: If the inputs of the job do not exist
+            ValueError: If the kind or the profile is unknown
+            PermissionError: If a publishing job is submitted while the data
+                directory is read-only
+        """
+        if kind in PUBLISHING_KINDS and not os.access(self.data_loader.data_dir, os.W_OK):
+            raise PermissionError(
+                f"{kind} jobs publish into the data directory, which is mounted read-only"
+            )
+        job, created = self.store.submit(kind, self.job_key(kind, params), params, self.owner)
+        if created:
+            self._start(job)
+            logger.info(f"Job {job['id']} ({kind}) queued: {params.get('area')}")
+        return job, created
+
+    def _start(self, job: Dict[str, Any], resubmitted: bool = False):
+        """Hand a queued job to the process pool.
+
+        A broken pool is replaced and the submission retried once; if the
+        job still cannot be handed over it is failed rather than left
+        queued (where identical submissions would keep deduplicating to it).
+
+        Args:
+            job: Queued job
+            resubmitted: The job was already resubmitted after its pool broke
+        """
+        job_id = job["id"]
+        try:
+            try:
+                pool = self._pool
+                future = pool.submit(
+                    run_job, str(self.store.path), job_id, job["kind"], job["params"], self.settings
+                )
+            except BrokenProcessPool:
+                self._replace_pool(pool)
+                pool = self._pool
+                future = pool.submit(
+                    run_job, str(self.store.path), job_id, job["kind"], job["params"], self.settings
+                )
+        except Exception as e:
+            logger.error(f"Job {job_id} ({job['kind']}) could not be started: {e}")
+            self.store.fail(job_id, f"Could not start job: {type(e).__name__}: {e}")
+            raise
+
+        self._futures[job_id] = future
+        future.add_done_callback(lambda f: self._finished(job, f, pool, resubmitted))
+
+    def _finished(
+        self,
+        job: Dict[str, Any],
+        future: Future,
+        pool: ProcessPoolExecutor,
+        resubmitted: bool = False
+    ):
+        """Record the outcome of a job (runs on the pool's callback thread)."""
+        job_id = job["id"]
+        self._futures.pop(job_id, None)
+        if future.cancelled():
+            # Cancelled by cancel(), or left queued at shutdown for another manager
+            return
+
+        error = future.exception()
+        if isinstance(error, BrokenProcessPool):
+            self._replace_pool(pool)
+            record = self.store.get(job_id)
+            if record is not None and record["status"] == "queued" and not resubmitted:
+                # Waiting behind the job that killed the worker: run it on the new pool
+                try:
+                    self._start(job, resubmitted=True)
+                except Exception:
+                    pass  # failed in _start
+                return
+            error = RuntimeError("the job worker process died (e.g. out of memory)")
+
+        if error is not None:
+            logger.error(f"Job {job_id} ({job['kind']}) failed: {error}")
+            self.store.fail(job_id, f"{type(error).__name__}: {error}")
+            return
+
+        result = future.result()
+        if result is None:
+            return
+
+        if job["kind"] in ("rescore", "phase2"):
+            # Loading the dataset may take a while; keep the callback thread free
+            threading.Thread(
+                target=self._publish, args=(job, result), name="wi-job-publish", daemon=True
+            ).start()
+        else:
+            self.store.finish(job_id, result)
+            logger.info(f"Job {job_id} ({job['kind']}) succeeded")
+
+    def _publish(self, job: Dict[str, Any], result: Dict[str, Any]):
+        """Swap a republished dataset into the dataset cache, then report success."""
+        area, profile = job["params"]["area"], job["params"]["profile"]
+        try:
+            self.data_loader.refresh_dataset(area, profile)
+        except Exception as e:
+            logger.warning(f"Job {job['id']}: could not load republished {area}/{profile}: {e}")
+        self.store.finish(job["id"], result)
+        logger.info(f"Job {job['id']} ({job['kind']}) succeeded: {area}/{profile} published")
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job (None if unknown)."""
+        return self.store.get(job_id)
+
+    def list(self, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Most recent jobs first."""
+        return self.store.list(status=status, limit=limit)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued job (False if it already started or finished)."""
+        if not self.store.cancel(job_id):
+            return False
+        future = self._futures.get(job_id)
+        if future is not None:
+            future.cancel()
+        return True
+
+    def result_path(self, job_id: str) -> Path:
+        """Result file of a custom-profile job."""
+        return self.results_dir / f"{job_id}.json"
+
+    def maintain(self):
+        """Heartbeat, take over orphaned jobs and prune old ones."""
+        self.store.heartbeat(self.owner)
+
+        stale_before = time.time() - 3 * self.heartbeat_interval
+        for job in self.store.claim_orphans(self.owner, stale_before):
+            logger.info(f"Job {job['id']} ({job['kind']}) taken over from a stopped API process")
+            self._start(job)
+
+        for job_id in self.store.prune(time.time() - self.retention_days * 86400):
+            self.result_path(job_id).unlink(missing_ok=True)
+
+    async def watch(self):
+        """Run :meth:`maintain` now and every ``heartbeat_interval`` seconds."""
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await loop.run_in_executor(None, self.maintain)
+            except Exception as e:
+                logger.error(f"Job maintenance failed: {e}")
+            await asyncio.sleep(self.heartbeat_interval)
+
+    def shutdown(self):
+        """Stop the pool. Queued jobs stay queued and are taken over after restart."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        logger.info("Job manager shut down")
@@ -0,0 +1,235 @@
+"""Lightweight Prometheus-format metrics.
+
+Histograms are updated on the request path, so they are kept to a bisect
+and three additions under a per-metric lock; everything that can be read
+off existing state (cache sizes, queue depths, counters the services
+already keep) is collected only when ``/metrics`` is scraped.
+
+Metrics live in process memory: with several uvicorn workers each worker
+reports its own series, as with any per-process Prometheus client.
+"""
+
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import math
+import threading
+import time
+
+# Text exposition format served by /metrics
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 10.0)
+
+# (name, type, help, [(labels, value), ...]) as returned by collectors
+MetricFamily = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Histogram:
+    """Cumulative histogram with a fixed label set.
+
+    Series are created on first observation of a label combination; keep
+    label values bounded (route templates, not raw paths).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = REQUEST_BUCKETS
+    ):
+        """Initialize histogram.
+
+        Args:
+            name: Metric name (``_bucket``/``_sum``/``_count`` are appended)
+            help: Help text
+            labels: Label names
+            buckets: Sorted upper bounds (``+Inf`` is implicit)
+        """
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # Label values -> [per-bucket counts (+Inf last), sum]
+        self._series: Dict[Tuple[str, ...], List[Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Record one observation for a label combination."""
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def stages(self, *labels: str) -> "Stages":
+        """Start a stage stopwatch whose laps are observed with ``labels``."""
+        return Stages(self, labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labels + ("le",)
+        for labels, counts, total in sorted(series):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = "+Inf" if math.isinf(bound) else repr(float(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(names, labels + (le,))} {cumulative}")
+            label_text = _format_labels(self.labels, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class Stages:
+    """Stopwatch splitting a service call into stages.
+
+    Each :meth:`lap` observes the time since the previous lap (or since
+    the stopwatch started) under the stage name, so instrumenting a method
+    is one line after each stage rather than a block around it. Calls that
+    raise simply stop reporting laps.
+    """
+
+    __slots__ = ("_histogram", "_labels", "_last")
+
+    def __init__(self, histogram: Histogram, labels: Tuple[str, ...]):
+        self._histogram = histogram
+        self._labels = labels
+        self._last = time.perf_counter()
+
+    def lap(self, stage: str) -> None:
+        """Record the time since the previous lap as ``stage``."""
+        now = time.perf_counter()
+        self._histogram.observe(now - self._last, *self._labels, stage)
+        self._last = now
+
+
+class MetricsRegistry:
+    """Metrics rendered by ``/metrics``.
+
+    Holds the histograms updated in place, plus collectors:
+    callables run at scrape time that return metric families computed from
+    state kept elsewhere.
+    """
+
+    def __init__(self):
+        self._metrics: List[Histogram] = []
+        self._collectors: List[Callable[[], Iterable[MetricFamily]]] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: Histogram) -> Histogram:
+        """Register a histogram; returns it."""
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], Iterable[MetricFamily]]) -> None:
+        """Register a scrape-time collector (once; repeated calls are ignored)."""
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+
+    def render(self) -> bytes:
+        """Render all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics)
+            collectors = list(self._collectors)
+
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for collector in collectors:
+            for name, kind, help, samples in collector():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    label_text = _format_labels(tuple(labels), tuple(labels.values()))
+                    lines.append(f"{name}{label_text} {_format_value(value)}")
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+REGISTRY = MetricsRegistry()
+
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "wi_http_request_duration_seconds",
+    "HTTP request latency by route template, method and status",
+    labels=("route", "method", "status")
+))
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "wi_service_stage_seconds",
+    "Time spent in each stage (load, filter, statistics, encode, or cache_hit for cached responses) of a service call",
+    labels=("service", "operation", "stage"),
+    buckets=STAGE_BUCKETS
+))
+GEOCODING_UPSTREAM_SECONDS = REGISTRY.register(Histogram(
+    "wi_geocoding_upstream_seconds",
+    "Latency of upstream geocoding requests by outcome",
+    labels=("outcome",)
+))
+GEOCODING_RATE_LIMIT_SECONDS = REGISTRY.register(Histogram(
+    "wi_geocoding_rate_limit_wait_seconds",
+    "Time upstream geocoding requests waited for the rate limiter",
+    buckets=(0.001, 0.01, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+))
+
+
+class MetricsMiddleware:
+    """ASGI middleware observing request latency per route template.
+
+    The route is read from the scope after routing (``/api/v1/wi/grid``,
+    ``/api/v1/tiles/{area}/{profile}/{z}/{x}/{y}.pbf``), so the number of
+    series stays bounded; unmatched paths are reported as ``unmatched``.
+    Streaming responses are timed until their last chunk is sent.
+    """
+
+    def __init__(self, app, histogram: Optional[Histogram] = None):
+        self.app = app
+        self.histogram = histogram or REQUEST_SECONDS
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            self.histogram.observe(
+                time.perf_counter() - start,
+                getattr(route, "path", "unmatched"), scope["method"], str(status)
+            )
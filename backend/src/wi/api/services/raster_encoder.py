@@ -0,0 +1,112 @@
+"""Packed raster encoding of lattice-aligned WI grids."""
+
+import base64
+import json
+import struct
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+RASTER_MEDIA_TYPE = "application/x-wi-raster"
+DTYPES = ("float32", "uint8")
+ENCODINGS = ("base64", "binary")
+
+# uint8 quantization: 0-254 carry values, 255 marks missing cells
+_UINT8_NODATA = 255
+_UINT8_LEVELS = 254
+
+
+def _pack_band(values: np.ndarray, valid: np.ndarray, dtype: str) -> Tuple[bytes, Dict[str, Any]]:
+    """Pack one band as little-endian bytes.
+
+    Returns:
+        (band bytes, band description for the header)
+    """
+    if dtype == "float32":
+        data = np.where(valid, values, np.nan).astype("<f4")
+        return data.tobytes(), {"dtype": "float32", "nodata": None}
+
+    present = values[valid]
+    low = float(present.min()) if len(present) else 0.0
+    high = float(present.max()) if len(present) else 0.0
+    scale = (high - low) / _UINT8_LEVELS if high > low else 1.0
+
+    quantized = np.full(values.shape, _UINT8_NODATA, dtype=np.uint8)
+    quantized[valid] = np.rint((present - low) / scale).astype(np.uint8)
+
+    # value = q * scale + offset (max error: scale / 2)
+    return quantized.tobytes(), {
+        "dtype": "uint8", "nodata": _UINT8_NODATA, "scale": scale, "offset": low
+    }
+
+
+def encode_raster(
+    header: Dict[str, Any],
+    bands: Dict[str, np.ndarray],
+    dtype: str = "float32",
+    encoding: str = "base64"
+) -> Tuple[bytes, str]:
+    """Encode raster bands plus a validity mask.
+
+    Arrays are row-major with row 0 at the north edge. The mask holds one
+    bit per cell (1 = cell exists), packed little-endian bit order.
+
+    ``base64`` returns a JSON document with base64 payloads. ``binary``
+    returns ``<uint32 LE header length><JSON header><mask><band>...`` where
+    the header lists each payload's ``byte_offset`` and ``byte_length``.
+
+    Args:
+        header: Raster description (crs, transform, width, height, ...)
+        bands: Band name -> 2D float array with NaN for missing cells
+        dtype: "float32" or "uint8"
+        encoding: "base64" or "binary"
+
+    Returns:
+        (body bytes, media type)
+
+    Raises:
+        ValueError: If dtype or encoding is unknown
+    """
+    if dtype not in DTYPES:
+        raise ValueError(f"Unknown dtype: {dtype}. Available: {list(DTYPES)}")
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unknown encoding: {encoding}. Available: {list(ENCODINGS)}")
+
+    first = next(iter(bands.values()))
+    valid = ~np.isnan(first)
+    mask_bytes = np.packbits(valid.ravel(), bitorder="little").tobytes()
+
+    payloads: List[bytes] = [mask_bytes]
+    band_headers = []
+    for name, values in bands.items():
+        band_bytes, band_header = _pack_band(values, valid & ~np.isnan(values), dtype)
+        payloads.append(band_bytes)
+        band_headers.append({"name": name, **band_header})
+
+    mask_header = {"encoding": "bitpacked", "bit_order": "little"}
+    header = {**header, "byte_order": "little", "row_order": "north_to_south"}
+
+    if encoding == "base64":
+        document = {
+            **header,
+            "mask": {**mask_header, "data": base64.b64encode(mask_bytes).decode("ascii")},
+            "bands": [
+                {**band, "data": base64.b64encode(data).decode("ascii")}
+                for band, data in zip(band_headers, payloads[1:])
+            ]
+        }
+        return json.dumps(document, ensure_ascii=False).encode("utf-8"), "application/json"
+
+    offset = 0
+    described = []
+    for description, data in zip([mask_header] + band_headers, payloads):
+        described.append({**description, "byte_offset": offset, "byte_length": len(data)})
+        offset += len(data)
+
+    header_bytes = json.dumps(
+        {**header, "mask": described[0], "bands": described[1:]},
+        ensure_ascii=False
+    ).encode("utf-8")
+
+    body = b"".join([struct.pack("<I", len(header_bytes)), header_bytes] + payloads)
+    return body, RASTER_MEDIA_TYPE
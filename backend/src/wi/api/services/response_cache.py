@@ -0,0 +1,101 @@
+"""Byte-bounded LRU cache for encoded API responses."""
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+import threading
+
+from loguru import logger
+
+
+class ResponseCache:
+    """Thread-safe LRU cache of encoded payloads limited by total size.
+
+    Entries are ``(payload_bytes, extra)`` pairs where ``extra`` carries any
+    small per-entry data needed to finish the response (e.g. statistics).
+    Keys must include the dataset version so that republished data never
+    serves stale bytes.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        """Initialize cache.
+
+        Args:
+            max_bytes: Maximum total size of cached payloads
+        """
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[bytes, Any]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Tuple[bytes, Any]]:
+        """Get a cached entry, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Hashable, payload: bytes, extra: Any = None):
+        """Store an entry, evicting least recently used ones to fit.
+
+        Payloads larger than the whole cache are not stored.
+        """
+        size = len(payload)
+        if size > self.max_bytes:
+            logger.debug(f"Response too large to cache: {size} bytes")
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous[0])
+
+            self._entries[key] = (payload, extra)
+            self._size += size
+
+            while self._size > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                self.evictions += 1
+
+    def purge(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Remove entries whose keys match a predicate.
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                payload, _ = self._entries.pop(key)
+                self._size -= len(payload)
+        return len(keys)
+
+    def purge_version(self, version: str) -> int:
+        """Remove entries built from a dataset version (an element of the key tuple)."""
+        return self.purge(lambda key: isinstance(key, tuple) and version in key)
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Report cache size and hit counters."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
@@ -0,0 +1,231 @@
+"""Vector tile service for WI grids."""
+
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import threading
+
+import numpy as np
+from loguru import logger
+
+from .data_loader import DataLoader
+from .response_cache import ResponseCache
+from ...catalog import file_version
+from ...tiles import (
+    MBTilesArchive, build_grid_layer, encode_tile, tile_bounds_lonlat, validate_tile
+)
+
+
+class TileService:
+    """Encode WI grid cells into Mapbox Vector Tiles.
+
+    Tiles are served from the prebuilt archive ``tiles_{area}_{profile}.mbtiles``
+    (see scripts/build_tiles.py) when one exists for the current WI file.
+    Otherwise cells for a tile are selected through the dataset's spatial
+    index, so a tile only touches the cells it covers, and encoded tiles
+    are kept in a byte-bounded LRU keyed by dataset version.
+    """
+
+    def __init__(
+        self,
+        data_loader: DataLoader,
+        tile_cache: Optional[ResponseCache] = None,
+        extent: int = 4096
+    ):
+        """Initialize tile service.
+
+        Args:
+            data_loader: DataLoader instance for accessing precomputed data
+            tile_cache: Shared cache of encoded tiles
+            extent: Tile coordinate extent
+        """
+        self.data_loader = data_loader
+        self.tile_cache = tile_cache
+        self.extent = extent
+
+        self._archives: Dict[Path, Tuple[str, Optional[MBTilesArchive]]] = {}
+        self._archives_lock = threading.Lock()
+
+    def _get_archive(self, area: str, profile: str) -> Optional[MBTilesArchive]:
+        """Get the prebuilt tile archive if it matches the current WI file.
+
+        Archives record the version of the WI file they were built from;
+        a stale archive is ignored and tiles are encoded dynamically.
+        """
+        path = self.data_loader.data_dir / f"tiles_{area}_{profile}.mbtiles"
+        wi_path = self.data_loader.wi_path(area, profile)
+        if not path.exists() or not wi_path.exists():
+            return None
+
+        archive_version = file_version(path)
+
+        with self._archives_lock:
+            entry = self._archives.get(path)
+            if entry is not None and entry[0] == archive_version:
+                archive = entry[1]
+            else:
+                if entry is not None and entry[1] is not None:
+                    entry[1].close()
+                archive = MBTilesArchive(path, readonly=True)
+                source_version = archive.get_metadata().get("source_version")
+                if source_version != file_version(wi_path):
+                    logger.warning(f"Ignoring stale tile archive: {path}")
+                    archive.close()
+                    archive = None
+                self._archives[path] = (archive_version, archive)
+
+        return archive
+
+    def get_archive_tile(
+        self,
+        area: str,
+        profile: str,
+        z: int,
+        x: int,
+        y: int
+    ) -> Optional[Tuple[bytes, str]]:
+        """Get a gzip-compressed tile from the prebuilt archive.
+
+        Returns:
+            (gzipped tile bytes, ETag), or None when no current archive
+            covers this zoom level. Tile bytes are empty for tiles without
+            features.
+        """
+        validate_tile(z, x, y)
+
+        archive = self._get_archive(area, profile)
+        if archive is None:
+            return None
+
+        metadata = archive.get_metadata()
+        if not int(metadata.get("minzoom", 0)) <= z <= int(metadata.get("maxzoom", -1)):
+            return None
+
+        tile = archive.read_tile(z, x, y) or b""
+        etag = f'"{metadata.get("source_version")}-a{metadata.get("version")}-{z}-{x}-{y}"'
+
+        return tile, etag
+
+    def get_wi_tile(
+        self,
+        area: str,
+        profile: str,
+        z: int,
+        x: int,
+        y: int
+    ) -> Tuple[bytes, str]:
+        """Get an encoded WI grid tile.
+
+        Args:
+            area: Area name
+            profile: Profile name
+            z, x, y: Tile coordinates (XYZ scheme)
+
+        Returns:
+            (tile bytes, ETag). Tile bytes are empty when no cells fall in
+            the tile.
+
+        Raises:
+            FileNotFoundError: If data file not found
+            ValueError: If tile coordinates are invalid
+        """
+        validate_tile(z, x, y)
+
+        dataset = self.data_loader.load_dataset(area, profile)
+        etag = f'"{dataset.version}-{z}-{x}-{y}"'
+        cache_key = ("wi_tile", area, profile, dataset.version, z, x, y)
+
+        cached = self.tile_cache.get(cache_key) if self.tile_cache else None
+        if cached is not None:
+            return cached[0], etag
+
+        rows = dataset.query_bbox(*tile_bounds_lonlat(z, x, y))
+
+        if len(rows) == 0:
+            tile = b""
+        else:
+            layer = build_grid_layer(
+                dataset.cell_geometries(rows, wgs84=True),
+                dataset.frame["wi_score"].to_numpy()[rows],
+                dataset.frame["grid_id"].to_numpy()[rows],
+                z, x, y,
+                extent=self.extent,
+                feature_ids=rows
+            )
+            tile = encode_tile([layer])
+
+        logger.debug(f"Encoded tile {area}/{profile}/{z}/{x}/{y}: {len(rows)} cells, {len(tile)} bytes")
+
+        if self.tile_cache:
+            self.tile_cache.put(cache_key, tile)
+
+        return tile, etag
+
+    def get_diff_tile(
+        self,
+        area: str,
+        profile_a: str,
+        profile_b: str,
+        z: int,
+        x: int,
+        y: int,
+        threshold: Optional[float] = None
+    ) -> Tuple[bytes, str]:
+        """Get an encoded tile of WI differences between two profiles.
+
+        Layer ``wi_diff`` carries ``delta`` (profile_a - profile_b) per cell,
+        aggregated like ``wi_grid`` at low zooms.
+
+        Args:
+            area: Area name
+            profile_a: First profile
+            profile_b: Second profile
+            z, x, y: Tile coordinates (XYZ scheme)
+            threshold: Only include cells with ``|delta| >= threshold``
+
+        Returns:
+            (tile bytes, ETag). Tile bytes are empty when no cells remain.
+
+        Raises:
+            FileNotFoundError: If data file not found
+            ValueError: If tile coordinates are invalid
+        """
+        validate_tile(z, x, y)
+
+        dataset = self.data_loader.load_dataset(area, profile_a)
+        other = self.data_loader.load_dataset(area, profile_b)
+        etag = f'"{dataset.version}-{other.version}-{threshold or 0}-{z}-{x}-{y}"'
+        cache_key = (
+            "wi_diff_tile", area, profile_a, profile_b, dataset.version, other.version,
+            threshold, z, x, y
+        )
+
+        cached = self.tile_cache.get(cache_key) if self.tile_cache else None
+        if cached is not None:
+            return cached[0], etag
+
+        rows = dataset.query_bbox(*tile_bounds_lonlat(z, x, y))
+        delta = dataset.frame["wi_score"].to_numpy(dtype=float)[rows] - dataset.align(other)[rows]
+        keep = np.isfinite(delta)
+        if threshold:
+            keep &= np.abs(delta) >= threshold
+        rows, delta = rows[keep], delta[keep]
+
+        if len(rows) == 0:
+            tile = b""
+        else:
+            layer = build_grid_layer(
+                dataset.cell_geometries(rows, wgs84=True),
+                delta,
+                dataset.frame["grid_id"].to_numpy()[rows],
+                z, x, y,
+                extent=self.extent,
+                feature_ids=rows,
+                layer_name="wi_diff",
+                value_name="delta"
+            )
+            tile = encode_tile([layer])
+
+        if self.tile_cache:
+            self.tile_cache.put(cache_key, tile)
+
+        return tile, etag
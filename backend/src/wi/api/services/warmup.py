@@ -0,0 +1,113 @@
+"""Startup warm-up of frequently used WI datasets."""
+
+import asyncio
+import time
+from typing import Any, Dict, List, Tuple, Union
+
+from loguru import logger
+
+from .data_loader import DataLoader
+
+
+class WarmupManager:
+    """Preload a configured set of datasets and track readiness.
+
+    The warm set comes from ``api.preload.datasets`` in api.yaml and is
+    either the string ``"all"`` or a list of ``{area, profile}`` pairs.
+    """
+
+    def __init__(
+        self,
+        data_loader: DataLoader,
+        datasets: Union[str, List[Dict[str, str]], None] = None,
+        gate_readiness: bool = True
+    ):
+        """Initialize warm-up manager.
+
+        Args:
+            data_loader: Shared DataLoader whose cache is warmed
+            datasets: "all" or list of {area, profile} dicts
+            gate_readiness: Report not-ready until warm-up has finished
+        """
+        self.data_loader = data_loader
+        self.datasets = datasets or []
+        self.gate_readiness = gate_readiness
+
+        self.targets: List[Tuple[str, str]] = []
+        self.failed: Dict[str, str] = {}
+        self.started_at: float = None
+        self.finished_at: float = None
+
+    def resolve_targets(self) -> List[Tuple[str, str]]:
+        """Expand the configured warm set into (area, profile) pairs."""
+        if self.datasets == "all":
+            return self.data_loader.list_available_datasets()
+
+        targets = []
+        for entry in self.datasets:
+            targets.append((str(entry["area"]), str(entry["profile"])))
+        return targets
+
+    async def run(self):
+        """Load every dataset in the warm set off the event loop."""
+        self.started_at = time.time()
+        self.targets = self.resolve_targets()
+
+        logger.info(f"Warm-up: preloading {len(self.targets)} datasets")
+
+        loop = asyncio.get_running_loop()
+        for area, profile in self.targets:
+            try:
+                await loop.run_in_executor(
+                    None, self.data_loader.preload, area, profile
+                )
+            except Exception as e:
+                logger.error(f"Warm-up failed for {area}/{profile}: {e}")
+                self.failed[f"{area}/{profile}"] = str(e)
+
+        self.finished_at = time.time()
+        logger.info(
+            f"Warm-up complete in {self.finished_at - self.started_at:.1f}s "
+            f"({len(self.targets) - len(self.failed)} loaded, "
+            f"{len(self.failed)} failed)"
+        )
+
+    @property
+    def complete(self) -> bool:
+        """Whether the warm-up run has finished."""
+        return self.finished_at is not None
+
+    @property
+    def ready(self) -> bool:
+        """Whether the API should receive traffic.
+
+        With gating, a worker whose warm set did not load completely stays
+        not-ready; the failed datasets are listed in :meth:`status`.
+        """
+        if not self.gate_readiness:
+            return True
+        return self.complete and not self.failed
+
+    def status(self) -> Dict[str, Any]:
+        """Report warm-up progress and resident datasets."""
+        pending = [
+            f"{area}/{profile}"
+            for area, profile in self.targets
+            if f"{area}/{profile}" not in self.failed
+            and not self.data_loader.is_resident(area, profile)
+        ]
+
+        return {
+            "ready": self.ready,
+            "warmup": {
+                "complete": self.complete,
+                "targets": len(self.targets),
+                "pending": pending,
+                "failed": self.failed,
+                "seconds": (
+                    round((self.finished_at or time.time()) - self.started_at, 3)
+                    if self.started_at else None
+                )
+            },
+            "datasets": self.data_loader.resident_datasets()
+        }
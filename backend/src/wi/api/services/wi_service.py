@@ -1,15 +1,26 @@
 """WI calculation service."""
 
 from pathlib import Path
-from typing import Optional, Dict, Any, Tuple
+from typing import Optional, Dict, Any, List, Tuple
 import json
 
 import geopandas as gpd
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import shapely
 from loguru import logger
-from shapely.geometry import box
+from pyproj import Transformer
 
+from .arrow_encoder import append_geometry, select_rows
 from .data_loader import DataLoader
+from .dataset import GridDataset
+from .geojson_encoder import encode_features, feature_collection
+from .metrics import STAGE_SECONDS, Stages
+from .raster_encoder import encode_raster
+from .response_cache import ResponseCache
+from ...grid.lattice import GridLattice
+from ...grid.summary import compute_difference_statistics, compute_statistics
 from ..models.common import BoundingBox
 from ..models.wi import WIStatistics
 
@@ -21,14 +32,99 @@ class WIService:
     Handles bbox filtering, format conversion, statistics.
     """
 
-    def __init__(self, data_loader: DataLoader):
+    def __init__(
+        self,
+        data_loader: DataLoader,
+        response_cache: Optional[ResponseCache] = None
+    ):
         """Initialize WI service.
 
         Args:
             data_loader: DataLoader instance for accessing precomputed data
+            response_cache: Shared cache of encoded GeoJSON responses
         """
         self.data_loader = data_loader
-        logger.info("WIService initialized")
+        self.response_cache = response_cache
+        logger.debug("WIService initialized")
+
+    def get_wi_grid_geojson(
+        self,
+        area: str,
+        profile: str,
+        bbox: Optional[BoundingBox] = None,
+        fields: Optional[List[str]] = None
+    ) -> bytes:
+        """Get WI grid as encoded GeoJSON FeatureCollection bytes.
+
+        Encoded features are cached per (dataset version, bbox, fields), so
+        repeated requests only splice fresh metadata around cached bytes.
+
+        Args:
+            area: Area name (e.g., "shinagawa")
+            profile: Profile name (e.g., "residential_family")
+            bbox: Optional bounding box for filtering
+            fields: Optional property columns to include (default: all)
+
+        Returns:
+            UTF-8 encoded GeoJSON FeatureCollection with metadata
+
+        Raises:
+            FileNotFoundError: If data file not found
+            ValueError: If a requested field does not exist
+        """
+        stages = STAGE_SECONDS.stages("wi", "grid_geojson")
+        dataset = self.data_loader.load_dataset(area, profile)
+        stages.lap("load")
+        bbox_key = (bbox.min_lon, bbox.min_lat, bbox.max_lon, bbox.max_lat) if bbox else None
+        cache_key = (
+            "wi_grid", area, profile, dataset.version, bbox_key,
+            tuple(fields) if fields else None
+        )
+
+        cached = self.response_cache.get(cache_key) if self.response_cache else None
+        if cached is not None:
+            features, (count, stats) = cached
+        else:
+            logger.info(f"Encoding WI grid: area={area}, profile={profile}, bbox={bbox}")
+            wi_data = dataset.frame
+
+            if fields:
+                missing = [f for f in fields if f not in wi_data.columns]
+                if missing:
+                    raise ValueError(
+                        f"Unknown fields: {missing}. "
+                        f"Available: {list(wi_data.columns)}"
+                    )
+
+            positions = None
+            if bbox:
+                positions = self._bbox_positions(dataset, bbox)
+                wi_data = wi_data.iloc[positions]
+                logger.info(f"After bbox filter: {len(wi_data)} cells")
+            stages.lap("filter")
+
+            stats = self._statistics(dataset, positions)
+            count = len(wi_data)
+            stages.lap("statistics")
+
+            # Geometry is built only for the selected cells
+            geometries = shapely.to_geojson(dataset.cell_geometries(positions, wgs84=True))
+            features = encode_features(wi_data, fields or list(wi_data.columns), geometries)
+            if self.response_cache:
+                self.response_cache.put(cache_key, features, (count, stats))
+
+        metadata = {
+            "area": area,
+            "profile": profile,
+            "count": count,
+            "statistics": stats,
+            "bbox": f"{bbox.min_lon},{bbox.min_lat},{bbox.max_lon},{bbox.max_lat}" if bbox else None
+        }
+
+        content = feature_collection(features, metadata)
+        # Hits only splice the metadata; keep them out of the encode timings
+        stages.lap("encode" if cached is None else "cache_hit")
+        return content
 
     def get_wi_grid(
         self,
@@ -55,19 +151,26 @@ class WIService:
         logger.info(f"Fetching WI grid: area={area}, profile={profile}, bbox={bbox}")
 
         # Load WI data (uses cache)
-        wi_data = self.data_loader.load_wi_data(area, profile, format="parquet")
+        stages = STAGE_SECONDS.stages("wi", "grid")
+        dataset = self.data_loader.load_dataset(area, profile)
+        wi_data = dataset.data
+        stages.lap("load")
 
         # Apply bbox filter if provided
+        positions = None
         if bbox:
-            wi_data = self._filter_by_bbox(wi_data, bbox)
+            positions = self._bbox_positions(dataset, bbox)
+            wi_data = wi_data.iloc[positions]
             logger.info(f"After bbox filter: {len(wi_data)} cells")
 
         # Check if empty after filtering
         if len(wi_data) == 0:
             logger.warning(f"No data found for bbox: {bbox}")
+        stages.lap("filter")
 
         # Calculate statistics
-        stats = self._calculate_statistics(wi_data)
+        stats = self._statistics(dataset, positions)
+        stages.lap("statistics")
 
         # Convert to GeoJSON
         if format == "geojson":
@@ -85,11 +188,12 @@ class WIService:
                 "statistics": stats,
                 "bbox": f"{bbox.min_lon},{bbox.min_lat},{bbox.max_lon},{bbox.max_lat}" if bbox else None
             }
+            stages.lap("encode")
 
             return geojson_dict
         else:
             # Return as dict
-            return {
+            result = {
                 "data": wi_data.to_dict(orient="records"),
                 "metadata": {
                     "area": area,
@@ -98,86 +202,713 @@ class WIService:
                     "statistics": stats
                 }
             }
+            stages.lap("encode")
+            return result
+
+    def get_wi_grid_raster(
+        self,
+        area: str,
+        profile: str,
+        bbox: Optional[BoundingBox] = None,
+        fields: Optional[List[str]] = None,
+        dtype: str = "float32",
+        encoding: str = "base64"
+    ) -> Tuple[bytes, str]:
+        """Get WI grid as a packed raster on the grid's regular lattice.
+
+        Instead of one polygon per cell, returns the lattice geometry
+        (CRS, cell size, affine transform, dimensions), a validity mask and
+        one packed array per band. Cells outside the bbox are masked out.
+
+        Args:
+            area: Area name
+            profile: Profile name
+            bbox: Optional bounding box for filtering
+            fields: Band columns (default: wi_score), e.g. score_supermarket
+            dtype: "float32" or "uint8" (quantized with scale/offset)
+            encoding: "base64" (JSON) or "binary"
+
+        Returns:
+            (body bytes, media type)
+
+        Raises:
+            FileNotFoundError: If data file not found
+            ValueError: If the grid is not a regular lattice or a field is invalid
+        """
+        stages = STAGE_SECONDS.stages("wi", "grid_raster")
+        dataset = self.data_loader.load_dataset(area, profile)
+        stages.lap("load")
+        bands = fields or ["wi_score"]
+        bbox_key = (bbox.min_lon, bbox.min_lat, bbox.max_lon, bbox.max_lat) if bbox else None
+        cache_key = (
+            "wi_raster", area, profile, dataset.version, bbox_key,
+            tuple(bands), dtype, encoding
+        )
+
+        cached = self.response_cache.get(cache_key) if self.response_cache else None
+        if cached is not None:
+            stages.lap("cache_hit")
+            return cached[0], cached[1]
+
+        lattice = dataset.lattice
+        if lattice is None:
+            raise ValueError(
+                f"Raster format requires a regular grid; {area}/{profile} is irregular"
+            )
+
+        wi_data = dataset.frame
+        for band in bands:
+            if band not in wi_data.columns or not pd.api.types.is_numeric_dtype(wi_data[band]):
+                raise ValueError(f"Unknown or non-numeric band: {band}")
+
+        positions = None
+        window = (0, lattice.n_rows, 0, lattice.n_cols)
+        if bbox:
+            positions = self._bbox_positions(dataset, bbox)
+            window = lattice.window(positions)
+        stages.lap("filter")
+        stats = self._statistics(dataset, positions)
+        stages.lap("statistics")
+
+        rasters = {
+            band: lattice.rasterize(wi_data[band].to_numpy(), window, positions)
+            for band in bands
+        }
+        metadata = {
+            "area": area,
+            "profile": profile,
+            "count": stats["count"],
+            "statistics": stats,
+            "bbox": f"{bbox.min_lon},{bbox.min_lat},{bbox.max_lon},{bbox.max_lat}" if bbox else None
+        }
+
+        body, media_type = self._encode_raster(lattice, window, rasters, metadata, dtype, encoding)
+        stages.lap("encode")
+        if self.response_cache:
+            self.response_cache.put(cache_key, body, media_type)
+
+        return body, media_type
+
+    @staticmethod
+    def _encode_raster(
+        lattice: GridLattice,
+        window: Tuple[int, int, int, int],
+        rasters: Dict[str, np.ndarray],
+        metadata: Dict[str, Any],
+        dtype: str,
+        encoding: str
+    ) -> Tuple[bytes, str]:
+        """Encode lattice bands with the raster header (CRS, transform, bounds).
+
+        Args:
+            lattice: Grid lattice
+            window: (row0, row1, col0, col1) covered by the bands
+            rasters: Band name -> 2-D array
+            metadata: Response metadata
+            dtype: "float32" or "uint8"
+            encoding: "base64" or "binary"
+
+        Returns:
+            (body bytes, media type)
+        """
+        transform = lattice.window_transform(window)
+        height, width = window[1] - window[0], window[3] - window[2]
+        to_wgs84 = Transformer.from_crs(lattice.crs, "EPSG:4326", always_xy=True)
+        left, top = transform[0], transform[3]
+        right, bottom = left + width * lattice.cell_size, top - height * lattice.cell_size
+        lons, lats = to_wgs84.transform([left, right, right, left], [top, top, bottom, bottom])
+
+        header = {
+            "format": "raster",
+            "crs": lattice.crs,
+            "cell_size": lattice.cell_size,
+            "width": width,
+            "height": height,
+            "transform": list(transform),
+            "bounds": [left, bottom, right, top],
+            "bounds_wgs84": [min(lons), min(lats), max(lons), max(lats)],
+            "metadata": metadata
+        }
+
+        return encode_raster(header, rasters, dtype=dtype, encoding=encoding)
+
+    def get_wi_grid_table(
+        self,
+        area: str,
+        profile: str,
+        bbox: Optional[BoundingBox] = None,
+        fields: Optional[List[str]] = None,
+        geometry: str = "wkb"
+    ) -> pa.Table:
+        """Get WI grid as an Arrow table for columnar export.
+
+        Rows and columns are selected on the dataset's Arrow attribute
+        columns (the memory-mapped file for columnar datasets) and geometry
+        is built for the selected cells only, so bulk extraction never goes
+        through per-feature Python objects or a full GeoDataFrame.
+
+        Args:
+            area: Area name
+            profile: Profile name
+            bbox: Optional bounding box for filtering
+            fields: Optional columns to include (default: all)
+            geometry: "wkb", "xy" (centroid lon/lat columns) or "none"
+
+        Returns:
+            Arrow table (GeoParquet ``geo`` metadata when geometry is WKB)
+
+        Raises:
+            FileNotFoundError: If data file not found
+            ValueError: If a field or geometry mode is invalid
+        """
+        stages = STAGE_SECONDS.stages("wi", "grid_table")
+        dataset = self.data_loader.load_dataset(area, profile)
+        stages.lap("load")
+
+        positions = None
+        if bbox:
+            positions = self._bbox_positions(dataset, bbox)
+        stages.lap("filter")
+
+        table = self._grid_table(dataset, positions, fields, geometry)
+        stages.lap("encode")
+        return table
+
+    @staticmethod
+    def _grid_table(
+        dataset: GridDataset,
+        positions: Optional[np.ndarray],
+        fields: Optional[List[str]],
+        geometry: str
+    ) -> pa.Table:
+        """Select cells and columns of a dataset as an Arrow table.
+
+        Args:
+            dataset: Loaded WI dataset
+            positions: Cell positions (None: all cells)
+            fields: Attribute columns (None: all)
+            geometry: "wkb", "xy" (centroid lon/lat columns) or "none"
+
+        Returns:
+            Arrow table (GeoParquet ``geo`` metadata when geometry is WKB)
+
+        Raises:
+            ValueError: If a field or geometry mode is invalid
+        """
+        table = select_rows(dataset.attribute_table, positions, fields, geometry)
+        if geometry == "none":
+            return table
+        return append_geometry(table, dataset.cell_geometries(positions, wgs84=True), geometry)
 
     def get_wi_statistics(
         self,
         area: str,
-        profile: str
+        profile: str,
+        bbox: Optional[BoundingBox] = None
     ) -> Dict[str, Any]:
         """Get statistics for WI scores.
 
+        Whole-area statistics come from the phase 2 sidecar when it matches
+        the data file; bbox statistics from the summed-area tables.
+
         Args:
             area: Area name
             profile: Profile name
+            bbox: Optional bounding box
 
         Returns:
             Statistics dictionary
         """
-        return self.data_loader.get_wi_statistics(area, profile)
+        if bbox is None:
+            return self.data_loader.get_wi_statistics(area, profile)
+
+        stages = STAGE_SECONDS.stages("wi", "statistics")
+        dataset = self.data_loader.load_dataset(area, profile)
+        stages.lap("load")
+        positions = self._bbox_positions(dataset, bbox)
+        stages.lap("filter")
+        stats = self._statistics(dataset, positions)
+        stages.lap("statistics")
+        return stats
 
-    def _filter_by_bbox(
+    def get_wi_diff(
+        self,
+        area: str,
+        profile_a: str,
+        profile_b: str,
+        bbox: Optional[BoundingBox] = None,
+        threshold: Optional[float] = None
+    ) -> bytes:
+        """Get per-cell WI differences between two profiles as JSON bytes.
+
+        The two datasets are aligned on their cells once (cached per
+        version) and the deltas are computed as whole arrays; only
+        ``grid_id`` and ``delta`` are returned, so clients join them onto
+        geometry they already hold.
+
+        Args:
+            area: Area name
+            profile_a: First profile
+            profile_b: Second profile
+            bbox: Optional bounding box for filtering
+            threshold: Only return cells with ``|delta| >= threshold``
+
+        Returns:
+            UTF-8 encoded JSON with columns and difference statistics
+
+        Raises:
+            FileNotFoundError: If data file not found
+        """
+        stages = STAGE_SECONDS.stages("wi", "diff")
+        dataset, other, a, b = self._difference(area, profile_a, profile_b, stages)
+        bbox_key = (bbox.min_lon, bbox.min_lat, bbox.max_lon, bbox.max_lat) if bbox else None
+        cache_key = (
+            "wi_diff", area, profile_a, profile_b, dataset.version, other.version,
+            bbox_key, threshold
+        )
+
+        cached = self.response_cache.get(cache_key) if self.response_cache else None
+        if cached is not None:
+            stages.lap("cache_hit")
+            return cached[0]
+
+        positions, stats = self._diff_positions(dataset, a, b, bbox, threshold, stages)
+        delta = a[positions] - b[positions]
+
+        content = json.dumps({
+            "area": area,
+            "profile_a": profile_a,
+            "profile_b": profile_b,
+            "count": len(positions),
+            "threshold": threshold,
+            "bbox": f"{bbox.min_lon},{bbox.min_lat},{bbox.max_lon},{bbox.max_lat}" if bbox else None,
+            "statistics": stats,
+            "columns": {
+                "grid_id": dataset.frame["grid_id"].to_numpy()[positions].tolist(),
+                "delta": np.round(delta, 4).tolist()
+            }
+        }, ensure_ascii=False).encode("utf-8")
+        stages.lap("encode")
+
+        if self.response_cache:
+            self.response_cache.put(cache_key, content)
+
+        return content
+
+    def get_wi_diff_table(
         self,
-        gdf: gpd.GeoDataFrame,
+        area: str,
+        profile_a: str,
+        profile_b: str,
+        bbox: Optional[BoundingBox] = None,
+        threshold: Optional[float] = None,
+        geometry: str = "none"
+    ) -> pa.Table:
+        """Get per-cell WI differences as an Arrow table.
+
+        Args:
+            area: Area name
+            profile_a: First profile
+            profile_b: Second profile
+            bbox: Optional bounding box for filtering
+            threshold: Only return cells with ``|delta| >= threshold``
+            geometry: "wkb", "xy" (centroid lon/lat columns) or "none"
+
+        Returns:
+            Arrow table with ``grid_id``, ``delta`` and optional geometry
+
+        Raises:
+            FileNotFoundError: If data file not found
+            ValueError: If the geometry mode is invalid
+        """
+        stages = STAGE_SECONDS.stages("wi", "diff_table")
+        dataset, _, a, b = self._difference(area, profile_a, profile_b, stages)
+        positions, _ = self._diff_positions(dataset, a, b, bbox, threshold, stages)
+
+        table = self._grid_table(dataset, positions, ["grid_id"], geometry)
+        table = table.append_column("delta", pa.array(a[positions] - b[positions]))
+        stages.lap("encode")
+        return table
+
+    def get_wi_diff_raster(
+        self,
+        area: str,
+        profile_a: str,
+        profile_b: str,
+        bbox: Optional[BoundingBox] = None,
+        threshold: Optional[float] = None,
+        dtype: str = "float32",
+        encoding: str = "base64"
+    ) -> Tuple[bytes, str]:
+        """Get per-cell WI differences as a ``delta`` raster band.
+
+        Same layout as ``get_wi_grid_raster``; cells outside the bbox, below
+        the threshold or missing from either profile are masked out.
+
+        Args:
+            area: Area name
+            profile_a: First profile
+            profile_b: Second profile
+            bbox: Optional bounding box for filtering
+            threshold: Only keep cells with ``|delta| >= threshold``
+            dtype: "float32" or "uint8" (quantized with scale/offset)
+            encoding: "base64" (JSON) or "binary"
+
+        Returns:
+            (body bytes, media type)
+
+        Raises:
+            FileNotFoundError: If data file not found
+            ValueError: If the grid is not a regular lattice
+        """
+        stages = STAGE_SECONDS.stages("wi", "diff_raster")
+        dataset, other, a, b = self._difference(area, profile_a, profile_b, stages)
+        bbox_key = (bbox.min_lon, bbox.min_lat, bbox.max_lon, bbox.max_lat) if bbox else None
+        cache_key = (
+            "wi_diff_raster", area, profile_a, profile_b, dataset.version, other.version,
+            bbox_key, threshold, dtype, encoding
+        )
+
+        cached = self.response_cache.get(cache_key) if self.response_cache else None
+        if cached is not None:
+            stages.lap("cache_hit")
+            return cached[0], cached[1]
+
+        lattice = dataset.lattice
+        if lattice is None:
+            raise ValueError(
+                f"Raster format requires a regular grid; {area}/{profile_a} is irregular"
+            )
+
+        positions, stats = self._diff_positions(dataset, a, b, bbox, threshold, stages)
+        if bbox:
+            window = lattice.window(self._bbox_positions(dataset, bbox))
+        else:
+            window = (0, lattice.n_rows, 0, lattice.n_cols)
+        stages.lap("filter")
+
+        rasters = {"delta": lattice.rasterize(a - b, window, positions)}
+        metadata = {
+            "area": area,
+            "profile_a": profile_a,
+            "profile_b": profile_b,
+            "count": len(positions),
+            "threshold": threshold,
+            "statistics": stats,
+            "bbox": f"{bbox.min_lon},{bbox.min_lat},{bbox.max_lon},{bbox.max_lat}" if bbox else None
+        }
+
+        body, media_type = self._encode_raster(lattice, window, rasters, metadata, dtype, encoding)
+        stages.lap("encode")
+        if self.response_cache:
+            self.response_cache.put(cache_key, body, media_type)
+
+        return body, media_type
+
+    def get_wi_compare(
+        self,
+        area: str,
+        profiles: List[str],
+        bbox: Optional[BoundingBox] = None,
+        types: Optional[List[str]] = None
+    ) -> bytes:
+        """Get several profiles of an area as one packed columnar JSON.
+
+        Cells are listed once (``grid_id``); each profile contributes a
+        ``wi_score_{profile}`` column (and ``score_{type}_{profile}`` for
+        the requested amenity types) aligned to that cell order.
+
+        Args:
+            area: Area name
+            profiles: Profiles to compare (first one defines the cell order)
+            bbox: Optional bounding box for filtering
+            types: Amenity types to include per profile, or ["all"]
+
+        Returns:
+            UTF-8 encoded JSON with columns and per-profile statistics
+
+        Raises:
+            FileNotFoundError: If data file not found
+            ValueError: If a profile list or amenity type is invalid
+        """
+        stages = STAGE_SECONDS.stages("wi", "compare")
+        dataset, positions, columns, stats = self._compare_columns(area, profiles, bbox, types, stages)
+
+        packed = {"grid_id": dataset.frame["grid_id"].to_numpy()[positions].tolist()}
+        for name, values in columns.items():
+            values = np.round(values[positions], 4)
+            packed[name] = np.where(np.isfinite(values), values, None).tolist()
+
+        content = json.dumps({
+            "area": area,
+            "profiles": profiles,
+            "count": len(positions),
+            "bbox": f"{bbox.min_lon},{bbox.min_lat},{bbox.max_lon},{bbox.max_lat}" if bbox else None,
+            "statistics": stats,
+            "columns": packed
+        }, ensure_ascii=False).encode("utf-8")
+        stages.lap("encode")
+        return content
+
+    def get_wi_compare_table(
+        self,
+        area: str,
+        profiles: List[str],
+        bbox: Optional[BoundingBox] = None,
+        types: Optional[List[str]] = None,
+        geometry: str = "none"
+    ) -> pa.Table:
+        """Get several profiles of an area as one Arrow table.
+
+        Geometry (or ``grid_id`` alone) comes from the first profile's
+        cells, so it is encoded once however many profiles are compared.
+
+        Args:
+            area: Area name
+            profiles: Profiles to compare
+            bbox: Optional bounding box for filtering
+            types: Amenity types to include per profile, or ["all"]
+            geometry: "wkb", "xy" (centroid lon/lat columns) or "none"
+
+        Returns:
+            Arrow table with ``grid_id``, the profile columns and optional geometry
+
+        Raises:
+            FileNotFoundError: If data file not found
+            ValueError: If a profile, amenity type or geometry mode is invalid
+        """
+        stages = STAGE_SECONDS.stages("wi", "compare_table")
+        dataset, positions, columns, _ = self._compare_columns(area, profiles, bbox, types, stages)
+
+        table = self._grid_table(dataset, None if bbox is None else positions, ["grid_id"], geometry)
+        for name, values in columns.items():
+            table = table.append_column(name, pa.array(values[positions]))
+        stages.lap("encode")
+        return table
+
+    def get_wi_compare_raster(
+        self,
+        area: str,
+        profiles: List[str],
+        bbox: Optional[BoundingBox] = None,
+        types: Optional[List[str]] = None,
+        dtype: str = "float32",
+        encoding: str = "base64"
+    ) -> Tuple[bytes, str]:
+        """Get several profiles of an area as bands of one raster.
+
+        Same layout as ``get_wi_grid_raster`` with one band per profile column.
+
+        Args:
+            area: Area name
+            profiles: Profiles to compare
+            bbox: Optional bounding box for filtering
+            types: Amenity types to include per profile, or ["all"]
+            dtype: "float32" or "uint8" (quantized with scale/offset)
+            encoding: "base64" (JSON) or "binary"
+
+        Returns:
+            (body bytes, media type)
+
+        Raises:
+            FileNotFoundError: If data file not found
+            ValueError: If the grid is not a regular lattice or an input is invalid
+        """
+        stages = STAGE_SECONDS.stages("wi", "compare_raster")
+        dataset, positions, columns, stats = self._compare_columns(area, profiles, bbox, types, stages)
+
+        lattice = dataset.lattice
+        if lattice is None:
+            raise ValueError(
+                f"Raster format requires a regular grid; {area}/{profiles[0]} is irregular"
+            )
+
+        if bbox:
+            window = lattice.window(positions)
+            rasters = {
+                name: lattice.rasterize(values, window, positions)
+                for name, values in columns.items()
+            }
+        else:
+            window = (0, lattice.n_rows, 0, lattice.n_cols)
+            rasters = {name: lattice.rasterize(values) for name, values in columns.items()}
+
+        metadata = {
+            "area": area,
+            "profiles": profiles,
+            "count": len(positions),
+            "statistics": stats,
+            "bbox": f"{bbox.min_lon},{bbox.min_lat},{bbox.max_lon},{bbox.max_lat}" if bbox else None
+        }
+
+        content = self._encode_raster(lattice, window, rasters, metadata, dtype, encoding)
+        stages.lap("encode")
+        return content
+
+    def _compare_columns(
+        self,
+        area: str,
+        profiles: List[str],
+        bbox: Optional[BoundingBox],
+        types: Optional[List[str]],
+        stages: Stages
+    ) -> Tuple[GridDataset, np.ndarray, Dict[str, np.ndarray], Dict[str, Any]]:
+        """Align the score columns of several profiles on the first profile's cells.
+
+        Columns are views of (or cached alignments to) the resident
+        datasets; nothing is copied until rows are selected for output.
+        Stages are timed once per profile.
+
+        Returns:
+            (first dataset, sorted positions, column name -> full-length
+            values, profile -> wi_score statistics)
+        """
+        if not profiles:
+            raise ValueError("At least one profile is required")
+        if len(set(profiles)) != len(profiles):
+            raise ValueError(f"Duplicate profiles: {profiles}")
+
+        dataset = self.data_loader.load_dataset(area, profiles[0])
+        stages.lap("load")
+        positions = self._bbox_positions(dataset, bbox) if bbox else np.arange(len(dataset))
+        stages.lap("filter")
+
+        columns: Dict[str, np.ndarray] = {}
+        stats: Dict[str, Any] = {}
+        for profile in profiles:
+            other = self.data_loader.load_dataset(area, profile)
+            stages.lap("load")
+            available = [c[len("score_"):] for c in other.frame.columns if c.startswith("score_")]
+            selected = available if types == ["all"] else (types or [])
+            missing = [t for t in selected if t not in available]
+            if missing:
+                raise ValueError(
+                    f"Unknown amenity types for {profile}: {missing}. Available: {available}"
+                )
+
+            for column in ["wi_score"] + [f"score_{t}" for t in selected]:
+                columns[f"{column}_{profile}"] = dataset.align(other, column)
+            stages.lap("load")
+
+            other_positions = self._bbox_positions(other, bbox) if bbox else None
+            stages.lap("filter")
+            stats[profile] = self._statistics(other, other_positions)
+            stages.lap("statistics")
+
+        return dataset, positions, columns, stats
+
+    def _difference(
+        self,
+        area: str,
+        profile_a: str,
+        profile_b: str,
+        stages: Stages
+    ) -> Tuple[GridDataset, GridDataset, np.ndarray, np.ndarray]:
+        """Load two profiles of an area with wi_score aligned on the first's rows.
+
+        Returns:
+            (dataset_a, dataset_b, wi_score of a, wi_score of b aligned to a)
+        """
+        dataset = self.data_loader.load_dataset(area, profile_a)
+        other = self.data_loader.load_dataset(area, profile_b)
+        a = dataset.frame["wi_score"].to_numpy(dtype=float)
+        b = dataset.align(other)
+        stages.lap("load")
+        return dataset, other, a, b
+
+    def _diff_positions(
+        self,
+        dataset: GridDataset,
+        a: np.ndarray,
+        b: np.ndarray,
+        bbox: Optional[BoundingBox],
+        threshold: Optional[float],
+        stages: Stages
+    ) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """Select the cells of a difference and compute its statistics.
+
+        Statistics cover every comparable cell in the bbox; the threshold
+        only sparsifies the returned cells.
+
+        Returns:
+            (sorted positions, difference statistics)
+        """
+        positions = self._bbox_positions(dataset, bbox) if bbox else np.arange(len(a))
+        positions = positions[np.isfinite(a[positions]) & np.isfinite(b[positions])]
+        stages.lap("filter")
+        stats = compute_difference_statistics(a[positions], b[positions])
+        stages.lap("statistics")
+
+        if threshold:
+            positions = positions[np.abs(a[positions] - b[positions]) >= threshold]
+        stages.lap("filter")
+
+        return positions, stats
+
+    def _bbox_positions(
+        self,
+        dataset: GridDataset,
         bbox: BoundingBox
-    ) -> gpd.GeoDataFrame:
-        """Filter GeoDataFrame by bounding box.
+    ) -> np.ndarray:
+        """Get positions of the cells intersecting a bounding box.
+
+        Uses the dataset's persistent lattice or STRtree index, so the cost
+        scales with the number of matching cells.
 
         Args:
-            gdf: GeoDataFrame to filter
+            dataset: Loaded WI dataset
             bbox: Bounding box
 
         Returns:
-            Filtered GeoDataFrame
+            Sorted row positions into ``dataset.frame``
         """
-        # Create bbox polygon
-        bbox_geom = box(bbox.min_lon, bbox.min_lat, bbox.max_lon, bbox.max_lat)
+        return dataset.query_bbox(bbox.min_lon, bbox.min_lat, bbox.max_lon, bbox.max_lat)
 
-        # Ensure CRS matches
-        if gdf.crs and gdf.crs.to_epsg() != 4326:
-            # Convert bbox to GeoDataFrame with same CRS
-            bbox_gdf = gpd.GeoDataFrame(
-                {'geometry': [bbox_geom]},
-                crs="EPSG:4326"
-            ).to_crs(gdf.crs)
-            bbox_geom = bbox_gdf.geometry.iloc[0]
+    def _filter_by_bbox(
+        self,
+        dataset: GridDataset,
+        bbox: BoundingBox
+    ) -> gpd.GeoDataFrame:
+        """Filter a dataset by bounding box.
 
-        # Filter: keep cells that intersect bbox
-        filtered = gdf[gdf.geometry.intersects(bbox_geom)].copy()
+        Args:
+            dataset: Loaded WI dataset
+            bbox: Bounding box
 
-        return filtered
+        Returns:
+            Cells that intersect the bbox
+        """
+        return dataset.data.iloc[self._bbox_positions(dataset, bbox)]
 
-    def _calculate_statistics(
+    def _statistics(
         self,
-        gdf: gpd.GeoDataFrame
-    ) -> Dict[str, float]:
-        """Calculate statistics for WI scores.
+        dataset: GridDataset,
+        positions: Optional[np.ndarray] = None
+    ) -> Dict[str, Any]:
+        """Calculate WI score statistics for a dataset or a subset of cells.
+
+        Regular grids are answered from the dataset's summed-area tables
+        (count/mean/std in constant time, percentiles from block histograms
+        within ``quantile_error``); irregular grids fall back to an exact
+        computation over the selected cells.
 
         Args:
-            gdf: GeoDataFrame with wi_score column
+            dataset: Loaded WI dataset
+            positions: Sorted cell positions (None: all cells)
 
         Returns:
             Statistics dictionary
         """
-        if len(gdf) == 0:
-            return {
-                "mean": 0.0,
-                "min": 0.0,
-                "max": 0.0,
-                "std": 0.0,
-                "median": 0.0,
-                "count": 0
-            }
+        summary = dataset.summary
+        if summary is not None:
+            if positions is None:
+                return summary.window_statistics()
+            if len(positions) == 0:
+                return compute_statistics(np.empty(0))
+            return summary.window_statistics(dataset.lattice.window(positions), positions)
 
-        stats = {
-            "mean": float(gdf["wi_score"].mean()),
-            "min": float(gdf["wi_score"].min()),
-            "max": float(gdf["wi_score"].max()),
-            "std": float(gdf["wi_score"].std()),
-            "median": float(gdf["wi_score"].median()),
-            "count": len(gdf)
-        }
-
-        return stats
+        values = dataset.frame["wi_score"].to_numpy(dtype=float)
+        return compute_statistics(values if positions is None else values[positions])
 
     def calculate_point_wi(
         self,
@@ -200,27 +931,13 @@ class WIService:
         Raises:
             FileNotFoundError: If data files not found
         """
-        from shapely.geometry import Point
-
-        logger.info(f"Calculating point WI: lat={lat}, lon={lon}, area={area}, profile={profile}")
-
-        # Load WI data
-        wi_data = self.data_loader.load_wi_data(area, profile)
-
-        # Create point
-        point = Point(lon, lat)
-
-        # Ensure CRS matches (convert point to data CRS if needed)
-        if wi_data.crs and wi_data.crs.to_epsg() != 4326:
-            point_gdf = gpd.GeoDataFrame(
-                {'geometry': [point]},
-                crs="EPSG:4326"
-            ).to_crs(wi_data.crs)
-            point = point_gdf.geometry.iloc[0]
+        logger.debug(f"Calculating point WI: lat={lat}, lon={lon}, area={area}, profile={profile}")
 
-        # Find nearest grid cell
-        wi_data['_distance'] = wi_data.geometry.distance(point)
-        nearest_cell = wi_data.loc[wi_data['_distance'].idxmin()]
+        # Resolve the cell by lattice arithmetic (KD-tree fallback); the
+        # cached data is only read
+        dataset = self.data_loader.load_dataset(area, profile)
+        position = int(dataset.locate(lon, lat)[0])
+        nearest_cell = dataset.frame.iloc[position]
 
         # Extract amenity scores
         amenity_scores = {}
@@ -239,6 +956,6 @@ class WIService:
             'area': area
         }
 
-        logger.info(f"Point WI result: {result['wi_score']:.2f}")
+        logger.debug(f"Point WI result: {result['wi_score']:.2f}")
 
         return result
@@ -0,0 +1,356 @@
+"""Dataset catalog manifest (``catalog.json`` in the processed data directory).
+
+Phase 2 records every published dataset here: area, profile, cell count,
+bounds, CRS, schema, statistics, the files belonging to the dataset with
+their hashes, and a dataset version (content hash of the WI file). The API
+loads the manifest once and reloads it when it changes, so listings and
+existence checks do not touch the data directory.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from loguru import logger
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+CATALOG_FILE = "catalog.json"
+CATALOG_FORMAT = 1
+
+DatasetKey = Tuple[str, str]
+
+
+def file_sha256(path: Path, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 hex digest of a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_version(path: Path) -> str:
+    """Cheap version string of a file (modification time and size).
+
+    Stable across the rename done by :func:`publish_path`, so it changes
+    exactly when a file is republished.
+    """
+    stat = Path(path).stat()
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+
+@contextmanager
+def publish_path(path: Path) -> Iterator[Path]:
+    """
+    Atomic publish convention for output files.
+
+    Yields a temporary path next to ``path`` (hidden, so it matches no data
+    file pattern); when the block succeeds the file is renamed over
+    ``path``, otherwise it is removed. Readers therefore see either the
+    previous file or the complete new one, and the rename keeps the
+    modification time and size that make up the file version.
+
+    Example:
+        >>> with publish_path(out_dir / "wi_shinagawa_office.parquet") as tmp:
+        ...     grid.to_parquet(tmp)
+    """
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.tmp{os.getpid()}")
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def describe_dataset(
+    area: str,
+    profile: str,
+    data,
+    files: Dict[str, Path],
+    stats: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Build the catalog entry of a dataset.
+
+    Args:
+        area: Area name
+        profile: Profile name
+        data: WI GeoDataFrame as written to the ``wi`` file
+        files: Files of the dataset by role (``wi`` is required; e.g.
+            ``stats``, ``distances``, ``grid``, ``tiles``)
+        stats: Statistics to record (e.g. the stats sidecar content)
+
+    Returns:
+        Catalog entry
+    """
+    file_entries = {}
+    for role, path in files.items():
+        path = Path(path)
+        if not path.exists():
+            continue
+        stat = path.stat()
+        file_entries[role] = {
+            "name": path.name,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": file_sha256(path),
+        }
+
+    if "wi" not in file_entries:
+        raise FileNotFoundError(f"WI file not found for {area}/{profile}")
+
+    bounds_wgs84 = None
+    if len(data) and data.crs is not None:
+        bounds_wgs84 = [float(v) for v in data.to_crs("EPSG:4326").total_bounds]
+
+    return {
+        "area": area,
+        "profile": profile,
+        "version": file_entries["wi"]["sha256"][:16],
+        "cells": int(len(data)),
+        "crs": data.crs.to_string() if data.crs is not None else None,
+        "bounds": [float(v) for v in data.total_bounds] if len(data) else None,
+        "bounds_wgs84": bounds_wgs84,
+        "schema": {column: str(dtype) for column, dtype in data.dtypes.items()},
+        "stats": stats or {},
+        "files": file_entries,
+        "updated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def read_catalog(data_dir: Path) -> Dict[str, Any]:
+    """Read the catalog of a data directory (empty catalog if missing)."""
+    path = Path(data_dir) / CATALOG_FILE
+    if not path.exists():
+        return {"format": CATALOG_FORMAT, "datasets": {}}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def update_catalog(
+    data_dir: Path,
+    entries: Iterable[Dict[str, Any]] = (),
+    remove: Iterable[DatasetKey] = ()
+) -> Path:
+    """
+    Add, replace or remove datasets in the catalog.
+
+    The read-modify-write is serialized with an advisory lock (POSIX) and
+    the manifest is replaced atomically, so readers always see a complete
+    catalog.
+
+    Args:
+        data_dir: Processed data directory
+        entries: Entries from :func:`describe_dataset`
+        remove: (area, profile) keys to remove
+
+    Returns:
+        Path of the catalog
+    """
+    data_dir = Path(data_dir)
+    path = data_dir / CATALOG_FILE
+
+    with open(data_dir / f"{CATALOG_FILE}.lock", "w") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+
+        catalog = read_catalog(data_dir)
+        datasets = catalog.setdefault("datasets", {})
+        for area, profile in remove:
+            datasets.pop(f"{area}/{profile}", None)
+        for entry in entries:
+            datasets[f"{entry['area']}/{entry['profile']}"] = entry
+        catalog["format"] = CATALOG_FORMAT
+        catalog["datasets"] = dict(sorted(datasets.items()))
+
+        tmp_path = data_dir / f"{CATALOG_FILE}.tmp{os.getpid()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(catalog, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+    return path
+
+
+def scan_datasets(data_dir: Path, profiles: Iterable[str] = ()) -> Dict[DatasetKey, Dict[str, Any]]:
+    """
+    Find datasets from ``wi_*.parquet`` file names (data directories without a catalog).
+
+    Area and profile are taken from the stats sidecar when present, else
+    split on a known profile suffix, so area names containing underscores
+    stay intact. Files matching neither are skipped.
+
+    Args:
+        data_dir: Processed data directory
+        profiles: Known profile names
+
+    Returns:
+        Minimal entries (area, profile, files) by (area, profile)
+    """
+    data_dir = Path(data_dir)
+    if not data_dir.exists():
+        return {}
+
+    # Longest first so that e.g. "residential_family" wins over "family"
+    suffixes = sorted(profiles, key=len, reverse=True)
+
+    datasets: Dict[DatasetKey, Dict[str, Any]] = {}
+    for path in sorted(data_dir.glob("wi_*.parquet")):
+        stem = path.name[len("wi_"):-len(".parquet")]
+        key = None
+
+        sidecar = data_dir / f"wi_{stem}.stats.json"
+        if sidecar.exists():
+            try:
+                with open(sidecar, encoding="utf-8") as f:
+                    stats = json.load(f)
+                if f"{stats['area']}_{stats['profile']}" == stem:
+                    key = (stats["area"], stats["profile"])
+            except (OSError, ValueError, KeyError):
+                pass
+
+        if key is None:
+            for profile in suffixes:
+                if stem.endswith(f"_{profile}") and len(stem) > len(profile) + 1:
+                    key = (stem[:-len(profile) - 1], profile)
+                    break
+
+        if key is None:
+            logger.warning(f"Cannot tell area and profile apart in {path.name}, skipping")
+            continue
+
+        datasets[key] = {
+            "area": key[0],
+            "profile": key[1],
+            "version": None,
+            "files": {"wi": {"name": path.name}},
+        }
+
+    return datasets
+
+
+class DatasetCatalog:
+    """In-memory view of the dataset catalog.
+
+    The manifest is re-read when its modification time or size changes;
+    changes are looked for at most every ``check_interval`` seconds, so
+    lookups are dictionary accesses. Without a manifest, datasets are found
+    by :func:`scan_datasets`, redone when the directory changes.
+    """
+
+    def __init__(self, data_dir: Path, profiles: Iterable[str] = (), check_interval: float = 2.0):
+        """
+        Initialize catalog.
+
+        Args:
+            data_dir: Processed data directory
+            profiles: Known profile names (for the file-name fallback)
+            check_interval: Minimum seconds between change checks
+        """
+        self.data_dir = Path(data_dir)
+        self.path = self.data_dir / CATALOG_FILE
+        self.profiles = list(profiles)
+        self.check_interval = check_interval
+
+        self._datasets: Dict[DatasetKey, Dict[str, Any]] = {}
+        self._signature: Optional[tuple] = None
+        self._checked: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _current_signature(self) -> Optional[tuple]:
+        """Identify the current catalog source (manifest or directory state)."""
+        try:
+            stat = self.path.stat()
+            return ("manifest", stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            pass
+        try:
+            stat = self.data_dir.stat()
+            return ("scan", stat.st_mtime_ns)
+        except FileNotFoundError:
+            return None
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Reload the catalog if its source changed.
+
+        Args:
+            force: Check now, regardless of the check interval
+
+        Returns:
+            True if the catalog was reloaded
+        """
+        now = time.monotonic()
+        if not force and self._checked is not None and now - self._checked < self.check_interval:
+            return False
+
+        with self._lock:
+            self._checked = now
+            signature = self._current_signature()
+            if signature == self._signature:
+                return False
+
+            if signature is None:
+                datasets = {}
+            elif signature[0] == "manifest":
+                try:
+                    catalog = read_catalog(self.data_dir)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Ignoring unreadable catalog {self.path}: {e}")
+                    return False
+                datasets = {
+                    (entry["area"], entry["profile"]): entry
+                    for entry in catalog.get("datasets", {}).values()
+                }
+            else:
+                datasets = scan_datasets(self.data_dir, self.profiles)
+
+            self._datasets = datasets
+            self._signature = signature
+
+        source = "manifest" if signature and signature[0] == "manifest" else "file scan"
+        logger.info(f"Dataset catalog loaded from {source}: {len(datasets)} datasets")
+        return True
+
+    def datasets(self) -> Dict[DatasetKey, Dict[str, Any]]:
+        """All catalog entries by (area, profile)."""
+        self.refresh()
+        return self._datasets
+
+    def get(self, area: str, profile: str) -> Optional[Dict[str, Any]]:
+        """Catalog entry of a dataset (None if not published)."""
+        return self.datasets().get((area, profile))
+
+    def __contains__(self, key: DatasetKey) -> bool:
+        return key in self.datasets()
+
+    def keys(self) -> List[DatasetKey]:
+        """Sorted (area, profile) keys."""
+        return sorted(self.datasets())
+
+    def areas(self) -> List[str]:
+        """Sorted area names."""
+        return sorted({area for area, _ in self.datasets()})
+
+    def profiles_for_area(self, area: Optional[str] = None) -> List[str]:
+        """Sorted profile names of an area (all profiles if None)."""
+        return sorted({p for a, p in self.datasets() if area is None or a == area})
+
+    def areas_for_profile(self, profile: str) -> List[str]:
+        """Sorted area names having a profile."""
+        return sorted(a for a, p in self.datasets() if p == profile)
+
+    def has_area(self, area: str) -> bool:
+        """Whether any dataset exists for an area."""
+        return any(a == area for a, _ in self.datasets())
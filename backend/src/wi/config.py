@@ -27,6 +27,7 @@ class Config:
         # Load configurations
         self.profiles = self._load_yaml("profiles.yaml")
         self.amenities_osm = self._load_yaml("amenities_osm.yaml")
+        self.api = self._load_yaml("api.yaml")
 
     def _load_yaml(self, filename: str) -> Dict[str, Any]:
         """Load YAML configuration file."""
@@ -87,6 +88,10 @@ class Config:
             'crs': 'EPSG:6677'
         })
 
+    def get_api_config(self) -> Dict[str, Any]:
+        """Get API server configuration (``api`` section of api.yaml)."""
+        return (self.api or {}).get('api', {})
+
     def get_walking_speed(self, user_type: str = 'general') -> float:
         """
         Get walking speed in m/min.
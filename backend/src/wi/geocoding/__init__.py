@@ -0,0 +1,5 @@
+"""Offline geocoding modules."""
+
+from .gazetteer import GAZETTEER_TAGS, Gazetteer, build_gazetteer_entries, normalize_text
+
+__all__ = ['GAZETTEER_TAGS', 'Gazetteer', 'build_gazetteer_entries', 'normalize_text']
@@ -0,0 +1,366 @@
+"""オフライン地名辞書（ガゼッティア）."""
+
+import bisect
+import re
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+# osmnx.features_from_place に渡すタグ（Phase 1 で取得）
+GAZETTEER_TAGS: Dict[str, Any] = {
+    "place": ["city", "town", "village", "suburb", "quarter", "neighbourhood"],
+    "boundary": "administrative",
+    "railway": "station",
+    "public_transport": "station",
+    "amenity": True,
+    "shop": True,
+    "leisure": ["park"],
+    "addr:housenumber": True,
+}
+
+# 種別の優先順位（小さいほど上位に表示）
+KIND_PRIORITY = {"ward": 0, "station": 1, "district": 2, "amenity": 3, "address": 4}
+
+NAME_TAGS = (
+    "name", "name:ja", "name:ja-Hira", "name:ja_kana", "name:ja-Latn", "name:ja_rm",
+    "name:en", "alt_name", "official_name", "short_name", "old_name",
+)
+
+ADDRESS_TAGS = (
+    "addr:province", "addr:city", "addr:suburb", "addr:quarter", "addr:neighbourhood",
+)
+
+# 異体字 → 通用字
+_VARIANTS = str.maketrans({
+    "髙": "高", "﨑": "崎", "嵜": "崎", "邊": "辺", "邉": "辺", "澤": "沢", "濱": "浜",
+    "齋": "斎", "齊": "斉", "國": "国", "廣": "広", "櫻": "桜", "龍": "竜", "舊": "旧",
+    "驛": "駅", "條": "条", "與": "与", "籠": "篭",
+})
+
+_KANJI = r"[一-鿿々]"
+_GA = re.compile(rf"(?<={_KANJI})[ヶヵケがガ](?={_KANJI})")
+_NO = re.compile(rf"(?<={_KANJI})[ノの](?={_KANJI})")
+_TSU = re.compile(rf"(?<={_KANJI})[ツっ](?={_KANJI})")
+_KANJI_NUMBER = re.compile(r"[〇一二三四五六七八九十]+(?=丁目|番|号)")
+_ADDRESS_UNITS = re.compile(r"(\d+)(?:丁目|番地|番|号)")
+_PREFECTURE = re.compile(r"^(?:東京都|北海道|京都府|大阪府|[一-鿿]{2,3}県)")
+_REMOVE = re.compile(r"[\s・･、，,。．.　'\"()（）「」]+")
+_DASHES = re.compile(r"[-‐‑‒–—―−－ｰ]+")
+
+_KANJI_DIGITS = {"〇": 0, "一": 1, "二": 2, "三": 3, "四": 4, "五": 5, "六": 6, "七": 7, "八": 8, "九": 9}
+
+
+def _kanji_to_int(text: str) -> int:
+    """漢数字（九十九まで）を整数に変換."""
+    if "十" not in text:
+        value = 0
+        for char in text:
+            value = value * 10 + _KANJI_DIGITS[char]
+        return value
+    tens, _, ones = text.partition("十")
+    return (_KANJI_DIGITS.get(tens, 1) if tens else 1) * 10 + (_KANJI_DIGITS.get(ones, 0) if ones else 0)
+
+
+def normalize_text(text: str) -> str:
+    """
+    検索用に文字列を正規化.
+
+    - NFKC（全角英数・半角カナを統一）と大文字小文字の同一視
+    - 漢字に挟まれた「ヶ/ケ/が」「ノ/の」「ツ/っ」の統一（霞ヶ関・霞ケ関・霞が関）
+    - 異体字の統一（髙→高、﨑→崎 など）
+    - カタカナ → ひらがな（読み仮名での検索）
+    - 「1丁目2番3号」「一丁目2-3」→「1-2-3」、先頭の都道府県名の除去
+    - 空白・句読点・中黒の除去
+
+    Args:
+        text: 入力文字列
+
+    Returns:
+        正規化した文字列
+    """
+    text = unicodedata.normalize("NFKC", text).casefold().translate(_VARIANTS)
+    text = _GA.sub("が", text)
+    text = _NO.sub("の", text)
+    text = _TSU.sub("つ", text)
+    text = _KANJI_NUMBER.sub(lambda m: str(_kanji_to_int(m.group())), text)
+
+    # カタカナ → ひらがな（長音符「ー」はそのまま）
+    text = "".join(
+        chr(ord(c) - 0x60) if "ァ" <= c <= "ヶ" else c
+        for c in text
+    )
+
+    text = _REMOVE.sub("", text)
+    text = _PREFECTURE.sub("", text)
+    text = _ADDRESS_UNITS.sub(r"\1-", text)
+    # 数字に挟まれたハイフン類と長音符だけを住所の区切りとして扱う
+    text = _DASHES.sub("-", text)
+    text = re.sub(r"(?<=\d)ー(?=\d)", "-", text)
+    return text.strip("-")
+
+
+def _bigrams(text: str) -> List[str]:
+    return [text[i:i + 2] for i in range(len(text) - 1)]
+
+
+def _tag(row: pd.Series, key: str) -> Optional[str]:
+    value = row.get(key)
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _classify(row: pd.Series) -> Optional[str]:
+    """OSM要素の種別を判定（対象外はNone）."""
+    place = _tag(row, "place")
+    admin_level = _tag(row, "admin_level")
+
+    if _tag(row, "railway") == "station" or _tag(row, "public_transport") == "station":
+        return "station"
+    if place in ("city", "town", "village") or admin_level == "7":
+        return "ward"
+    if place in ("suburb", "quarter", "neighbourhood") or admin_level in ("8", "9", "10"):
+        return "district"
+    if _tag(row, "name") and any(_tag(row, k) for k in ("amenity", "shop", "leisure", "tourism", "healthcare")):
+        return "amenity"
+    if _tag(row, "addr:housenumber") or _tag(row, "addr:block_number") or _tag(row, "addr:full"):
+        return "address"
+    return None
+
+
+def _address(row: pd.Series) -> Optional[str]:
+    """addr:* タグから住所文字列を組み立て."""
+    full = _tag(row, "addr:full")
+    if full:
+        return full
+
+    parts = [_tag(row, key) for key in ADDRESS_TAGS]
+    numbers = [n for n in (_tag(row, "addr:block_number"), _tag(row, "addr:housenumber")) if n]
+    text = "".join(p for p in parts if p)
+    if numbers:
+        text += "-".join(numbers)
+    return text or None
+
+
+def build_gazetteer_entries(features: gpd.GeoDataFrame, area: str) -> pd.DataFrame:
+    """
+    OSM要素（osmnx.features_from_place の結果）から地名辞書のエントリを作成.
+
+    駅・区市町村・町丁目・名前のある施設・住所を対象とし、
+    name / 読み仮名 / ローマ字 / 英語名 / 住所を検索用の別名として保持します。
+
+    Args:
+        features: OSM要素（タグが列）
+        area: エリア名
+
+    Returns:
+        DataFrame（osm_id, name, kind, lat, lon, area, address, names）
+    """
+    if len(features) == 0:
+        return pd.DataFrame(columns=["osm_id", "name", "kind", "lat", "lon", "area", "address", "names"])
+
+    if features.crs and features.crs.to_epsg() != 4326:
+        features = features.to_crs("EPSG:4326")
+    points = features.geometry.representative_point()
+
+    records = []
+    for (index, row), point in zip(features.iterrows(), points):
+        kind = _classify(row)
+        if kind is None:
+            continue
+
+        address = _address(row)
+        names = [n for n in (_tag(row, key) for key in NAME_TAGS) if n]
+        if kind == "station":
+            names += [f"{n}駅" for n in names if not n.endswith("駅")]
+        if address:
+            names.append(address)
+            # 「住所 + 名前」でも検索できるように
+            if names[0] != address:
+                names.append(address + names[0])
+        if not names:
+            continue
+
+        osm_id = "/".join(str(i) for i in index) if isinstance(index, tuple) else str(index)
+        records.append({
+            "osm_id": osm_id,
+            "name": names[0],
+            "kind": kind,
+            "lat": float(point.y),
+            "lon": float(point.x),
+            "area": area,
+            "address": address or "",
+            "names": list(dict.fromkeys(names)),
+        })
+
+    entries = pd.DataFrame.from_records(
+        records, columns=["osm_id", "name", "kind", "lat", "lon", "area", "address", "names"]
+    )
+    # 同じ名前・種別の要素（ノードとポリゴンの重複など）は1件に
+    entries = entries.drop_duplicates(subset=["name", "kind", "address"]).reset_index(drop=True)
+
+    logger.info(f"Gazetteer entries for {area}: {len(entries)}")
+    for kind, count in entries["kind"].value_counts().items():
+        logger.info(f"  {kind}: {count}")
+
+    return entries
+
+
+class Gazetteer:
+    """
+    正規化した名前の前方一致・部分一致で地名を検索する辞書.
+
+    エントリの各別名を normalize_text で正規化したものをキーとし、
+    キーには（種別の優先順位, 長さ）の順に番号を振ります。
+    完全一致・前方一致はソート済みキーの二分探索、部分一致は
+    バイグラムの転置インデックス（番号順の配列）の積集合で候補を求め、
+    番号の小さい順に検証するため、上位の結果だけを見て打ち切れます。
+    """
+
+    def __init__(self, entries: pd.DataFrame):
+        """
+        インデックスを構築.
+
+        Args:
+            entries: build_gazetteer_entries の結果（複数エリアを連結してもよい）
+        """
+        self.entries = entries.reset_index(drop=True)
+        self._columns = {
+            column: self.entries[column].tolist()
+            for column in ("osm_id", "name", "kind", "lat", "lon", "area", "address")
+        }
+
+        keys, owners = [], []
+        for entry_id, names in enumerate(self.entries["names"]):
+            for key in dict.fromkeys(normalize_text(n) for n in names):
+                if key:
+                    keys.append(key)
+                    owners.append(entry_id)
+
+        priority = self.entries["kind"].map(KIND_PRIORITY).fillna(len(KIND_PRIORITY)).to_numpy()
+        owners = np.asarray(owners, dtype=np.int64)
+        order = np.lexsort((
+            np.array([len(k) for k in keys], dtype=np.int64),
+            priority[owners] if len(owners) else np.empty(0),
+        ))
+
+        self.keys: List[str] = [keys[i] for i in order]
+        self.owners = owners[order].astype(np.int32)
+
+        # 前方一致用（文字列順のキーとその番号）
+        by_text = sorted(range(len(self.keys)), key=self.keys.__getitem__)
+        self.sorted_keys = [self.keys[i] for i in by_text]
+        self.sorted_ids = np.asarray(by_text, dtype=np.int32)
+
+        postings: Dict[str, List[int]] = {}
+        for key_id, key in enumerate(self.keys):
+            for gram in set(_bigrams(key)):
+                postings.setdefault(gram, []).append(key_id)
+        self.postings = {gram: np.asarray(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+        logger.info(
+            f"Gazetteer indexed: {len(self.entries):,} entries, "
+            f"{len(self.keys):,} keys, {len(self.postings):,} bigrams"
+        )
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @classmethod
+    def from_files(cls, paths: Sequence[Path]) -> "Gazetteer":
+        """gazetteer_{area}.parquet を読み込んで連結."""
+        frames = [pd.read_parquet(path) for path in paths]
+        frames = [f for f in frames if len(f)]
+        if not frames:
+            return cls(pd.DataFrame(columns=["osm_id", "name", "kind", "lat", "lon", "area", "address", "names"]))
+        entries = pd.concat(frames, ignore_index=True)
+        entries["names"] = entries["names"].map(list)
+        return cls(entries)
+
+    def search(self, query: str, limit: int = 5, areas: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """
+        地名を検索.
+
+        完全一致 → 前方一致 → 部分一致の順に、同じ段階では
+        種別の優先順位と名前の短さの順に並べます。
+
+        Args:
+            query: 検索文字列
+            limit: 最大件数
+            areas: 対象エリア（Noneの場合は全エリア）
+
+        Returns:
+            Nominatim と同じ形式の結果のリスト
+        """
+        text = normalize_text(query)
+        if not text or not self.keys:
+            return []
+
+        area_set = set(areas) if areas is not None else None
+        found: Dict[int, None] = {}
+
+        def collect(key_ids: Iterable[int]) -> bool:
+            for key_id in key_ids:
+                entry_id = int(self.owners[key_id])
+                if entry_id in found:
+                    continue
+                if area_set is not None and self._columns["area"][entry_id] not in area_set:
+                    continue
+                found[entry_id] = None
+                if len(found) >= limit:
+                    return True
+            return False
+
+        # 完全一致・前方一致（番号順 = 優先順）
+        start = bisect.bisect_left(self.sorted_keys, text)
+        end = bisect.bisect_left(self.sorted_keys, text + "\U0010ffff")
+        if end > start:
+            exact_end = bisect.bisect_right(self.sorted_keys, text, start, end)
+            if collect(self._ranked(self.sorted_ids[start:exact_end], limit)):
+                return self._format(found)
+            if collect(self._ranked(self.sorted_ids[exact_end:end], limit)):
+                return self._format(found)
+
+        # 部分一致（1文字の検索は前方一致のみ）: 最も短い転置リストを番号順に検証
+        grams = _bigrams(text)
+        if not grams or any(gram not in self.postings for gram in grams):
+            return self._format(found)
+
+        candidates = min((self.postings[gram] for gram in grams), key=len)
+        keys = self.keys
+        collect(i for i in candidates.tolist() if text in keys[i])
+        return self._format(found)
+
+    @staticmethod
+    def _ranked(ids: np.ndarray, limit: int) -> Iterable[int]:
+        """キー番号を小さい順に返す（範囲が広い場合は先頭だけ部分ソート）."""
+        head = limit * 8
+        if len(ids) <= head * 4:
+            yield from np.sort(ids).tolist()
+            return
+        partitioned = np.partition(ids, head - 1)
+        yield from np.sort(partitioned[:head]).tolist()
+        yield from np.sort(partitioned[head:]).tolist()
+
+    def _format(self, entry_ids: Iterable[int]) -> List[Dict[str, Any]]:
+        columns = self._columns
+        results = []
+        for entry_id in entry_ids:
+            name, address = columns["name"][entry_id], columns["address"][entry_id]
+            results.append({
+                "place_id": columns["osm_id"][entry_id],
+                "display_name": f"{name}, {address}" if address and address != name else name,
+                "lat": float(columns["lat"][entry_id]),
+                "lon": float(columns["lon"][entry_id]),
+                "type": columns["kind"][entry_id],
+                "importance": None,
+                "address": {"area": columns["area"][entry_id], "full": address},
+                "source": "gazetteer",
+            })
+        return results
@@ -2,5 +2,11 @@
 
 from .generator import GridGenerator
 from .spatial_index import SpatialIndex
+from .lattice import GridLattice
+from .columnar import ColumnarGrid, write_columnar
+from .summary import (
+    GridSummary, compute_difference_statistics, compute_statistics, compute_weighted_statistics
+)
 
-__all__ = ['GridGenerator', 'SpatialIndex']
+__all__ = ['GridGenerator', 'SpatialIndex', 'GridLattice', 'ColumnarGrid', 'write_columnar', 'GridSummary',
+           'compute_statistics', 'compute_weighted_statistics', 'compute_difference_statistics']
@@ -0,0 +1,249 @@
+"""メモリマップ可能な列指向グリッドファイル（Arrow IPC / Feather v2, 無圧縮）."""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import shapely
+from pyproj import CRS
+
+from ..catalog import publish_path
+from .lattice import GridLattice
+
+COLUMNAR_FORMAT = 1
+COLUMNAR_SUFFIX = ".arrow"
+
+# スキーマメタデータのキー
+METADATA_KEY = b"wi_columnar"
+
+# 属性列と衝突しない内部列名
+ROW_COLUMN = "_row"
+COL_COLUMN = "_col"
+RING_COLUMN = "_ring"
+WKB_COLUMN = "_wkb"
+
+
+def write_columnar(
+    data: gpd.GeoDataFrame,
+    path: Path,
+    version: str,
+    lattice: Optional[GridLattice] = None
+) -> Path:
+    """
+    WIグリッドを列指向ファイルに書き出す.
+
+    属性列（grid_id・スコア列）はそのままの固定長型で、ジオメトリは
+    shapelyオブジェクトの代わりに次の形で保存します。
+
+    - 規則格子: 各セルの行・列番号（int32）と格子の原点・セルサイズ
+    - 頂点数が揃った穴のないポリゴン: 外周座標の固定長リスト（float64）
+    - それ以外: WKB
+
+    無圧縮のため、読み込み側はファイルをメモリマップして
+    コピーなしで列を参照できます（ページキャッシュはプロセス間で共有）。
+
+    Args:
+        data: WIグリッドGeoDataFrame（RangeIndex）
+        path: 出力パス（一時ファイルに書いてから置き換え）
+        version: 元ファイルのバージョン
+        lattice: 規則格子（Noneの場合はデータから復元を試みる）
+
+    Returns:
+        出力パス
+
+    Raises:
+        ValueError: インデックスが RangeIndex でない場合
+    """
+    if not isinstance(data.index, pd.RangeIndex) or data.index.start != 0 or data.index.step != 1:
+        raise ValueError("Columnar grid files require a default RangeIndex")
+
+    geometry_name = data.geometry.name
+    columns = [c for c in data.columns if c != geometry_name]
+    if lattice is None:
+        lattice = GridLattice.from_grid(data)
+
+    table = pa.Table.from_pandas(data[columns], preserve_index=False)
+
+    metadata: Dict[str, Any] = {
+        "format": COLUMNAR_FORMAT,
+        "version": version,
+        "crs": data.crs.to_json() if data.crs is not None else None,
+        "columns": columns,
+        "geometry_column": geometry_name,
+        "column_order": list(data.columns),
+        "lattice": None,
+    }
+
+    if lattice is not None:
+        table = table.append_column(ROW_COLUMN, pa.array(lattice.rows, type=pa.int32()))
+        table = table.append_column(COL_COLUMN, pa.array(lattice.cols, type=pa.int32()))
+        metadata["lattice"] = {
+            "origin_x": lattice.origin_x,
+            "origin_y": lattice.origin_y,
+            "cell_size": lattice.cell_size,
+            "crs": lattice.crs,
+        }
+
+    geometries = np.asarray(data.geometry.values)
+    ring_size = _uniform_ring_size(geometries)
+    if ring_size:
+        coords = shapely.get_coordinates(geometries).reshape(-1)
+        ring = pa.FixedSizeListArray.from_arrays(pa.array(coords, type=pa.float64()), 2 * ring_size)
+        table = table.append_column(RING_COLUMN, ring)
+        metadata["geometry"] = {"encoding": "ring", "size": ring_size}
+    else:
+        table = table.append_column(WKB_COLUMN, pa.array(shapely.to_wkb(geometries), type=pa.binary()))
+        metadata["geometry"] = {"encoding": "wkb"}
+
+    table = table.combine_chunks().replace_schema_metadata(
+        {METADATA_KEY: json.dumps(metadata).encode("utf-8")}
+    )
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with publish_path(path) as tmp_path:
+        with pa.OSFile(str(tmp_path), "wb") as sink:
+            with ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+    return path
+
+
+def _uniform_ring_size(geometries: np.ndarray) -> int:
+    """
+    全セルが頂点数の等しい穴のないポリゴンなら外周の頂点数、そうでなければ0.
+    """
+    if len(geometries) == 0:
+        return 0
+    if not (shapely.get_type_id(geometries) == 3).all():
+        return 0
+    if shapely.get_num_interior_rings(geometries).any():
+        return 0
+    counts = shapely.get_num_coordinates(geometries)
+    return int(counts[0]) if (counts == counts[0]).all() else 0
+
+
+class ColumnarGrid:
+    """
+    メモリマップした列指向グリッドファイル.
+
+    列はファイル上のバッファをそのまま参照する読み取り専用の配列で、
+    複数のワーカープロセスが同じファイルを開いても物理メモリは
+    ページキャッシュの1コピーだけです。ジオメトリは保持せず、
+    必要なセルの分だけ座標列から組み立てます。
+    """
+
+    def __init__(self, path: Path):
+        """
+        初期化.
+
+        Args:
+            path: :func:`write_columnar` で書き出したファイル
+        """
+        self.path = Path(path)
+        self._source = pa.memory_map(str(self.path), "r")
+        self.table = ipc.open_file(self._source).read_all()
+
+        metadata = (self.table.schema.metadata or {}).get(METADATA_KEY)
+        if metadata is None:
+            raise ValueError(f"Not a columnar grid file: {self.path}")
+        self.metadata = json.loads(metadata)
+        if self.metadata.get("format") != COLUMNAR_FORMAT:
+            raise ValueError(f"Unsupported columnar grid format: {self.metadata.get('format')}")
+
+        self.version: str = self.metadata["version"]
+        self.columns = list(self.metadata["columns"])
+        self.crs = CRS.from_json(self.metadata["crs"]) if self.metadata["crs"] else None
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    @property
+    def nbytes(self) -> int:
+        """マップしたバッファのバイト数."""
+        return int(self.table.nbytes)
+
+    def _values(self, name: str) -> np.ndarray:
+        """数値列をコピーなしのnumpy配列として取得."""
+        return self.table.column(name).chunk(0).to_numpy(zero_copy_only=False) if len(self) else np.empty(0)
+
+    def frame(self) -> pd.DataFrame:
+        """
+        属性列のDataFrame（ジオメトリなし）.
+
+        NULLを含まない数値列はマップ上のバッファを共有します。
+        """
+        series = {}
+        for name in self.columns:
+            column = self.table.column(name)
+            if pa.types.is_integer(column.type) or pa.types.is_floating(column.type):
+                if column.null_count == 0:
+                    series[name] = self._values(name)
+                    continue
+            series[name] = column.to_pandas()
+        return pd.DataFrame(series, index=pd.RangeIndex(len(self)), columns=self.columns, copy=False)
+
+    def attributes(self) -> pa.Table:
+        """属性列のArrowテーブル（マップ上のバッファをそのまま参照）."""
+        return self.table.select(self.columns).replace_schema_metadata(None)
+
+    def lattice(self) -> Optional[GridLattice]:
+        """保存された行・列番号から格子を復元（規則格子でない場合None）."""
+        params = self.metadata.get("lattice")
+        if params is None or len(self) == 0:
+            return None
+        return GridLattice(
+            params["origin_x"], params["origin_y"], params["cell_size"], params["crs"],
+            self._values(COL_COLUMN), self._values(ROW_COLUMN)
+        )
+
+    def _ring(self) -> np.ndarray:
+        """外周座標の (n, 頂点数, 2) ビュー."""
+        size = self.metadata["geometry"]["size"]
+        values = self.table.column(RING_COLUMN).chunk(0).values
+        return values.to_numpy(zero_copy_only=False).reshape(len(self), size, 2)
+
+    def geometries(self, positions: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        セルのジオメトリを組み立てる（保存時のCRS）.
+
+        Args:
+            positions: セル位置（Noneの場合は全セル）
+
+        Returns:
+            shapelyオブジェクトの配列
+        """
+        if self.metadata["geometry"]["encoding"] == "ring":
+            ring = self._ring() if len(self) else np.empty((0, 1, 2))
+            if positions is not None:
+                ring = ring[positions]
+            if len(ring) == 0:
+                return np.empty(0, dtype=object)
+            return shapely.polygons(ring)
+
+        wkb = self.table.column(WKB_COLUMN)
+        if positions is not None:
+            wkb = wkb.take(pa.array(np.asarray(positions, dtype=np.int64)))
+        return shapely.from_wkb(wkb.to_numpy(zero_copy_only=False))
+
+    def bounds(self) -> np.ndarray:
+        """セル範囲 (minx, miny, maxx, maxy)。外周座標から直接計算."""
+        if self.metadata["geometry"]["encoding"] != "ring":
+            return shapely.bounds(self.geometries())
+        ring = self._ring()
+        return np.column_stack([
+            ring[:, :, 0].min(axis=1), ring[:, :, 1].min(axis=1),
+            ring[:, :, 0].max(axis=1), ring[:, :, 1].max(axis=1)
+        ])
+
+    def to_geodataframe(self) -> gpd.GeoDataFrame:
+        """ジオメトリ付きのGeoDataFrameを組み立てる（元のWIグリッドと同じ列）."""
+        name = self.metadata["geometry_column"]
+        frame = self.frame()
+        frame[name] = self.geometries()
+        return gpd.GeoDataFrame(frame[self.metadata["column_order"]], geometry=name, crs=self.crs)
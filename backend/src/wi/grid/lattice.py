@@ -0,0 +1,213 @@
+"""規則格子としてのグリッド表現."""
+
+from typing import Optional, Tuple
+
+import geopandas as gpd
+import numpy as np
+import shapely
+from loguru import logger
+
+from ..config import get_config
+
+
+class GridLattice:
+    """
+    GridGeneratorが生成した規則格子のインデックス.
+
+    グリッドIDの ``{area}_{i:05d}_{j:05d}`` (i: x方向の列, j: y方向の行) と
+    投影座標系でのセル範囲から、格子の原点・セルサイズ・行列数を復元し、
+    (行, 列) → データフレーム上の位置の対応表を保持します。
+    """
+
+    def __init__(
+        self,
+        origin_x: float,
+        origin_y: float,
+        cell_size: float,
+        crs: str,
+        cols: np.ndarray,
+        rows: np.ndarray
+    ):
+        """
+        初期化.
+
+        Args:
+            origin_x: 列0の左端（投影座標）
+            origin_y: 行0の下端（投影座標）
+            cell_size: セルサイズ（メートル）
+            crs: 投影座標系
+            cols: 各セルの列番号（データフレームの行順）
+            rows: 各セルの行番号（データフレームの行順）
+        """
+        self.origin_x = float(origin_x)
+        self.origin_y = float(origin_y)
+        self.cell_size = float(cell_size)
+        self.crs = crs
+
+        # 範囲を0始まりに正規化
+        col_offset, row_offset = int(cols.min()), int(rows.min())
+        self.origin_x += col_offset * self.cell_size
+        self.origin_y += row_offset * self.cell_size
+        self.cols = (cols - col_offset).astype(np.int32)
+        self.rows = (rows - row_offset).astype(np.int32)
+
+        self.n_cols = int(self.cols.max()) + 1
+        self.n_rows = int(self.rows.max()) + 1
+
+        # (行, 列) → 位置（セルがない場合 -1）
+        self.cell_index = np.full((self.n_rows, self.n_cols), -1, dtype=np.int32)
+        self.cell_index[self.rows, self.cols] = np.arange(len(self.cols), dtype=np.int32)
+
+    @classmethod
+    def from_grid(
+        cls,
+        grid: gpd.GeoDataFrame,
+        crs: Optional[str] = None,
+        tolerance: float = 0.01
+    ) -> Optional["GridLattice"]:
+        """
+        グリッドGeoDataFrameから格子を復元.
+
+        Args:
+            grid: grid_id と geometry を持つGeoDataFrame
+            crs: 格子の投影座標系（Noneの場合は設定から）
+            tolerance: セルサイズに対する許容誤差（割合）
+
+        Returns:
+            GridLattice。規則格子でない場合None
+        """
+        if len(grid) == 0 or "grid_id" not in grid.columns:
+            return None
+
+        crs = crs or get_config().get_grid_config().get("crs", "EPSG:6677")
+
+        try:
+            parts = grid["grid_id"].astype(str).str.rsplit("_", n=2, expand=True)
+            cols = parts[1].astype(np.int64).to_numpy()
+            rows = parts[2].astype(np.int64).to_numpy()
+        except (KeyError, ValueError):
+            logger.info("Grid IDs are not lattice indices; treating grid as irregular")
+            return None
+
+        if len(np.unique(cols * (rows.max() + 1) + rows)) != len(cols):
+            logger.info("Duplicate lattice indices; treating grid as irregular")
+            return None
+
+        projected = grid.geometry
+        if grid.crs is not None and grid.crs != crs:
+            projected = projected.to_crs(crs)
+
+        bounds = shapely.bounds(projected.values)
+        widths = bounds[:, 2] - bounds[:, 0]
+        cell_size = float(np.round(np.median(widths), 6))
+        if cell_size <= 0:
+            return None
+
+        origin_x = float(np.median(bounds[:, 0] - cols * cell_size))
+        origin_y = float(np.median(bounds[:, 1] - rows * cell_size))
+
+        residual = np.maximum(
+            np.abs(bounds[:, 0] - (origin_x + cols * cell_size)),
+            np.abs(bounds[:, 1] - (origin_y + rows * cell_size))
+        ).max()
+        if residual > cell_size * tolerance:
+            logger.info(f"Cells deviate from lattice by {residual:.2f}m; treating grid as irregular")
+            return None
+
+        return cls(origin_x, origin_y, cell_size, crs, cols, rows)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        """(行数, 列数)."""
+        return self.n_rows, self.n_cols
+
+    def window(self, positions: np.ndarray) -> Tuple[int, int, int, int]:
+        """
+        指定セルを含む最小の窓を取得.
+
+        Args:
+            positions: データフレーム上の位置
+
+        Returns:
+            (row0, row1, col0, col1)。row1, col1 は含まない
+        """
+        if len(positions) == 0:
+            return 0, 0, 0, 0
+        rows = self.rows[positions]
+        cols = self.cols[positions]
+        return int(rows.min()), int(rows.max()) + 1, int(cols.min()), int(cols.max()) + 1
+
+    def rasterize(
+        self,
+        values: np.ndarray,
+        window: Optional[Tuple[int, int, int, int]] = None,
+        positions: Optional[np.ndarray] = None,
+        fill: float = np.nan
+    ) -> np.ndarray:
+        """
+        セル値を2次元配列に並べる.
+
+        配列の行0は北端（画像と同じ向き）です。
+
+        Args:
+            values: データフレーム行順の値
+            window: (row0, row1, col0, col1)。Noneの場合は全体
+            positions: 出力に含めるセル位置（Noneの場合は窓内の全セル）
+            fill: セルがない位置の値
+
+        Returns:
+            (高さ, 幅) の配列
+        """
+        row0, row1, col0, col1 = window or (0, self.n_rows, 0, self.n_cols)
+        raster = np.full((row1 - row0, col1 - col0), fill, dtype=float)
+
+        index = self.cell_index[row0:row1, col0:col1]
+        if positions is not None:
+            keep = np.zeros(len(self.cols), dtype=bool)
+            keep[positions] = True
+            present = (index >= 0) & keep[np.maximum(index, 0)]
+        else:
+            present = index >= 0
+
+        raster[present] = np.asarray(values, dtype=float)[index[present]]
+
+        return raster[::-1]
+
+    def locate(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """
+        投影座標の点を含むセルの位置を算術的に求める.
+
+        Args:
+            x: x座標（投影座標）
+            y: y座標（投影座標）
+
+        Returns:
+            データフレーム上の位置。格子外・セルがない場合 -1
+        """
+        cols = np.floor((np.asarray(x, dtype=float) - self.origin_x) / self.cell_size)
+        rows = np.floor((np.asarray(y, dtype=float) - self.origin_y) / self.cell_size)
+
+        inside = (cols >= 0) & (cols < self.n_cols) & (rows >= 0) & (rows < self.n_rows)
+        positions = np.full(cols.shape, -1, dtype=np.int64)
+        positions[inside] = self.cell_index[rows[inside].astype(np.int64), cols[inside].astype(np.int64)]
+
+        return positions
+
+    def centroids(self) -> np.ndarray:
+        """
+        各セル中心の投影座標（データフレーム行順, shape (n, 2)）.
+        """
+        return np.column_stack([
+            self.origin_x + (self.cols + 0.5) * self.cell_size,
+            self.origin_y + (self.rows + 0.5) * self.cell_size
+        ])
+
+    def window_transform(self, window: Tuple[int, int, int, int]) -> Tuple[float, ...]:
+        """
+        窓のアフィン変換（GDAL形式: x0, dx, 0, y_top, 0, -dy）.
+        """
+        row0, row1, col0, _ = window
+        return (
+            self.origin_x + col0 * self.cell_size, self.cell_size, 0.0,
+            self.origin_y + row1 * self.cell_size, 0.0, -self.cell_size
+        )
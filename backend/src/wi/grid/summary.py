@@ -0,0 +1,385 @@
+"""格子上のスコア統計（累積和テーブル・ブロック別ヒストグラム）."""
+
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from .lattice import GridLattice
+
+# 統計と一緒に返すパーセンタイル
+PERCENTILES = (10, 25, 75, 90)
+
+
+def compute_statistics(values: np.ndarray) -> Dict[str, object]:
+    """
+    スコア配列の統計を厳密に計算.
+
+    Args:
+        values: スコア配列（NaNは除外）
+
+    Returns:
+        mean, min, max, std（不偏）, median, count, percentiles
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return _empty_statistics()
+
+    quantiles = np.percentile(values, [50, *PERCENTILES])
+    return {
+        "mean": float(values.mean()),
+        "min": float(values.min()),
+        "max": float(values.max()),
+        "std": float(values.std(ddof=1)) if len(values) > 1 else 0.0,
+        "median": float(quantiles[0]),
+        "count": int(len(values)),
+        "percentiles": {f"p{p}": float(q) for p, q in zip(PERCENTILES, quantiles[1:])},
+        "quantile_error": 0.0
+    }
+
+
+def compute_weighted_statistics(values: np.ndarray, weights: np.ndarray) -> Dict[str, object]:
+    """
+    重み付きの統計（部分的に含まれるセルを面積比で重み付けする場合など）.
+
+    Args:
+        values: スコア配列（NaNは除外）
+        weights: 重み（0以下のセルは除外）
+
+    Returns:
+        compute_statistics と同じ形式の辞書と、重みの合計 ``weight``。
+        std は重み付き分散の平方根、中央値・パーセンタイルは重み付き分位点
+    """
+    values = np.asarray(values, dtype=float)
+    weights = np.asarray(weights, dtype=float)
+    keep = np.isfinite(values) & (weights > 0)
+    values, weights = values[keep], weights[keep]
+    if len(values) == 0:
+        return dict(_empty_statistics(), weight=0.0)
+
+    total = float(weights.sum())
+    mean = float(np.average(values, weights=weights))
+    variance = float(np.average((values - mean) ** 2, weights=weights))
+
+    order = np.argsort(values)
+    cumulative = np.cumsum(weights[order]) - weights[order] / 2
+    quantiles = np.interp(
+        np.array([50, *PERCENTILES]) / 100 * total, cumulative, values[order]
+    )
+
+    return {
+        "mean": mean,
+        "min": float(values.min()),
+        "max": float(values.max()),
+        "std": float(np.sqrt(variance)),
+        "median": float(quantiles[0]),
+        "count": int(len(values)),
+        "percentiles": {f"p{p}": float(q) for p, q in zip(PERCENTILES, quantiles[1:])},
+        "quantile_error": 0.0,
+        "weight": total
+    }
+
+
+def compute_difference_statistics(a: np.ndarray, b: np.ndarray) -> Dict[str, object]:
+    """
+    セルごとに対応づけた2つのスコア配列の差分統計.
+
+    差分は ``a - b``（正: a が高い）。どちらかがNaNのセルは除外します。
+
+    Args:
+        a: スコア配列
+        b: a と同じセル順のスコア配列
+
+    Returns:
+        差分の compute_statistics に、a_higher / b_higher / unchanged（セル数）、
+        mean_abs（平均絶対差）、rmse、correlation（相関係数）を加えた辞書
+    """
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    keep = np.isfinite(a) & np.isfinite(b)
+    a, b = a[keep], b[keep]
+    delta = a - b
+
+    stats = compute_statistics(delta)
+    correlation = 0.0
+    if len(delta) > 1 and a.std() > 0 and b.std() > 0:
+        correlation = float(np.corrcoef(a, b)[0, 1])
+
+    stats.update({
+        "a_higher": int((delta > 0).sum()),
+        "b_higher": int((delta < 0).sum()),
+        "unchanged": int((delta == 0).sum()),
+        "mean_abs": float(np.abs(delta).mean()) if len(delta) else 0.0,
+        "rmse": float(np.sqrt((delta ** 2).mean())) if len(delta) else 0.0,
+        "correlation": correlation
+    })
+    return stats
+
+
+def _empty_statistics() -> Dict[str, object]:
+    return {
+        "mean": 0.0,
+        "min": 0.0,
+        "max": 0.0,
+        "std": 0.0,
+        "median": 0.0,
+        "count": 0,
+        "percentiles": {f"p{p}": 0.0 for p in PERCENTILES},
+        "quantile_error": 0.0
+    }
+
+
+class GridSummary:
+    """
+    規則格子上のスコアの窓統計.
+
+    セル単位の累積和テーブル（個数・和・二乗和）により、任意の矩形窓の
+    count / mean / std を4回の参照で求めます。
+
+    中央値・パーセンタイルは ``block_size`` 四方のブロックごとのヒストグラム
+    （全体の値域を ``bins`` 等分）の累積和から求め、窓の縁にかかる
+    ブロックのセルだけを直接集計します。順位の前後の値をそれぞれビン内で
+    線形補間して推定するため、値の間に空のビンがあっても誤差は最大1ビン幅
+    （``quantile_error``、WI 0-100・256ビンで約0.4）です。
+    縁のセルだけで窓が構成される小さな窓では厳密値になります。
+    min / max はブロック別の最小・最大値と縁のセルから厳密に求めます。
+    """
+
+    def __init__(
+        self,
+        lattice: GridLattice,
+        values: np.ndarray,
+        block_size: int = 16,
+        bins: int = 256
+    ):
+        """
+        初期化.
+
+        Args:
+            lattice: 格子
+            values: データフレーム行順のスコア
+            block_size: ヒストグラムのブロックサイズ（セル数）
+            bins: ヒストグラムのビン数
+        """
+        self.lattice = lattice
+        self.block_size = block_size
+        self.bins = bins
+
+        values = np.asarray(values, dtype=float)
+        raster = lattice.rasterize(values)[::-1]  # 行0 = 南端（格子の行番号順）
+        valid = np.isfinite(raster)
+        self.values = np.where(valid, raster, 0.0)
+        self.valid = valid
+
+        finite = values[np.isfinite(values)]
+        self.low = float(finite.min()) if len(finite) else 0.0
+        self.high = float(finite.max()) if len(finite) else 0.0
+        self.bin_width = (self.high - self.low) / bins if self.high > self.low else 0.0
+
+        # 桁落ちを避けるため全体平均を引いてから累積
+        self.shift = float(finite.mean()) if len(finite) else 0.0
+        centered = np.where(valid, raster - self.shift, 0.0)
+        self.count_table = self._summed_area(valid.astype(np.int64))
+        self.sum_table = self._summed_area(centered)
+        self.sumsq_table = self._summed_area(centered * centered)
+
+        # ブロック別の最小・最大・ヒストグラム
+        n_rows, n_cols = lattice.shape
+        self.block_rows = n_rows // block_size
+        self.block_cols = n_cols // block_size
+        full = raster[:self.block_rows * block_size, :self.block_cols * block_size]
+        blocks = full.reshape(self.block_rows, block_size, self.block_cols, block_size).swapaxes(1, 2)
+        blocks = blocks.reshape(self.block_rows, self.block_cols, -1)
+
+        finite_blocks = np.isfinite(blocks)
+        self.block_min = np.where(finite_blocks, blocks, np.inf).min(axis=2)
+        self.block_max = np.where(finite_blocks, blocks, -np.inf).max(axis=2)
+
+        bin_index = self._bin(blocks)
+        block_id = np.arange(self.block_rows * self.block_cols).reshape(self.block_rows, self.block_cols, 1)
+        keys = (block_id * bins + bin_index)[bin_index >= 0]
+        histograms = np.bincount(keys, minlength=self.block_rows * self.block_cols * bins)
+        histograms = histograms.reshape(self.block_rows, self.block_cols, bins)
+        self.histogram_table = np.zeros((self.block_rows + 1, self.block_cols + 1, bins), dtype=np.int32)
+        self.histogram_table[1:, 1:] = histograms.cumsum(axis=0).cumsum(axis=1)
+
+    @staticmethod
+    def _summed_area(array: np.ndarray) -> np.ndarray:
+        """先頭に0の行・列を付けた累積和テーブル."""
+        table = np.zeros((array.shape[0] + 1, array.shape[1] + 1), dtype=array.dtype)
+        table[1:, 1:] = array.cumsum(axis=0).cumsum(axis=1)
+        return table
+
+    @staticmethod
+    def _rect(table: np.ndarray, row0: int, row1: int, col0: int, col1: int):
+        """累積和テーブルから矩形の合計を取得."""
+        return table[row1, col1] - table[row0, col1] - table[row1, col0] + table[row0, col0]
+
+    def _bin(self, values: np.ndarray) -> np.ndarray:
+        """値をビン番号に変換（NaNは -1）."""
+        finite = np.isfinite(values)
+        if self.bin_width == 0:
+            return np.where(finite, 0, -1)
+        index = np.floor((np.where(finite, values, self.low) - self.low) / self.bin_width)
+        return np.where(finite, np.clip(index, 0, self.bins - 1).astype(np.int64), -1)
+
+    def window_statistics(
+        self,
+        window: Optional[Tuple[int, int, int, int]] = None,
+        positions: Optional[np.ndarray] = None
+    ) -> Dict[str, object]:
+        """
+        矩形窓の統計.
+
+        Args:
+            window: (row0, row1, col0, col1)。Noneの場合は全体
+            positions: 窓内で対象とするセル位置（昇順）。窓内のそれ以外の
+                セルは除外する（除外セルが窓の縁付近にある場合に効率的）
+
+        Returns:
+            compute_statistics と同じ形式の辞書
+        """
+        n_rows, n_cols = self.lattice.shape
+        row0, row1, col0, col1 = window or (0, n_rows, 0, n_cols)
+        if row1 <= row0 or col1 <= col0:
+            return _empty_statistics()
+
+        count = int(self._rect(self.count_table, row0, row1, col0, col1))
+        total = float(self._rect(self.sum_table, row0, row1, col0, col1))
+        total_sq = float(self._rect(self.sumsq_table, row0, row1, col0, col1))
+
+        # 対象外のセルを窓の外周から内側へ探して差し引く
+        excluded = np.empty(0, dtype=np.int64)  # 格子上のセル番号（行 × 列数 + 列）
+        ring = 0
+        if positions is not None:
+            missing = count - len(positions)
+            while len(excluded) < missing and 2 * ring < min(row1 - row0, col1 - col0):
+                rows, cols = self._ring(row0 + ring, row1 - ring, col0 + ring, col1 - ring)
+                cells = self.lattice.cell_index[rows, cols]
+                hit = np.searchsorted(positions, cells)
+                member = (hit < len(positions)) & (positions[np.minimum(hit, len(positions) - 1)] == cells)
+                drop = self.valid[rows, cols] & ~member
+                excluded = np.concatenate([excluded, rows[drop] * n_cols + cols[drop]])
+                ring += 1
+
+            if len(excluded):
+                dropped = self.values.ravel()[excluded] - self.shift
+                count -= len(excluded)
+                total -= float(dropped.sum())
+                total_sq -= float((dropped * dropped).sum())
+
+        if count <= 0:
+            return _empty_statistics()
+
+        mean = total / count
+        variance = (total_sq - total * total / count) / (count - 1) if count > 1 else 0.0
+
+        # 外周（ring）より内側に完全に収まるブロック
+        b = self.block_size
+        br0 = min(-(-(row0 + ring) // b), self.block_rows)
+        br1 = max(min((row1 - ring) // b, self.block_rows), br0)
+        bc0 = min(-(-(col0 + ring) // b), self.block_cols)
+        bc1 = max(min((col1 - ring) // b, self.block_cols), bc0)
+        if br1 <= br0 or bc1 <= bc0:
+            br0 = br1 = bc0 = bc1 = 0
+
+        # ブロック外の縁のセルは直接集計
+        edge_values = self._edge_values(
+            (row0, row1, col0, col1), (br0 * b, br1 * b, bc0 * b, bc1 * b), excluded
+        )
+
+        if br1 == br0:
+            return compute_statistics(edge_values)
+
+        histogram = self.histogram_table[br1, bc1] - self.histogram_table[br0, bc1] \
+            - self.histogram_table[br1, bc0] + self.histogram_table[br0, bc0]
+        histogram = histogram + np.bincount(self._bin(edge_values), minlength=self.bins)
+
+        minimum = float(self.block_min[br0:br1, bc0:bc1].min())
+        maximum = float(self.block_max[br0:br1, bc0:bc1].max())
+        if len(edge_values):
+            minimum = min(minimum, float(edge_values.min()))
+            maximum = max(maximum, float(edge_values.max()))
+
+        quantiles = self._histogram_quantiles(histogram, [50, *PERCENTILES], minimum, maximum)
+
+        return {
+            "mean": self.shift + mean,
+            "min": minimum,
+            "max": maximum,
+            "std": float(np.sqrt(max(variance, 0.0))),
+            "median": quantiles[0],
+            "count": count,
+            "percentiles": {f"p{p}": q for p, q in zip(PERCENTILES, quantiles[1:])},
+            "quantile_error": self.bin_width
+        }
+
+    @staticmethod
+    def _ring(row0: int, row1: int, col0: int, col1: int) -> Tuple[np.ndarray, np.ndarray]:
+        """矩形の外周セルの (行, 列)."""
+        cols = np.arange(col0, col1)
+        rows = np.arange(row0 + 1, row1 - 1)
+        ring_rows = [np.full(len(cols), row0)]
+        ring_cols = [cols]
+        if row1 - 1 > row0:
+            ring_rows.append(np.full(len(cols), row1 - 1))
+            ring_cols.append(cols)
+        ring_rows.append(rows)
+        ring_cols.append(np.full(len(rows), col0))
+        if col1 - 1 > col0:
+            ring_rows.append(rows)
+            ring_cols.append(np.full(len(rows), col1 - 1))
+        return np.concatenate(ring_rows), np.concatenate(ring_cols)
+
+    def _edge_values(self, window, inner, excluded: np.ndarray) -> np.ndarray:
+        """窓から内側の矩形を除いた部分（最大4つの帯）の有効な値."""
+        row0, row1, col0, col1 = window
+        in_row0, in_row1, in_col0, in_col1 = inner
+        if in_row1 <= in_row0:
+            strips = [(row0, row1, col0, col1)]
+        else:
+            strips = [
+                (row0, in_row0, col0, col1),
+                (in_row1, row1, col0, col1),
+                (in_row0, in_row1, col0, in_col0),
+                (in_row0, in_row1, in_col1, col1),
+            ]
+
+        n_cols = self.lattice.n_cols
+        values = []
+        for r0, r1, c0, c1 in strips:
+            if r1 <= r0 or c1 <= c0:
+                continue
+            valid = self.valid[r0:r1, c0:c1]
+            if len(excluded):
+                rows, cols = np.nonzero(valid)
+                keep = ~np.isin((rows + r0) * n_cols + cols + c0, excluded)
+                values.append(self.values[r0:r1, c0:c1][rows[keep], cols[keep]])
+            else:
+                values.append(self.values[r0:r1, c0:c1][valid])
+
+        return np.concatenate(values) if values else np.empty(0)
+
+    def _histogram_quantiles(self, histogram: np.ndarray, percents, minimum: float, maximum: float):
+        """
+        ヒストグラムからパーセンタイルを推定.
+
+        np.percentile と同じく順位の前後の順序統計量を線形補間します。
+        各順序統計量はそれぞれのビン内の線形補間で推定する（誤差1ビン幅未満）
+        ため、前後の値が空のビンを挟んで離れていても誤差は1ビン幅に収まります。
+        """
+        cumulative = np.cumsum(histogram)
+        ranks = np.asarray(percents, dtype=float) / 100 * (cumulative[-1] - 1)
+        lower = np.floor(ranks)
+        below = self._order_statistics(histogram, cumulative, lower, minimum, maximum)
+        above = self._order_statistics(
+            histogram, cumulative, np.minimum(lower + 1, cumulative[-1] - 1), minimum, maximum
+        )
+        return (below + (ranks - lower) * (above - below)).tolist()
+
+    def _order_statistics(self, histogram, cumulative, ranks, minimum: float, maximum: float) -> np.ndarray:
+        """順位（0始まり）の値をビン内の線形補間で推定."""
+        bins = np.minimum(np.searchsorted(cumulative, ranks, side="right"), self.bins - 1)
+        before = np.where(bins > 0, cumulative[bins - 1], 0)
+        fraction = (ranks - before + 0.5) / np.maximum(histogram[bins], 1)
+        return np.clip(self.low + (bins + fraction) * self.bin_width, minimum, maximum)
@@ -0,0 +1,412 @@
+"""
+Phase 2パイプライン（WI計算・再スコアリング・公開）.
+
+CLI（scripts/phase2_compute_wi.py, scripts/build_tiles.py）と
+APIのジョブワーカーの両方から呼ばれます。出力はすべて一時ファイルに
+書いてから置き換えるため、稼働中のAPIが書きかけのファイルを読むことは
+なく、カタログ更新後にバックグラウンドで再読み込みされます。
+"""
+
+import json
+import shutil
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import geopandas as gpd
+import pandas as pd
+from loguru import logger
+from shapely.geometry import box
+
+from .catalog import describe_dataset, file_version, publish_path, update_catalog
+from .config import get_config
+from .grid import GridGenerator, compute_statistics
+from .scoring import WalkabilityCalculator
+from .tiles import TileArchiveBuilder
+
+# 進捗コールバック: progress(0.0～1.0, メッセージ)
+ProgressCallback = Callable[[float, str], None]
+
+
+def _no_progress(fraction: float, message: str):
+    pass
+
+
+def _step(progress: ProgressCallback, fraction: float, message: str):
+    """ステップ開始をログと進捗コールバックに通知."""
+    logger.info("\n" + "=" * 60)
+    logger.info(message)
+    logger.info("=" * 60)
+    progress(fraction, message)
+
+
+def find_amenities_file(data_dir: Path, area: str, profile: str) -> Optional[Path]:
+    """アメニティファイルを探す（Phase 1出力 → rawディレクトリの順）."""
+    candidates = [
+        data_dir / f"amenities_{profile}.geojson",
+        data_dir.parent / "raw" / f"amenities_{area}.parquet",
+        data_dir.parent / "raw" / f"amenities_{area}.geojson",
+    ]
+    for path in candidates:
+        if path.exists():
+            return path
+    return None
+
+
+def input_files(area: str, profile: str, data_dir: Path, kind: str) -> Dict[str, Path]:
+    """
+    パイプラインの入力ファイル.
+
+    Args:
+        area: エリア名
+        profile: プロファイル名
+        data_dir: データディレクトリ
+        kind: "phase2"（Phase 1出力からの全計算）または
+            "rescore"（保存済みの距離からのWI再計算）
+
+    Returns:
+        役割 → パス（存在するもののみ。任意のファイルは欠けていてもよい）
+
+    Raises:
+        FileNotFoundError: 必須の入力ファイルがない場合
+    """
+    data_dir = Path(data_dir)
+    if kind == "phase2":
+        required = {
+            "amenities": data_dir / f"amenities_{profile}.geojson",
+            "network": data_dir / "walking_network.graphml",
+        }
+        optional = {}
+    elif kind == "rescore":
+        required = {"distances": data_dir / f"distances_{area}_{profile}.parquet"}
+        # セル形状はPhase 2のグリッドファイル、なければ公開中のWIファイルから
+        optional = {
+            "grid": data_dir / f"grid_{area}_{profile}.geojson",
+            "wi": data_dir / f"wi_{area}_{profile}.parquet",
+        }
+        if not optional["grid"].exists() and not optional["wi"].exists():
+            raise FileNotFoundError(f"Grid not found for {area}/{profile}: {optional['grid']}")
+    else:
+        raise ValueError(f"Unknown pipeline: {kind}")
+
+    for role, path in required.items():
+        if not path.exists():
+            raise FileNotFoundError(f"{role.capitalize()} file not found: {path}")
+
+    return {role: path for role, path in {**required, **optional}.items() if path.exists()}
+
+
+def build_tiles(
+    area: str,
+    profile: str,
+    data_dir: Path,
+    min_zoom: int = 10,
+    max_zoom: int = 16,
+    workers: int = None,
+    force: bool = False,
+    grid: gpd.GeoDataFrame = None,
+    amenities: gpd.GeoDataFrame = None
+) -> Path:
+    """
+    エリア×プロファイルのタイルアーカイブを生成.
+
+    既存のアーカイブがある場合は、そのコピー上で内容が変わったタイルのみ
+    再エンコードし、完成したアーカイブで置き換えます。
+
+    Args:
+        area: エリア名
+        profile: プロファイル名
+        data_dir: wi_*.parquet のあるディレクトリ
+        min_zoom: 最小ズーム
+        max_zoom: 最大ズーム
+        workers: ワーカープロセス数
+        force: 全タイルを再エンコード
+        grid: WIグリッド（省略時はParquetから読み込み）
+        amenities: アメニティ（省略時はファイルから読み込み）
+
+    Returns:
+        出力パス
+    """
+    wi_parquet = data_dir / f"wi_{area}_{profile}.parquet"
+    if not wi_parquet.exists():
+        raise FileNotFoundError(f"WI data not found: {wi_parquet}")
+
+    if grid is None:
+        grid = gpd.read_parquet(wi_parquet)
+
+    if amenities is None:
+        amenities_file = find_amenities_file(data_dir, area, profile)
+        if amenities_file is not None:
+            logger.info(f"Amenity layer: {amenities_file}")
+            if amenities_file.suffix == ".parquet":
+                amenities = gpd.read_parquet(amenities_file)
+            else:
+                amenities = gpd.read_file(amenities_file)
+
+    output_path = data_dir / f"tiles_{area}_{profile}.mbtiles"
+
+    builder = TileArchiveBuilder(
+        grid,
+        amenities=amenities,
+        min_zoom=min_zoom,
+        max_zoom=max_zoom,
+        workers=workers
+    )
+    # 配信中のアーカイブは書き換えず、コピーを差分更新してから置き換える
+    # （APIは置き換えまで旧アーカイブをロックなしで読み続ける）
+    with publish_path(output_path) as tmp:
+        if output_path.exists() and not force:
+            shutil.copyfile(output_path, tmp)
+        builder.build(
+            tmp,
+            name=f"wi_{area}_{profile}",
+            force=force,
+            # APIはこの値がWIファイルと一致する場合のみアーカイブを配信する
+            metadata={"source_version": file_version(wi_parquet)}
+        )
+
+    return output_path
+
+
+def compute_wi(
+    area: str,
+    profile: str,
+    data_dir: Path,
+    output_dir: Optional[Path] = None,
+    max_distance: int = 1000,
+    skip_tiles: bool = False,
+    tile_workers: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None
+) -> Dict[str, Any]:
+    """
+    Phase 2の全工程（グリッド生成 → 歩行距離 → WI → 公開）.
+
+    Args:
+        area: エリア名
+        profile: プロファイル名
+        data_dir: Phase 1の出力ディレクトリ
+        output_dir: 出力ディレクトリ（省略時はdata_dir）
+        max_distance: 最大歩行距離（メートル）
+        skip_tiles: タイルアーカイブを生成しない
+        tile_workers: タイル生成のワーカープロセス数
+        progress: 進捗コールバック
+
+    Returns:
+        結果の要約（統計量と出力ファイル）
+
+    Raises:
+        FileNotFoundError: Phase 1の出力がない場合
+        ValueError: プロファイルが未定義の場合
+    """
+    # osmnxの読み込みは重いため、ネットワークが必要な全工程でのみ
+    from .network import WalkingDistanceCalculator, WalkingNetworkBuilder
+
+    progress = progress or _no_progress
+    data_dir = Path(data_dir)
+    output_dir = Path(output_dir) if output_dir is not None else data_dir
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    get_config().get_profile(profile)
+    inputs = input_files(area, profile, data_dir, "phase2")
+
+    # === Load data ===
+    _step(progress, 0.0, "Loading data...")
+
+    amenities = gpd.read_file(inputs["amenities"])
+    logger.info(f"Loaded amenities: {len(amenities)}")
+
+    network = WalkingNetworkBuilder().load(inputs["network"])
+    logger.info(f"Loaded network: {len(network.nodes())} nodes")
+
+    # === Generate grid ===
+    _step(progress, 0.1, "Generating 50m grid...")
+
+    grid_generator = GridGenerator(cell_size=50)
+
+    # エリア境界を取得（アメニティから推定）
+    boundary_geom = gpd.GeoDataFrame(
+        {'geometry': [box(*amenities.total_bounds)]},
+        crs=amenities.crs
+    )
+    grid = grid_generator.generate(boundary_geom, area)
+    logger.info(f"Generated grid: {len(grid)} cells")
+
+    grid_file = output_dir / f"grid_{area}_{profile}.geojson"
+    with publish_path(grid_file) as tmp:
+        grid.to_file(tmp, driver='GeoJSON')
+    logger.info(f"Saved grid: {grid_file}")
+
+    # === Calculate distances ===
+    _step(progress, 0.2, "Calculating walking distances...")
+
+    distance_calculator = WalkingDistanceCalculator(network)
+    distances_df = distance_calculator.calculate_distances_batch(
+        grid,
+        amenities,
+        max_distance=max_distance
+    )
+    logger.info(f"Calculated {len(distances_df)} distance pairs")
+
+    distances_file = output_dir / f"distances_{area}_{profile}.parquet"
+    with publish_path(distances_file) as tmp:
+        distances_df.to_parquet(tmp)
+    logger.info(f"Saved distances: {distances_file}")
+
+    return _score_and_publish(
+        area, profile, output_dir, grid, distances_df,
+        files={'distances': distances_file, 'grid': grid_file},
+        amenities=amenities,
+        skip_tiles=skip_tiles,
+        tile_workers=tile_workers,
+        progress=progress,
+        start=0.6
+    )
+
+
+def rescore_wi(
+    area: str,
+    profile: str,
+    data_dir: Path,
+    skip_tiles: bool = False,
+    tile_workers: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None
+) -> Dict[str, Any]:
+    """
+    保存済みの歩行距離からWIを再計算して公開（プロファイル設定の変更後など）.
+
+    グリッド生成と距離計算を省くため、Phase 2全体よりはるかに短時間です。
+
+    Args:
+        area: エリア名
+        profile: プロファイル名（現在のprofiles.yamlの設定で計算）
+        data_dir: Phase 2の出力ディレクトリ
+        skip_tiles: タイルアーカイブを生成しない
+        tile_workers: タイル生成のワーカープロセス数
+        progress: 進捗コールバック
+
+    Returns:
+        結果の要約（統計量と出力ファイル）
+
+    Raises:
+        FileNotFoundError: 距離またはグリッドのファイルがない場合
+        ValueError: プロファイルが未定義の場合
+    """
+    progress = progress or _no_progress
+    data_dir = Path(data_dir)
+
+    get_config().get_profile(profile)
+    inputs = input_files(area, profile, data_dir, "rescore")
+
+    _step(progress, 0.0, "Loading grid and distances...")
+
+    if "grid" in inputs:
+        grid = gpd.read_file(inputs["grid"])
+    else:
+        # グリッドファイルがない場合は公開中のWIファイルからスコア列を除いて復元
+        published = gpd.read_parquet(inputs["wi"])
+        score_columns = [c for c in published.columns if c == 'wi_score' or c.startswith('score_')]
+        grid = published.drop(columns=score_columns)
+    distances_df = pd.read_parquet(inputs["distances"])
+    logger.info(f"Loaded grid: {len(grid)} cells, {len(distances_df)} distance pairs")
+
+    return _score_and_publish(
+        area, profile, data_dir, grid, distances_df,
+        files={role: path for role, path in inputs.items() if role in ('distances', 'grid')},
+        amenities=None,
+        skip_tiles=skip_tiles,
+        tile_workers=tile_workers,
+        progress=progress,
+        start=0.1
+    )
+
+
+def _score_and_publish(
+    area: str,
+    profile: str,
+    output_dir: Path,
+    grid: gpd.GeoDataFrame,
+    distances_df: pd.DataFrame,
+    files: Dict[str, Path],
+    amenities: Optional[gpd.GeoDataFrame],
+    skip_tiles: bool,
+    tile_workers: Optional[int],
+    progress: ProgressCallback,
+    start: float
+) -> Dict[str, Any]:
+    """WI計算・保存・統計・タイル・カタログ更新（compute_wiとrescore_wiの共通部分）."""
+    # === Calculate WI ===
+    _step(progress, start, "Calculating Walkability Index...")
+
+    wi_calculator = WalkabilityCalculator(profile)
+    grid_with_wi = wi_calculator.calculate_wi_for_grid(grid, distances_df)
+
+    # === Save results ===
+    _step(progress, start + (1 - start) * 0.5, "Saving results...")
+
+    wi_geojson = output_dir / f"wi_{area}_{profile}.geojson"
+    with publish_path(wi_geojson) as tmp:
+        grid_with_wi.to_file(tmp, driver='GeoJSON')
+    logger.info(f"Saved WI (GeoJSON): {wi_geojson}")
+
+    # Parquet (より効率的)
+    # 一時ファイルに書いてから置き換えるため、稼働中のAPIが書きかけのファイルを読むことはない
+    # （APIはファイルのバージョンの変化を検知してバックグラウンドで再読み込みする）
+    wi_parquet = output_dir / f"wi_{area}_{profile}.parquet"
+    with publish_path(wi_parquet) as tmp:
+        grid_with_wi.to_parquet(tmp)
+    logger.info(f"Saved WI (Parquet): {wi_parquet}")
+
+    # 統計情報（APIが読み込むサイドカー。source_versionがParquetと一致する場合のみ使用）
+    wi_stats = compute_statistics(grid_with_wi['wi_score'].to_numpy())
+    score_stats = {
+        col: compute_statistics(grid_with_wi[col].to_numpy())
+        for col in grid_with_wi.columns if col.startswith('score_')
+    }
+    stats_file = output_dir / f"wi_{area}_{profile}.stats.json"
+    with publish_path(stats_file) as tmp, open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({
+            'area': area,
+            'profile': profile,
+            'source_version': file_version(wi_parquet),
+            'wi_score': wi_stats,
+            'scores': score_stats
+        }, f, ensure_ascii=False, indent=2)
+    logger.info(f"Saved statistics: {stats_file}")
+
+    # === Build tile archive ===
+    tiles_file = None
+    if not skip_tiles:
+        _step(progress, start + (1 - start) * 0.7, "Building vector tile archive...")
+        tiles_file = build_tiles(
+            area, profile, output_dir,
+            workers=tile_workers,
+            grid=grid_with_wi,
+            amenities=amenities
+        )
+
+    # === Update dataset catalog ===
+    # APIはカタログ（catalog.json）でエリア・プロファイルを列挙する
+    _step(progress, start + (1 - start) * 0.95, "Updating dataset catalog...")
+    catalog_file = update_catalog(output_dir, [describe_dataset(
+        area, profile, grid_with_wi,
+        files={
+            'wi': wi_parquet,
+            'stats': stats_file,
+            **files,
+            'tiles': tiles_file or output_dir / f"tiles_{area}_{profile}.mbtiles",
+        },
+        stats={'wi_score': wi_stats, 'scores': score_stats}
+    )])
+    logger.info(f"Updated catalog: {catalog_file}")
+
+    output_files = {'wi_geojson': wi_geojson, 'wi': wi_parquet, 'stats': stats_file, **files, 'catalog': catalog_file}
+    if tiles_file:
+        output_files['tiles'] = tiles_file
+
+    return {
+        'area': area,
+        'profile': profile,
+        'total_cells': len(grid_with_wi),
+        'version': file_version(wi_parquet),
+        'statistics': wi_stats,
+        'files': {role: path.name for role, path in output_files.items()},
+    }
@@ -3,5 +3,6 @@
 from .decay_functions import DecayFunction
 from .calculator import WalkabilityCalculator
 from .profiles import ProfileManager
+from .distance_table import DistanceTable
 
-__all__ = ['DecayFunction', 'WalkabilityCalculator', 'ProfileManager']
+__all__ = ['DecayFunction', 'WalkabilityCalculator', 'ProfileManager', 'DistanceTable']
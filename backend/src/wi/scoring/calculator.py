@@ -72,7 +72,7 @@ class WalkabilityCalculator:
         decay_type = params.get('decay_type', 'exponential')
 
         # 減衰関数を適用
-        decay_fn = Dec ayFunction.get_function(decay_type)
+        decay_fn = DecayFunction.get_function(decay_type)
 
         score = decay_fn(
             distance,
@@ -226,9 +226,9 @@ class WalkabilityCalculator:
 
         point = Point(lon, lat)
 
-        # 最寄りグリッドを検索
-        grid['_distance'] = grid.geometry.distance(point)
-        nearest_grid = grid.loc[grid['_distance'].idxmin()]
+        # 最寄りグリッドを空間インデックスで検索（gridは変更しない）
+        _, positions = grid.sindex.nearest(point)
+        nearest_grid = grid.iloc[int(positions[0])]
 
         grid_id = nearest_grid['grid_id']
 
@@ -4,7 +4,7 @@ import numpy as np
 from typing import Dict, Any
 
 
-class Dec ayFunction:
+class DecayFunction:
     """
     距離減衰関数.
 
@@ -138,6 +138,83 @@ class Dec ayFunction:
             score = 1.0 - (distance - ideal_distance) / (max_distance - ideal_distance)
             return max(score, 0.0)
 
+    @staticmethod
+    def gaussian_vectorized(
+        distances: np.ndarray,
+        ideal_distance: float,
+        max_distance: float,
+        sigma_factor: float = 0.3
+    ) -> np.ndarray:
+        """
+        ガウス減衰関数（ベクトル化版）.
+
+        Args:
+            distances: 距離の配列
+            ideal_distance: 理想距離
+            max_distance: 最大距離
+            sigma_factor: シグマ係数
+
+        Returns:
+            スコアの配列
+        """
+        scores = np.ones_like(distances, dtype=float)
+
+        mask_decay = (distances > ideal_distance) & (distances <= max_distance)
+        mask_zero = distances > max_distance
+
+        if np.any(mask_decay):
+            sigma = (max_distance - ideal_distance) * sigma_factor
+            scores[mask_decay] = np.exp(-((distances[mask_decay] - ideal_distance) / sigma) ** 2)
+
+        scores[mask_zero] = 0.0
+
+        return scores
+
+    @staticmethod
+    def linear_vectorized(
+        distances: np.ndarray,
+        ideal_distance: float,
+        max_distance: float
+    ) -> np.ndarray:
+        """
+        線形減衰関数（ベクトル化版）.
+
+        Args:
+            distances: 距離の配列
+            ideal_distance: 理想距離
+            max_distance: 最大距離
+
+        Returns:
+            スコアの配列
+        """
+        scores = 1.0 - (np.asarray(distances, dtype=float) - ideal_distance) / (max_distance - ideal_distance)
+        return np.clip(scores, 0.0, 1.0)
+
+    @classmethod
+    def get_vectorized(cls, decay_type: str):
+        """
+        ベクトル化版の減衰関数を取得.
+
+        Args:
+            decay_type: 'exponential', 'gaussian', 'linear'
+
+        Returns:
+            減衰関数（距離配列 → スコア配列）
+        """
+        functions = {
+            'exponential': cls.exponential_vectorized,
+            'gaussian': cls.gaussian_vectorized,
+            'linear': cls.linear_vectorized,
+        }
+
+        if decay_type not in functions:
+            raise ValueError(
+                f"Unknown decay type: {decay_type}. "
+                f"Available: {list(functions.keys())}"
+            )
+
+        return functions[decay_type]
+
     @classmethod
     def get_function(cls, decay_type: str):
         """
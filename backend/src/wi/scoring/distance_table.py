@@ -0,0 +1,202 @@
+"""セル→アメニティ距離テーブル（メモリマップ）."""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from loguru import logger
+
+from .decay_functions import DecayFunction
+
+TABLE_METADATA_KEY = b"wi_distance_table"
+
+
+class DistanceTable:
+    """
+    Phase 2 の距離テーブルを非圧縮の Arrow IPC ファイルとして保持し、
+    メモリマップで参照するクラス.
+
+    行はタイプ・セル・距離の順にソートされ、セルは基準グリッドの行位置
+    （int32）、距離は float32 で持ちます。タイプごとの行範囲はスキーマの
+    メタデータに記録されているため、あるタイプのスコア計算では
+    そのタイプの区間だけをゼロコピーで読み出します。
+    """
+
+    def __init__(self, path: Path):
+        """
+        距離テーブルを開く.
+
+        Args:
+            path: build() で作成したファイル
+        """
+        self.path = Path(path)
+        reader = pa.ipc.open_file(pa.memory_map(str(self.path), "r"))
+        self.metadata: Dict[str, Any] = json.loads(reader.schema.metadata[TABLE_METADATA_KEY])
+        self.n_cells: int = self.metadata["n_cells"]
+        self.ranges: Dict[str, List[int]] = self.metadata["types"]
+        # 作成元ファイルのバージョン（スコアのキャッシュキーに使う）
+        self.version: str = hashlib.sha256(
+            json.dumps(self.metadata, sort_keys=True).encode("utf-8")
+        ).hexdigest()[:16]
+
+        if reader.num_record_batches:
+            batch = reader.get_batch(0)
+            self._cells = batch.column("cell").to_numpy()
+            self._distances = batch.column("distance").to_numpy()
+        else:
+            self._cells = np.empty(0, dtype=np.int32)
+            self._distances = np.empty(0, dtype=np.float32)
+
+    @property
+    def types(self) -> List[str]:
+        """テーブルに含まれるアメニティタイプ."""
+        return list(self.ranges)
+
+    @classmethod
+    def build(
+        cls,
+        path: Path,
+        distance_files: Sequence[Path],
+        grid_ids: np.ndarray,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> "DistanceTable":
+        """
+        距離parquet（grid_id, amenity_type, distance）から距離テーブルを作成.
+
+        同じタイプが複数のファイルにある場合は最初のファイルの距離を使います
+        （プロファイルが違ってもアメニティまでの距離は同じため）。
+
+        Args:
+            path: 出力ファイル
+            distance_files: distances_{area}_{profile}.parquet
+            grid_ids: 基準グリッドのgrid_id（行位置がセル番号になる）
+            metadata: メタデータに追加する情報（元ファイルのバージョンなど）
+
+        Returns:
+            作成したテーブル
+        """
+        cell_index = pd.Index(grid_ids)
+        cells, distances, codes = [], [], []
+        type_names: List[str] = []
+
+        for file_path in distance_files:
+            frame = pq.read_table(file_path, columns=["grid_id", "amenity_type", "distance"]).to_pandas()
+            frame = frame[~frame["amenity_type"].isin(type_names)]
+            if len(frame) == 0:
+                continue
+
+            positions = cell_index.get_indexer(frame["grid_id"])
+            frame = frame[positions >= 0]
+            positions = positions[positions >= 0]
+
+            new_types = sorted(frame["amenity_type"].unique())
+            type_codes = {t: len(type_names) + i for i, t in enumerate(new_types)}
+            type_names.extend(new_types)
+
+            cells.append(positions.astype(np.int32))
+            distances.append(frame["distance"].to_numpy(dtype=np.float32))
+            codes.append(frame["amenity_type"].map(type_codes).to_numpy(dtype=np.int32))
+
+        cells = np.concatenate(cells) if cells else np.empty(0, dtype=np.int32)
+        distances = np.concatenate(distances) if distances else np.empty(0, dtype=np.float32)
+        codes = np.concatenate(codes) if codes else np.empty(0, dtype=np.int32)
+
+        order = np.lexsort((distances, cells, codes))
+        cells, distances, codes = cells[order], distances[order], codes[order]
+        bounds = np.searchsorted(codes, np.arange(len(type_names) + 1))
+
+        table_metadata = dict(metadata or {})
+        table_metadata.update({
+            "n_cells": int(len(grid_ids)),
+            "types": {
+                name: [int(bounds[i]), int(bounds[i + 1])]
+                for i, name in enumerate(type_names)
+            }
+        })
+
+        schema = pa.schema(
+            [("cell", pa.int32()), ("distance", pa.float32())],
+            metadata={TABLE_METADATA_KEY: json.dumps(table_metadata)}
+        )
+        batch = pa.record_batch([pa.array(cells), pa.array(distances)], schema=schema)
+
+        # 一時ファイルに書いてから置き換え（読み込み中のプロセスに影響しない）
+        tmp_path = Path(f"{path}.tmp{os.getpid()}")
+        with pa.OSFile(str(tmp_path), "wb") as sink:
+            with pa.ipc.new_file(sink, schema) as writer:
+                writer.write_batch(batch)
+        os.replace(tmp_path, path)
+
+        logger.info(
+            f"Built distance table: {path} "
+            f"({len(cells):,} pairs, {len(type_names)} types, {len(grid_ids):,} cells)"
+        )
+
+        return cls(path)
+
+    def score(
+        self,
+        amenity_type: str,
+        ideal_distance: float,
+        max_distance: float,
+        decay_type: str = "exponential",
+        decay_params: Optional[Dict[str, Any]] = None,
+        diminishing_exponent: Optional[float] = None
+    ) -> np.ndarray:
+        """
+        あるタイプのセル別スコアを計算.
+
+        WalkabilityCalculator と同じ規則です。距離減衰をベクトル演算で適用し、
+        効用逓減が有効な場合はセル内で近い順に n 番目のアメニティを
+        ``1 / n^exponent`` 倍して合計（上限1.0）、無効な場合は最寄りのみを
+        使います。アメニティのないセルは0です。
+
+        Args:
+            amenity_type: アメニティタイプ
+            ideal_distance: 理想距離（メートル）
+            max_distance: 最大距離（メートル）
+            decay_type: 'exponential', 'gaussian', 'linear'
+            decay_params: 減衰関数の追加パラメータ（min_score, sigma_factor）
+            diminishing_exponent: 効用逓減の指数（Noneの場合は最寄りのみ）
+
+        Returns:
+            セル数の長さのスコア配列
+
+        Raises:
+            KeyError: タイプがテーブルにない場合
+            ValueError: 減衰関数が不明な場合
+        """
+        start, end = self.ranges[amenity_type]
+        decay = DecayFunction.get_vectorized(decay_type)
+
+        cells = self._cells[start:end]
+        base = decay(
+            self._distances[start:end].astype(float),
+            ideal_distance,
+            max_distance,
+            **(decay_params or {})
+        )
+
+        scores = np.zeros(self.n_cells)
+        if len(cells) == 0:
+            return scores
+
+        # セル内の順位（セル・距離順にソート済み）
+        first = np.concatenate([[True], cells[1:] != cells[:-1]])
+        if diminishing_exponent is None:
+            scores[cells[first]] = base[first]
+            return scores
+
+        group_start = np.flatnonzero(first)
+        sizes = np.diff(np.append(group_start, len(cells)))
+        rank = np.arange(len(cells)) - np.repeat(group_start, sizes)
+        weighted = base / (rank + 1.0) ** diminishing_exponent
+
+        scores = np.bincount(cells, weights=weighted, minlength=self.n_cells)
+        return np.minimum(scores, 1.0)
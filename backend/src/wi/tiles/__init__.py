@@ -0,0 +1,13 @@
+"""Vector tile generation modules."""
+
+from .mercator import tile_bounds_lonlat, tile_bounds_mercator, tiles_for_bounds, validate_tile
+from .mvt import Layer, encode_tile
+from .grid_tiles import build_grid_layer, build_point_layer
+from .archive import MBTilesArchive
+from .builder import TileArchiveBuilder
+
+__all__ = [
+    'Layer', 'encode_tile', 'build_grid_layer', 'build_point_layer',
+    'MBTilesArchive', 'TileArchiveBuilder',
+    'tile_bounds_lonlat', 'tile_bounds_mercator', 'tiles_for_bounds', 'validate_tile'
+]
@@ -0,0 +1,129 @@
+"""MBTilesアーカイブの読み書き."""
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from loguru import logger
+
+
+class MBTilesArchive:
+    """
+    MBTiles 1.3 形式のタイルアーカイブ.
+
+    タイルはgzip圧縮したMVTとして格納します（仕様どおりTMSのy座標）。
+    差分再構築のため、各タイルの入力データのハッシュを
+    ``tile_hashes`` テーブルに保持します。
+    """
+
+    def __init__(self, path: Path, readonly: bool = False):
+        """
+        初期化.
+
+        Args:
+            path: .mbtilesファイルのパス
+            readonly: 読み取り専用で開く
+        """
+        self.path = Path(path)
+        self.readonly = readonly
+        self._lock = threading.Lock()
+
+        if readonly:
+            self._conn = sqlite3.connect(
+                f"file:{self.path}?mode=ro", uri=True, check_same_thread=False
+            )
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._create_schema()
+
+    def _create_schema(self):
+        with self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT);
+                CREATE TABLE IF NOT EXISTS tiles (
+                    zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, tile_data BLOB,
+                    PRIMARY KEY (zoom_level, tile_column, tile_row)
+                );
+                CREATE TABLE IF NOT EXISTS tile_hashes (
+                    zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, hash TEXT,
+                    PRIMARY KEY (zoom_level, tile_column, tile_row)
+                );
+            """)
+
+    @staticmethod
+    def _tms_row(z: int, y: int) -> int:
+        return (2 ** z - 1) - y
+
+    def read_tile(self, z: int, x: int, y: int) -> Optional[bytes]:
+        """
+        タイルを読み込み（XYZ座標）.
+
+        Returns:
+            gzip圧縮されたMVT。存在しない場合None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT tile_data FROM tiles WHERE zoom_level=? AND tile_column=? AND tile_row=?",
+                (z, x, self._tms_row(z, y))
+            ).fetchone()
+        return row[0] if row else None
+
+    def get_metadata(self) -> Dict[str, str]:
+        """メタデータを取得."""
+        with self._lock:
+            return dict(self._conn.execute("SELECT name, value FROM metadata").fetchall())
+
+    def set_metadata(self, metadata: Dict[str, str]):
+        """メタデータを書き込み."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO metadata (name, value) VALUES (?, ?)",
+                [(k, str(v)) for k, v in metadata.items()]
+            )
+
+    def get_hashes(self) -> Dict[Tuple[int, int, int], str]:
+        """全タイルの入力ハッシュを取得（XYZ座標）."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT zoom_level, tile_column, tile_row, hash FROM tile_hashes"
+            ).fetchall()
+        return {(z, x, self._tms_row(z, tms_y)): h for z, x, tms_y, h in rows}
+
+    def write_tiles(self, tiles: Iterable[Tuple[int, int, int, Optional[bytes], str]]):
+        """
+        タイルを書き込み.
+
+        Args:
+            tiles: (z, x, y, gzip済みタイル, 入力ハッシュ) のイテラブル。
+                タイルがNoneの場合は削除
+        """
+        with self._lock, self._conn:
+            for z, x, y, data, tile_hash in tiles:
+                key = (z, x, self._tms_row(z, y))
+                if data is None:
+                    self._conn.execute(
+                        "DELETE FROM tiles WHERE zoom_level=? AND tile_column=? AND tile_row=?", key
+                    )
+                    self._conn.execute(
+                        "DELETE FROM tile_hashes WHERE zoom_level=? AND tile_column=? AND tile_row=?", key
+                    )
+                else:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?)", (*key, data)
+                    )
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO tile_hashes VALUES (?, ?, ?, ?)", (*key, tile_hash)
+                    )
+
+    def vacuum(self):
+        """削除後の空き領域を回収."""
+        with self._lock:
+            self._conn.execute("VACUUM")
+        logger.info(f"Vacuumed tile archive: {self.path}")
+
+    def close(self):
+        """接続を閉じる."""
+        with self._lock:
+            self._conn.close()
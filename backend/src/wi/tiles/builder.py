@@ -0,0 +1,280 @@
+"""WIグリッド・アメニティの静的タイルアーカイブ生成."""
+
+import gzip
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import geopandas as gpd
+import numpy as np
+import shapely
+from loguru import logger
+from shapely.geometry import box
+
+from .archive import MBTilesArchive
+from .grid_tiles import AMENITY_LAYER, GRID_LAYER, build_grid_layer, build_point_layer
+from .mercator import tile_bounds_lonlat, tiles_for_bounds
+from .mvt import encode_tile
+
+# 出力形式を変えた場合に上げる（全タイルが再構築される）
+TILE_FORMAT_VERSION = "1"
+
+# ワーカープロセスごとの入力データ
+_WORKER: Dict[str, object] = {}
+
+
+def _init_worker(
+    grid_wkb: np.ndarray,
+    scores: np.ndarray,
+    grid_ids: np.ndarray,
+    amenity_lons: np.ndarray,
+    amenity_lats: np.ndarray,
+    amenity_props: List[dict],
+    extent: int
+):
+    """ワーカープロセスの初期化（入力データを一度だけ受け取る）."""
+    _WORKER["geometries"] = shapely.from_wkb(grid_wkb)
+    _WORKER["scores"] = scores
+    _WORKER["grid_ids"] = grid_ids
+    _WORKER["amenity_lons"] = amenity_lons
+    _WORKER["amenity_lats"] = amenity_lats
+    _WORKER["amenity_props"] = amenity_props
+    _WORKER["extent"] = extent
+
+
+def _encode_tiles(tasks: List[tuple]) -> List[Tuple[int, int, int, bytes, str]]:
+    """タイル群をエンコード（ワーカープロセスで実行）."""
+    extent = _WORKER["extent"]
+    results = []
+
+    for z, x, y, grid_rows, amenity_rows, tile_hash in tasks:
+        layers = [build_grid_layer(
+            _WORKER["geometries"][grid_rows],
+            _WORKER["scores"][grid_rows],
+            _WORKER["grid_ids"][grid_rows],
+            z, x, y,
+            extent=extent,
+            layer_name=GRID_LAYER
+        )]
+        if len(amenity_rows):
+            layers.append(build_point_layer(
+                _WORKER["amenity_lons"][amenity_rows],
+                _WORKER["amenity_lats"][amenity_rows],
+                [_WORKER["amenity_props"][i] for i in amenity_rows],
+                z, x, y,
+                extent=extent,
+                layer_name=AMENITY_LAYER
+            ))
+        tile = encode_tile(layers)
+        results.append((z, x, y, gzip.compress(tile, mtime=0), tile_hash))
+
+    return results
+
+
+class TileArchiveBuilder:
+    """
+    静的タイルアーカイブ（MBTiles）のビルダー.
+
+    全ズームレベルのタイルを複数プロセスで並列にエンコードします。
+    タイルごとに入力データ（セル・アメニティ）のハッシュを保存し、
+    再実行時は内容が変わったタイルのみ再エンコードします。
+    """
+
+    def __init__(
+        self,
+        grid: gpd.GeoDataFrame,
+        amenities: Optional[gpd.GeoDataFrame] = None,
+        min_zoom: int = 10,
+        max_zoom: int = 16,
+        workers: Optional[int] = None,
+        extent: int = 4096
+    ):
+        """
+        初期化.
+
+        Args:
+            grid: WIスコア付きグリッド
+            amenities: アメニティ（任意）
+            min_zoom: 最小ズーム
+            max_zoom: 最大ズーム
+            workers: ワーカープロセス数（Noneの場合CPU数、1の場合は直列）
+            extent: タイル座標の範囲
+        """
+        if grid.crs and grid.crs.to_epsg() != 4326:
+            grid = grid.to_crs(epsg=4326)
+        if amenities is not None and amenities.crs and amenities.crs.to_epsg() != 4326:
+            amenities = amenities.to_crs(epsg=4326)
+
+        self.grid = grid.reset_index(drop=True)
+        self.amenities = amenities.reset_index(drop=True) if amenities is not None else None
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        self.workers = workers or os.cpu_count() or 1
+        self.extent = extent
+
+    def _amenity_inputs(self) -> Tuple[np.ndarray, np.ndarray, List[dict]]:
+        """アメニティの座標と属性を取得."""
+        if self.amenities is None or self.amenities.empty:
+            return np.empty(0), np.empty(0), []
+
+        props = []
+        types = self.amenities.get("amenity_type")
+        names = self.amenities.get("name")
+        for i in range(len(self.amenities)):
+            p = {}
+            if types is not None and isinstance(types.iloc[i], str):
+                p["amenity_type"] = types.iloc[i]
+            if names is not None and isinstance(names.iloc[i], str):
+                p["name"] = names.iloc[i]
+            props.append(p)
+
+        return self.amenities.geometry.x.to_numpy(), self.amenities.geometry.y.to_numpy(), props
+
+    def _plan(self) -> List[tuple]:
+        """全タイルの入力行とハッシュを計算."""
+        grid_tree = self.grid.sindex
+        amenity_tree = self.amenities.sindex if self.amenities is not None and not self.amenities.empty else None
+
+        scores = self.grid["wi_score"].to_numpy(dtype=float)
+        bounds = shapely.bounds(self.grid.geometry.values)
+        grid_ids = self.grid["grid_id"].astype(str).to_numpy()
+        amenity_keys = None
+        if amenity_tree is not None:
+            amenity_keys = np.array([
+                f"{g.x:.7f},{g.y:.7f},{t},{n}"
+                for g, t, n in zip(
+                    self.amenities.geometry,
+                    self.amenities.get("amenity_type", [""] * len(self.amenities)),
+                    self.amenities.get("name", [""] * len(self.amenities))
+                )
+            ])
+
+        min_lon, min_lat, max_lon, max_lat = self.grid.total_bounds
+        plan = []
+
+        for z in range(self.min_zoom, self.max_zoom + 1):
+            xs, ys = tiles_for_bounds(min_lon, min_lat, max_lon, max_lat, z)
+            for x in xs:
+                for y in ys:
+                    tile_box = box(*tile_bounds_lonlat(z, x, y))
+                    grid_rows = np.sort(grid_tree.query(tile_box, predicate="intersects"))
+                    if len(grid_rows) == 0:
+                        continue
+                    amenity_rows = np.empty(0, dtype=int)
+                    if amenity_tree is not None:
+                        amenity_rows = np.sort(amenity_tree.query(tile_box, predicate="intersects"))
+
+                    digest = hashlib.blake2b(digest_size=16)
+                    digest.update(TILE_FORMAT_VERSION.encode())
+                    digest.update(str(self.extent).encode())
+                    digest.update("\x00".join(grid_ids[grid_rows]).encode("utf-8"))
+                    digest.update(scores[grid_rows].tobytes())
+                    digest.update(bounds[grid_rows].tobytes())
+                    if len(amenity_rows):
+                        digest.update("\x00".join(amenity_keys[amenity_rows]).encode("utf-8"))
+
+                    plan.append((z, x, y, grid_rows, amenity_rows, digest.hexdigest()))
+
+        return plan
+
+    def build(
+        self,
+        output_path: Path,
+        name: str = "wi",
+        force: bool = False,
+        metadata: Optional[Dict[str, str]] = None
+    ) -> Dict[str, int]:
+        """
+        アーカイブを生成（既存アーカイブは差分更新）.
+
+        Args:
+            output_path: .mbtilesファイルのパス
+            name: タイルセット名
+            force: 全タイルを再エンコード
+            metadata: 追加メタデータ
+
+        Returns:
+            統計（total, encoded, unchanged, removed）
+        """
+        output_path = Path(output_path)
+        archive = MBTilesArchive(output_path)
+
+        try:
+            existing = {} if force else archive.get_hashes()
+            plan = self._plan()
+
+            planned = {(z, x, y) for z, x, y, *_ in plan}
+            changed = [t for t in plan if existing.get(t[:3]) != t[5]]
+            removed = [key for key in existing if key not in planned]
+
+            logger.info(
+                f"Tile plan: {len(plan)} tiles (z{self.min_zoom}-{self.max_zoom}), "
+                f"{len(changed)} to encode, {len(removed)} to remove"
+            )
+
+            archive.write_tiles((z, x, y, None, "") for z, x, y in removed)
+
+            amenity_lons, amenity_lats, amenity_props = self._amenity_inputs()
+            initargs = (
+                shapely.to_wkb(self.grid.geometry.values),
+                self.grid["wi_score"].to_numpy(dtype=float),
+                self.grid["grid_id"].astype(str).to_numpy(),
+                amenity_lons, amenity_lats, amenity_props,
+                self.extent
+            )
+
+            chunk_size = 64
+            chunks = [changed[i:i + chunk_size] for i in range(0, len(changed), chunk_size)]
+
+            if self.workers <= 1 or len(chunks) <= 1:
+                _init_worker(*initargs)
+                for chunk in chunks:
+                    archive.write_tiles(_encode_tiles(chunk))
+            else:
+                with ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    initializer=_init_worker,
+                    initargs=initargs
+                ) as pool:
+                    for results in pool.map(_encode_tiles, chunks):
+                        archive.write_tiles(results)
+
+            min_lon, min_lat, max_lon, max_lat = self.grid.total_bounds
+            vector_layers = [{"id": GRID_LAYER, "fields": {
+                "grid_id": "String", "wi_score": "Number", "cells": "Number"
+            }, "minzoom": self.min_zoom, "maxzoom": self.max_zoom}]
+            if amenity_props:
+                vector_layers.append({"id": AMENITY_LAYER, "fields": {
+                    "amenity_type": "String", "name": "String"
+                }, "minzoom": self.min_zoom, "maxzoom": self.max_zoom})
+
+            archive.set_metadata({
+                "name": name,
+                "format": "pbf",
+                "type": "overlay",
+                "version": TILE_FORMAT_VERSION,
+                "minzoom": self.min_zoom,
+                "maxzoom": self.max_zoom,
+                "bounds": f"{min_lon},{min_lat},{max_lon},{max_lat}",
+                "center": f"{(min_lon + max_lon) / 2},{(min_lat + max_lat) / 2},{self.min_zoom}",
+                "json": json.dumps({"vector_layers": vector_layers}),
+                **(metadata or {})
+            })
+
+            if removed:
+                archive.vacuum()
+        finally:
+            archive.close()
+
+        stats = {
+            "total": len(plan),
+            "encoded": len(changed),
+            "unchanged": len(plan) - len(changed),
+            "removed": len(removed)
+        }
+        logger.info(f"Tile archive written: {output_path} {stats}")
+
+        return stats
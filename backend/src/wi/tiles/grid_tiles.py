@@ -0,0 +1,154 @@
+"""WIグリッドのベクタタイル生成."""
+
+from typing import Optional, Sequence
+
+import numpy as np
+import shapely
+
+from .mercator import lonlat_to_mercator, tile_bounds_mercator
+from .mvt import POINT, POLYGON, Layer, encode_points, encode_polygon
+
+GRID_LAYER = "wi_grid"
+AMENITY_LAYER = "amenities"
+
+# ズームアウト時にセルを集約する閾値・集約サイズ（タイル座標単位）
+AGGREGATE_BELOW = 32
+AGGREGATE_BIN = 32
+
+
+def _to_tile_coords(lon, lat, z: int, x: int, y: int, extent: int):
+    """経緯度をタイル座標（整数）に変換."""
+    minx, _, maxx, maxy = tile_bounds_mercator(z, x, y)
+    span = maxx - minx
+    mx, my = lonlat_to_mercator(lon, lat)
+    px = np.rint((mx - minx) / span * extent).astype(np.int64)
+    py = np.rint((maxy - my) / span * extent).astype(np.int64)
+    return px, py
+
+
+def build_grid_layer(
+    geometries: np.ndarray,
+    scores: np.ndarray,
+    grid_ids: Sequence[str],
+    z: int,
+    x: int,
+    y: int,
+    extent: int = 4096,
+    feature_ids: Optional[np.ndarray] = None,
+    layer_name: str = GRID_LAYER,
+    value_name: str = "wi_score"
+) -> Layer:
+    """
+    グリッドセルからMVTレイヤーを生成.
+
+    セルがタイル上で ``AGGREGATE_BELOW`` 単位より小さくなるズームでは、
+    ``AGGREGATE_BIN`` 単位の正方形にセルを集約し、平均スコアとセル数を
+    属性として出力します。
+
+    Args:
+        geometries: セルポリゴン（EPSG:4326）の配列
+        scores: スコア配列
+        grid_ids: グリッドID
+        z, x, y: タイル番号
+        extent: タイル座標の範囲
+        feature_ids: フィーチャーID（任意、集約時は未使用）
+        layer_name: レイヤー名
+        value_name: スコア属性名
+
+    Returns:
+        Layer
+    """
+    layer = Layer(layer_name, extent)
+    if len(geometries) == 0:
+        return layer
+
+    bounds = shapely.bounds(geometries)
+    min_px, min_py = _to_tile_coords(bounds[:, 0], bounds[:, 3], z, x, y, extent)
+    max_px, max_py = _to_tile_coords(bounds[:, 2], bounds[:, 1], z, x, y, extent)
+    cell_width = float(np.median(max_px - min_px))
+
+    scores = np.asarray(scores, dtype=float)
+
+    if cell_width < AGGREGATE_BELOW:
+        # 低ズーム: 重心の属するビンごとに平均
+        cx = (min_px + max_px) // 2
+        cy = (min_py + max_py) // 2
+        valid = ~np.isnan(scores)
+        bins = np.stack([cx[valid] // AGGREGATE_BIN, cy[valid] // AGGREGATE_BIN], axis=1)
+        if len(bins) == 0:
+            return layer
+        keys, inverse = np.unique(bins, axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        counts = np.bincount(inverse)
+        means = np.bincount(inverse, weights=scores[valid]) / counts
+
+        for (bx, by), mean, count in zip(keys.tolist(), means.tolist(), counts.tolist()):
+            x0, y0 = bx * AGGREGATE_BIN, by * AGGREGATE_BIN
+            x1, y1 = x0 + AGGREGATE_BIN, y0 + AGGREGATE_BIN
+            layer.add_feature(
+                POLYGON,
+                encode_polygon([(x0, y0), (x1, y0), (x1, y1), (x0, y1)]),
+                {value_name: round(mean, 2), "cells": int(count)}
+            )
+        return layer
+
+    # 高ズーム: セルをそのまま出力
+    rings = shapely.get_exterior_ring(geometries)
+    coords, index = shapely.get_coordinates(rings, return_index=True)
+    px, py = _to_tile_coords(coords[:, 0], coords[:, 1], z, x, y, extent)
+    splits = np.flatnonzero(np.diff(index)) + 1
+    starts = np.concatenate([[0], splits]).tolist()
+    ends = np.concatenate([splits, [len(index)]]).tolist()
+    px = px.tolist()
+    py = py.tolist()
+    owners = index[starts].tolist() if len(index) else []
+
+    for owner, start, end in zip(owners, starts, ends):
+        ring = list(zip(px[start:end - 1], py[start:end - 1]))
+        score = scores[owner]
+        properties = {"grid_id": str(grid_ids[owner])}
+        if not np.isnan(score):
+            properties[value_name] = round(float(score), 2)
+        layer.add_feature(
+            POLYGON,
+            encode_polygon(ring),
+            properties,
+            feature_id=int(feature_ids[owner]) if feature_ids is not None else None
+        )
+
+    return layer
+
+
+def build_point_layer(
+    lons: np.ndarray,
+    lats: np.ndarray,
+    properties: Sequence[dict],
+    z: int,
+    x: int,
+    y: int,
+    extent: int = 4096,
+    layer_name: str = AMENITY_LAYER
+) -> Layer:
+    """
+    ポイント（アメニティ）からMVTレイヤーを生成.
+
+    Args:
+        lons: 経度の配列
+        lats: 緯度の配列
+        properties: 各ポイントの属性
+        z, x, y: タイル番号
+        extent: タイル座標の範囲
+        layer_name: レイヤー名
+
+    Returns:
+        Layer
+    """
+    layer = Layer(layer_name, extent)
+    if len(lons) == 0:
+        return layer
+
+    px, py = _to_tile_coords(lons, lats, z, x, y, extent)
+    for point_x, point_y, props in zip(px.tolist(), py.tolist(), properties):
+        layer.add_feature(POINT, encode_points([(point_x, point_y)]), props)
+
+    return layer
@@ -0,0 +1,98 @@
+"""Web Mercator tile math (XYZ / slippy map scheme)."""
+
+import math
+from typing import Tuple
+
+import numpy as np
+
+EARTH_RADIUS = 6378137.0
+ORIGIN_SHIFT = math.pi * EARTH_RADIUS  # 20037508.34...
+
+
+def lonlat_to_mercator(lon, lat):
+    """
+    経緯度をWeb Mercator座標（メートル）に変換.
+
+    Args:
+        lon: 経度（スカラーまたは配列）
+        lat: 緯度（スカラーまたは配列）
+
+    Returns:
+        (x, y) メートル
+    """
+    lon = np.asarray(lon, dtype=float)
+    lat = np.clip(np.asarray(lat, dtype=float), -85.0511287798, 85.0511287798)
+    x = np.radians(lon) * EARTH_RADIUS
+    y = np.log(np.tan(np.pi / 4 + np.radians(lat) / 2)) * EARTH_RADIUS
+    return x, y
+
+
+def tile_bounds_mercator(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """
+    タイルの範囲をWeb Mercator座標で取得.
+
+    Returns:
+        (minx, miny, maxx, maxy) メートル
+    """
+    span = 2 * ORIGIN_SHIFT / (2 ** z)
+    minx = -ORIGIN_SHIFT + x * span
+    maxy = ORIGIN_SHIFT - y * span
+    return minx, maxy - span, minx + span, maxy
+
+
+def tile_bounds_lonlat(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """
+    タイルの範囲を経緯度で取得.
+
+    Returns:
+        (min_lon, min_lat, max_lon, max_lat)
+    """
+    n = 2 ** z
+
+    def lat_of(ty: int) -> float:
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * ty / n))))
+
+    return x / n * 360.0 - 180.0, lat_of(y + 1), (x + 1) / n * 360.0 - 180.0, lat_of(y)
+
+
+def tiles_for_bounds(
+    min_lon: float,
+    min_lat: float,
+    max_lon: float,
+    max_lat: float,
+    z: int
+) -> Tuple[range, range]:
+    """
+    範囲をカバーするタイル番号の範囲を取得.
+
+    Returns:
+        (xの範囲, yの範囲)
+    """
+    n = 2 ** z
+
+    def tile_x(lon: float) -> int:
+        return min(n - 1, max(0, int((lon + 180.0) / 360.0 * n)))
+
+    def tile_y(lat: float) -> int:
+        lat_rad = math.radians(max(min(lat, 85.0511287798), -85.0511287798))
+        ty = (1 - math.asinh(math.tan(lat_rad)) / math.pi) / 2 * n
+        return min(n - 1, max(0, int(ty)))
+
+    return (
+        range(tile_x(min_lon), tile_x(max_lon) + 1),
+        range(tile_y(max_lat), tile_y(min_lat) + 1)
+    )
+
+
+def validate_tile(z: int, x: int, y: int, max_zoom: int = 22):
+    """
+    タイル番号を検証.
+
+    Raises:
+        ValueError: 範囲外のタイル番号
+    """
+    if not 0 <= z <= max_zoom:
+        raise ValueError(f"Zoom level must be between 0 and {max_zoom}: {z}")
+    n = 2 ** z
+    if not (0 <= x < n and 0 <= y < n):
+        raise ValueError(f"Tile {z}/{x}/{y} is outside the tile grid")
@@ -0,0 +1,213 @@
+"""
+Mapbox Vector Tile (MVT 2.1) エンコーダ.
+
+依存ライブラリを増やさないよう、必要最小限のprotobufエンコードを実装します。
+仕様: https://github.com/mapbox/vector-tile-spec/tree/master/2.1
+"""
+
+import struct
+from typing import Any, Dict, List, Sequence, Tuple
+
+# Geometry types
+POINT = 1
+POLYGON = 3
+
+# Geometry commands
+_MOVE_TO = 1
+_LINE_TO = 2
+_CLOSE_PATH = 7
+
+
+def _varint(value: int) -> bytes:
+    """符号なし整数をprotobuf varintにエンコード."""
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _key(field: int, wire_type: int) -> bytes:
+    return _varint((field << 3) | wire_type)
+
+
+def _length_delimited(field: int, payload: bytes) -> bytes:
+    return _key(field, 2) + _varint(len(payload)) + payload
+
+
+def _packed(field: int, values: Sequence[int]) -> bytes:
+    return _length_delimited(field, b"".join(_varint(v) for v in values))
+
+
+def _zigzag(value: int) -> int:
+    return (value << 1) ^ (value >> 63)
+
+
+def _command(command: int, count: int) -> int:
+    return (command & 0x7) | (count << 3)
+
+
+def _encode_value(value: Any) -> bytes:
+    """Valueメッセージをエンコード."""
+    if isinstance(value, bool):
+        return _key(7, 0) + _varint(int(value))
+    if isinstance(value, int):
+        if value >= 0:
+            return _key(5, 0) + _varint(value)
+        return _key(6, 0) + _varint(_zigzag(value))
+    if isinstance(value, float):
+        return _key(3, 1) + struct.pack("<d", value)
+    return _length_delimited(1, str(value).encode("utf-8"))
+
+
+def _ring_area(ring: List[Tuple[int, int]]) -> int:
+    """リングの符号付き面積×2（タイル座標系、y下向き）."""
+    area = 0
+    for (x0, y0), (x1, y1) in zip(ring, ring[1:] + ring[:1]):
+        area += x0 * y1 - x1 * y0
+    return area
+
+
+def encode_polygon(ring: List[Tuple[int, int]]) -> List[int]:
+    """
+    単一リングのポリゴンをジオメトリコマンド列にエンコード.
+
+    外周リングは仕様に従い時計回り（タイル座標系で正の面積）に揃えます。
+
+    Args:
+        ring: タイル座標の頂点リスト（閉じ点を含まない）
+
+    Returns:
+        ジオメトリコマンド列。縮退したリングは空リスト
+    """
+    # 連続する重複点を除去
+    points = [ring[0]]
+    for point in ring[1:]:
+        if point != points[-1]:
+            points.append(point)
+    if len(points) > 1 and points[-1] == points[0]:
+        points.pop()
+    if len(points) < 3:
+        return []
+
+    area = _ring_area(points)
+    if area == 0:
+        return []
+    if area < 0:
+        points.reverse()
+
+    x0, y0 = points[0]
+    geometry = [_command(_MOVE_TO, 1), _zigzag(x0), _zigzag(y0),
+                _command(_LINE_TO, len(points) - 1)]
+    cx, cy = x0, y0
+    for x, y in points[1:]:
+        geometry.append(_zigzag(x - cx))
+        geometry.append(_zigzag(y - cy))
+        cx, cy = x, y
+    geometry.append(_command(_CLOSE_PATH, 1))
+
+    return geometry
+
+
+def encode_points(points: List[Tuple[int, int]]) -> List[int]:
+    """ポイント（マルチポイント）をジオメトリコマンド列にエンコード."""
+    geometry = [_command(_MOVE_TO, len(points))]
+    cx, cy = 0, 0
+    for x, y in points:
+        geometry.append(_zigzag(x - cx))
+        geometry.append(_zigzag(y - cy))
+        cx, cy = x, y
+    return geometry
+
+
+class Layer:
+    """
+    MVTレイヤーのビルダー.
+
+    フィーチャーを追加し、``encode()`` でLayerメッセージを生成します。
+    キーと値のテーブルはレイヤー内で重複排除されます。
+    """
+
+    def __init__(self, name: str, extent: int = 4096):
+        """
+        初期化.
+
+        Args:
+            name: レイヤー名
+            extent: タイル座標の範囲
+        """
+        self.name = name
+        self.extent = extent
+        self._keys: Dict[str, int] = {}
+        self._values: Dict[Tuple[type, Any], int] = {}
+        self._features: List[bytes] = []
+
+    def __len__(self) -> int:
+        return len(self._features)
+
+    def _tags(self, properties: Dict[str, Any]) -> List[int]:
+        tags = []
+        for key, value in properties.items():
+            if value is None:
+                continue
+            key_index = self._keys.setdefault(key, len(self._keys))
+            value_index = self._values.setdefault((type(value), value), len(self._values))
+            tags.append(key_index)
+            tags.append(value_index)
+        return tags
+
+    def add_feature(
+        self,
+        geometry_type: int,
+        geometry: List[int],
+        properties: Dict[str, Any],
+        feature_id: int = None
+    ):
+        """
+        フィーチャーを追加.
+
+        Args:
+            geometry_type: POINT または POLYGON
+            geometry: ジオメトリコマンド列
+            properties: 属性
+            feature_id: フィーチャーID（任意）
+        """
+        if not geometry:
+            return
+
+        payload = b""
+        if feature_id is not None:
+            payload += _key(1, 0) + _varint(feature_id)
+        tags = self._tags(properties)
+        if tags:
+            payload += _packed(2, tags)
+        payload += _key(3, 0) + _varint(geometry_type)
+        payload += _packed(4, geometry)
+
+        self._features.append(payload)
+
+    def encode(self) -> bytes:
+        """Layerメッセージをエンコード."""
+        payload = _key(15, 0) + _varint(2)
+        payload += _length_delimited(1, self.name.encode("utf-8"))
+        payload += b"".join(_length_delimited(2, f) for f in self._features)
+        payload += b"".join(
+            _length_delimited(3, key.encode("utf-8")) for key in self._keys
+        )
+        payload += b"".join(
+            _length_delimited(4, _encode_value(value)) for _, value in self._values
+        )
+        payload += _key(5, 0) + _varint(self.extent)
+        return payload
+
+
+def encode_tile(layers: List[Layer]) -> bytes:
+    """
+    レイヤーをTileメッセージにエンコード.
+
+    空のレイヤーは出力しません。全レイヤーが空なら空バイト列を返します。
+    """
+    return b"".join(
+        _length_delimited(3, layer.encode()) for layer in layers if len(layer) > 0
+    )
@@ -34,6 +34,14 @@ export const fetchWIGrid = async ({ area, profile, bbox }) => {
   return await apiClient.get('/wi/grid', { params });
 };
 
+/**
+ * Build the vector tile URL template for a WI grid layer
+ * (Mapbox Vector Tiles, layer name "wi_grid")
+ */
+export const getWITileUrl = ({ area, profile }) => {
+  return `${apiClient.defaults.baseURL}/wi/tiles/${encodeURIComponent(area)}/${encodeURIComponent(profile)}/{z}/{x}/{y}.pbf`;
+};
+
 /**
  * Fetch WI for a specific point
  */
@@ -55,7 +63,7 @@ export const fetchWIStatistics = async ({ area, profile }) => {
 /**
  * Fetch amenities data
  */
-export const fetchAmenities = async ({ area, amenityTypes, bbox }) => {
+export const fetchAmenities = async ({ area, amenityTypes, bbox, zoom }) => {
   const params = { area };
   if (amenityTypes && amenityTypes.length > 0) {
     params.amenity_types = amenityTypes.join(',');
@@ -63,6 +71,9 @@ export const fetchAmenities = async ({ area, amenityTypes, bbox }) => {
   if (bbox) {
     params.bbox = bbox;
   }
+  if (zoom !== undefined && zoom !== null) {
+    params.zoom = zoom;  // cluster points below the server's point zoom
+  }
   return await apiClient.get('/amenities', { params });
 };
 